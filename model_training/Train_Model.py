@@ -1,3 +1,4 @@
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -20,10 +21,20 @@ from tensorflow.keras.callbacks import ( # type: ignore
     EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
 )
 
+# Reuse the web app's inference code to export lightweight model variants
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'stroke_prediction'))
+from app.utils.inference import ( # noqa: E402
+    NumpyBackend, lite_path, quantize_layers, save_variant, variant_path
+)
+
 class StrokeModelTrainer:
-    def __init__(self, processed_data_path, model_dir='stroke_prediction/app/static/models'):
+    def __init__(self, processed_data_path, model_dir='stroke_prediction/app/static/models',
+                 variant_tolerances=None):
         self.data_path = processed_data_path
         self.model_dir = Path(model_dir)
+        
+        # Largest allowed drop in test metrics for an exported float16/int8 variant
+        self.variant_tolerances = variant_tolerances or {'auc_roc': 0.01, 'recall': 0.02}
         self.model_dir.mkdir(parents=True, exist_ok=True)
         self.output_dir = Path('Training_Outputs')  # Output directory for plots
         self.history = None
@@ -143,13 +154,7 @@ class StrokeModelTrainer:
         y_pred = (y_pred_proba >= 0.5).astype(int)
         
         # Calculate metrics
-        self.metrics = {
-            'accuracy': accuracy_score(self.y_test, y_pred),
-            'precision': precision_score(self.y_test, y_pred),
-            'recall': recall_score(self.y_test, y_pred),
-            'f1': f1_score(self.y_test, y_pred),
-            'auc_roc': roc_auc_score(self.y_test, y_pred_proba)
-        }
+        self.metrics = self.compute_metrics(self.y_test, y_pred_proba)
         
         # Print results
         print("\nModel Performance Metrics:")
@@ -163,6 +168,67 @@ class StrokeModelTrainer:
         with open(self.model_dir / 'model_metrics.json', 'w') as f:
             json.dump(self.metrics, f, indent=4)
 
+    @staticmethod
+    def compute_metrics(y_true, y_pred_proba):
+        """Test-set metrics as stored in model_metrics.json"""
+        y_pred = (y_pred_proba >= 0.5).astype(int)
+        return {
+            'accuracy': accuracy_score(y_true, y_pred),
+            'precision': precision_score(y_true, y_pred),
+            'recall': recall_score(y_true, y_pred),
+            'f1': f1_score(y_true, y_pred),
+            'auc_roc': roc_auc_score(y_true, y_pred_proba)
+        }
+
+    def export_portable_model(self):
+        """Export the best model to TFLite so web workers can skip TensorFlow"""
+        print("\nExporting portable TFLite model...")
+        
+        converter = tf.lite.TFLiteConverter.from_keras_model(self.best_model)
+        path = lite_path(self.model_dir / 'stroke_prediction_model_Best.keras')
+        with open(path, 'wb') as f:
+            f.write(converter.convert())
+        print(f"TFLite model saved to {path}")
+
+    def export_model_variants(self, variants=('float16', 'int8')):
+        """Export reduced-precision variants, publishing only those that keep accuracy"""
+        print("\nExporting model variants...")
+        
+        model_path = self.model_dir / 'stroke_prediction_model_Best.keras'
+        base_layers = NumpyBackend(model_path).layers
+        X_test = np.asarray(self.X_test, dtype=np.float32)
+        report = {}
+        
+        for variant in variants:
+            layers = quantize_layers(base_layers, variant)
+            metrics = self.compute_metrics(
+                self.y_test, NumpyBackend.from_layers(layers).predict(X_test)
+            )
+            
+            # Compare against the float32 metrics from evaluate_model
+            drops = {
+                name: self.metrics[name] - metrics[name]
+                for name in self.variant_tolerances
+            }
+            published = all(
+                drops[name] <= tolerance
+                for name, tolerance in self.variant_tolerances.items()
+            )
+            
+            path = variant_path(model_path, variant)
+            if published:
+                save_variant(layers, path)
+                print(f"{variant}: published to {path}")
+            else:
+                # Never leave a stale variant from an earlier model behind
+                path.unlink(missing_ok=True)
+                print(f"{variant}: NOT published, metric drops {drops} exceed {self.variant_tolerances}")
+            
+            report[variant] = {'published': published, 'metrics': metrics, 'drops': drops}
+        
+        with open(self.model_dir / 'model_variants.json', 'w') as f:
+            json.dump(report, f, indent=4)
+
     def plot_training_history(self):
         """Plot and save training history"""
 
@@ -275,6 +341,8 @@ class StrokeModelTrainer:
         self.load_data()
         self.train_model()
         self.evaluate_model()
+        self.export_portable_model()
+        self.export_model_variants()
         self.plot_training_history()
         self.test_model_predictions()
         
@@ -1,17 +1,35 @@
-from mongoengine import connect
-from datetime import datetime, timedelta
+"""Seed the patients collection with synthetic records.
+
+Faker generation runs in a process pool, each chunk is scored with one
+batched model call and written with an unordered insert_many, so memory
+stays bounded by the number of chunks in flight:
+
+    python Populate_MongoDB.py --records 2000000 --chunk-size 5000 --workers 8
+"""
+import argparse
+import os
 import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
 from faker import Faker
+from mongoengine import connect
+from pymongo.errors import BulkWriteError
 from app.models.patient import Patient
-from app.utils.prediction import StrokePredictor
+from app.utils.name_search import search_terms
+from app.utils.patient_counts import patient_counts
+from app.utils.field_mappings import map_binary_to_yes_no, map_smoking_status, map_work_type
 
 fake = Faker(['en_us'])  # Using Indian English locale as it's closest to Pakistani names
-fake.seed_instance(42)   # For reproducibility
-predictor = StrokePredictor()
 
-CREATORS = ['MadCkull', 'Awais Anwar', 'Nida Yasir', 'Dr. Irfan', 'Dr. Hassan', 
+CREATORS = ['MadCkull', 'Awais Anwar', 'Nida Yasir', 'Dr. Irfan', 'Dr. Hassan',
             'Dr. Muqaddas', 'Dr. Laraib', 'Dr. Kinza', 'Dr. Atiqa', 'Dr. Nadeem']
 
+# Synthetic patient IDs are 4xxxxxxxx; each run continues after the highest one stored
+ID_BASE = 400000000
+ID_LIMIT = 500000000
+
 
 def customize_name():
     """Generate Pakistani-style name using Faker"""
@@ -32,19 +50,21 @@ def generate_health_metrics(age):
     return bmi, glucose
 
 def get_work_type(age):
+    """Work type in the form/model vocabulary (e.g. 'Govt_job')"""
     if age < 18:
-        return "Children"
+        return "children"
     elif age < 23:
-        return random.choice(["Never Worked", "Private"])
+        return random.choice(["Never_worked", "Private"])
     else:
-        return random.choice(["Govt Job", "Private", "Self-Employed"])
+        return random.choice(["Govt_job", "Private", "Self-employed"])
 
 def generate_patient_data():
+    """Return (prediction input, patient document without stroke_risk)"""
     age = random.randint(15, 115)
     gender = random.choice(["Male", "Female"])
     bmi, glucose = generate_health_metrics(age)
     work_type = get_work_type(age)
-    
+
     data = {
         'gender': gender,
         'age': str(age),
@@ -55,40 +75,168 @@ def generate_patient_data():
         'avg_glucose_level': str(glucose),
         'bmi': str(bmi),
         'work_type': work_type,
-        'smoking_status': random.choice(['Never Smoked', 'Formerly Smoked', 'Smokes', 'Unknown'])
+        'smoking_status': random.choice(['never smoked', 'formerly smoked', 'smokes', 'Unknown'])
+    }
+
+    name = customize_name()
+    document = {
+        'name': name,
+        'name_search': search_terms(name),
+        'age': age,
+        'gender': gender,
+        'ever_married': data['ever_married'],
+        'work_type': map_work_type(work_type),
+        'residence_type': data['residence_type'],
+        'heart_disease': map_binary_to_yes_no(data['heart_disease']),
+        'hypertension': map_binary_to_yes_no(data['hypertension']),
+        'avg_glucose_level': glucose,
+        'bmi': bmi,
+        'smoking_status': map_smoking_status(data['smoking_status']),
+        'record_entry_date': datetime.now() - timedelta(days=random.randint(0, 3*365)),
+        'created_by': random.choice(CREATORS)
+    }
+    return data, document
+
+def generate_chunk(start, size, seed):
+    """Generate rows start..start+size in a worker process.
+
+    Each chunk seeds its own generators, so output is reproducible for a
+    given seed regardless of how many workers run.
+    """
+    started = time.perf_counter()
+    random.seed(seed + start)
+    fake.seed_instance(seed + start)
+
+    inputs, documents = [], []
+    for i in range(start, start + size):
+        data, document = generate_patient_data()
+        document['patient_id'] = str(ID_BASE + i)
+        inputs.append(data)
+        documents.append(document)
+    return inputs, documents, time.perf_counter() - started
+
+def score_chunk(predictor, inputs, documents):
+    """Score a chunk with one batched model call; drops rows that fail prediction"""
+    scored = []
+    for document, risk in zip(documents, predictor.predict_risk_batch(inputs)):
+        if isinstance(risk, Exception):
+            print(f"Error generating patient: {str(risk)}")
+            continue
+        document['stroke_risk'] = float(risk)
+        document['model_version'] = predictor.model_version
+        scored.append(document)
+    return scored
+
+def insert_chunk(collection, documents):
+    """Unordered insert_many; returns (inserted, failed, seconds)"""
+    started = time.perf_counter()
+    failed = 0
+    try:
+        collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        failed = len(e.details.get('writeErrors', []))
+    return len(documents) - failed, failed, time.perf_counter() - started
+
+def print_stage(stage, rows, seconds):
+    rate = rows / seconds if seconds else float('inf')
+    print(f"  {stage:<9}{rows:>12,} rows {seconds:>10.2f} s {rate:>14,.0f} rows/s")
+
+def next_synthetic_id(collection):
+    """First unused synthetic patient ID after the highest one stored"""
+    # patient_id is a 9-digit string, so string order matches numeric order
+    latest = collection.find_one(
+        {'patient_id': {'$gte': str(ID_BASE), '$lt': str(ID_LIMIT)}},
+        {'patient_id': 1}, sort=[('patient_id', -1)]
+    )
+    return int(latest['patient_id']) + 1 if latest else ID_BASE
+
+def generate_database(num_records=5460, chunk_size=5000, workers=None, seed=42, predictor=None, start_id=None):
+    """Generate, score and insert ``num_records`` patients numbered from ``start_id``
+    (default: after the highest synthetic ID already stored); returns per-stage stats"""
+    if predictor is None:
+        from app.utils.prediction import StrokePredictor
+        predictor = StrokePredictor()
+    workers = workers or os.cpu_count() or 1
+    collection = Patient._get_collection()
+    if start_id is None:
+        start_id = next_synthetic_id(collection)
+    if start_id < ID_BASE or start_id + num_records > ID_LIMIT:
+        raise ValueError(f"Synthetic patient IDs must stay between {ID_BASE} and {ID_LIMIT - 1}")
+    first = start_id - ID_BASE
+
+    stats = {
+        'generate': [0, 0.0], 'score': [0, 0.0], 'insert': [0, 0.0],
+        'failed': 0, 'start_id': start_id
     }
-    
-    risk = predictor.predict_risk(data)
-    
-    return Patient(
-        patient_id=str(random.randint(400000000, 499999999)),
-        name=customize_name(),
-        age=age,
-        gender=gender,
-        ever_married=data['ever_married'],
-        work_type=work_type,
-        residence_type=data['residence_type'],
-        heart_disease='Yes' if data['heart_disease'] == '1' else 'No',
-        hypertension='Yes' if data['hypertension'] == '1' else 'No',
-        avg_glucose_level=glucose,
-        bmi=bmi,
-        smoking_status=data['smoking_status'],
-        stroke_risk=risk,
-        record_entry_date=datetime.now() - timedelta(days=random.randint(0, 3*365)),
-        created_by=random.choice(CREATORS)
+    chunks = deque(
+        (start, min(chunk_size, first + num_records - start))
+        for start in range(first, first + num_records, chunk_size)
     )
+    started = time.perf_counter()
+
+    # At most two chunks per worker are generated ahead of scoring, and at
+    # most two are waiting to be inserted, so memory does not grow with the run
+    with ProcessPoolExecutor(max_workers=workers) as generators, ThreadPoolExecutor(max_workers=1) as writer:
+        generating, inserting = deque(), deque()
+
+        def finish_insert():
+            inserted, failed, seconds = inserting.popleft().result()
+            stats['insert'][0] += inserted
+            stats['insert'][1] += seconds
+            stats['failed'] += failed
+
+        while chunks or generating:
+            while chunks and len(generating) < 2 * workers:
+                start, size = chunks.popleft()
+                generating.append(generators.submit(generate_chunk, start, size, seed))
+
+            inputs, documents, seconds = generating.popleft().result()
+            stats['generate'][0] += len(documents)
+            stats['generate'][1] += seconds
 
-def generate_database(num_records=5460):
-    connect('stroke_prediction')
-    
-    for _ in range(num_records):
-        try:
-            patient = generate_patient_data()
-            patient.save()
-        except Exception as e:
-            print(f"Error generating patient: {str(e)}")
-    
-    print(f"Successfully generated {num_records} patient records")
+            score_started = time.perf_counter()
+            documents = score_chunk(predictor, inputs, documents)
+            stats['score'][0] += len(documents)
+            stats['score'][1] += time.perf_counter() - score_started
+
+            if len(inserting) >= 2:
+                finish_insert()
+            inserting.append(writer.submit(insert_chunk, collection, documents))
+
+        while inserting:
+            finish_insert()
+
+    # Generation runs in parallel; report its throughput across all workers
+    stats['generate'][1] /= workers
+    stats['total'] = [stats['insert'][0], time.perf_counter() - started]
+
+    # Bring /patient/count up to date with the bulk-loaded rows
+    patient_counts.reconcile()
+    return stats
 
 if __name__ == "__main__":
-    generate_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Generate synthetic patient records')
+    parser.add_argument('--records', type=int, default=5460, help='number of patients to generate')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows per generation, scoring and insert batch')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Faker generation processes')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for reproducible data')
+    parser.add_argument('--start-id', type=int,
+                        help='first patient ID to generate (default: after the highest synthetic ID stored)')
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI'),
+                        help='MongoDB URI (default: MONGO_URI, else the local stroke_prediction database)')
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        connect(host=args.mongo_uri)
+    else:
+        connect('stroke_prediction')
+
+    try:
+        stats = generate_database(args.records, args.chunk_size, args.workers, args.seed, start_id=args.start_id)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"Successfully generated {stats['insert'][0]} patient records "
+          f"from ID {stats['start_id']} ({stats['failed']} failed)")
+    for stage in ('generate', 'score', 'insert', 'total'):
+        print_stage(stage, *stats[stage])
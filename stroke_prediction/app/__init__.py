@@ -1,5 +1,6 @@
 # app/__init__.py
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 from flask import Flask, render_template, jsonify
 from flask_sqlalchemy import SQLAlchemy
@@ -9,6 +10,9 @@ from flask_login import LoginManager
 from mongoengine import connect
 from flask_wtf.csrf import CSRFProtect, CSRFError
 from flask_wtf.csrf import generate_csrf
+from app.utils.compression import response_compressor
+from app.utils.sqlite_engine import apply_sqlite_pragmas, sqlite_engine_options, sqlite_pragmas_from_env
+from app.utils.static_assets import static_assets
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -27,7 +31,19 @@ def create_app():
     # Configurations
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLITE_DATABASE_URI')
+    # WAL, busy timeout and pool settings for concurrent workers (SQLITE_PROFILE)
+    sqlite_pragmas = sqlite_pragmas_from_env()
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'], sqlite_pragmas
+    )
     app.config["MONGO_URI"] = os.getenv("MONGO_URI")
+    # bcrypt cost for new hashes; older hashes are upgraded on the next login
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+    # Bearer tokens for /api/v1 (falls back to SECRET_KEY when JWT_SECRET_KEY is unset)
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY')
+    app.config['JWT_TOKEN_LOCATION'] = ['headers']
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '15')))
     
     # CSRF specific configurations
     app.config['WTF_CSRF_ENABLED'] = True
@@ -37,10 +53,17 @@ def create_app():
 
     # Initialize extensions with app
     db.init_app(app)
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, sqlite_pragmas)
     bcrypt.init_app(app)
     jwt.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
+    # ?v=<content hash> on static URLs, served with far-future cache headers
+    static_assets.init_app(app)
+    # gzip/brotli for text responses above COMPRESS_MIN_SIZE (COMPRESS_LEVEL=0 disables)
+    if response_compressor is not None:
+        response_compressor.init_app(app)
 
     # Set login view
     login_manager.login_view = "auth.login"
@@ -56,6 +79,18 @@ def create_app():
     from app.views.process_patient import patient_bp
     app.register_blueprint(patient_bp, url_prefix='/patient')
 
+    from app.views.health import health
+    app.register_blueprint(health, url_prefix='/health')
+
+    # Token-authenticated API; clients send a bearer token instead of a session cookie and CSRF token
+    from app.views.api import api
+    csrf.exempt(api)
+    app.register_blueprint(api, url_prefix='/api/v1')
+
+    # Load the prediction model in the background so other routes serve immediately
+    from app.views.process_patient import predictor_loader
+    predictor_loader.start()
+
     
 
     # Connect to MongoDB
@@ -99,7 +134,12 @@ def create_app():
     @login_manager.user_loader
     def load_user(user_id):
         from app.models.user import User
-        return User.query.get(int(user_id))
+        from app.utils.user_cache import user_cache
+        if user_cache is None:
+            return User.query.get(int(user_id))
+        # Read-only snapshot cached for USER_CACHE_TTL seconds, so polling
+        # routes do not query SQLite on every request
+        return user_cache.get(int(user_id), lambda uid: db.session.get(User, uid))
 
     @app.route('/')
     def home():
@@ -0,0 +1,11 @@
+# app/models/counter.py
+from mongoengine import Document, StringField, IntField
+
+class Counter(Document):
+    # Named counters updated atomically with $inc (e.g. patient_id:61017)
+    name = StringField(primary_key=True)
+    value = IntField(default=0)
+
+    meta = {
+        'collection': 'counters'
+    }
@@ -1,11 +1,13 @@
 # app/models/patient.py
-from mongoengine import Document, StringField, IntField, FloatField, DateTimeField, EnumField
+from mongoengine import Document, StringField, IntField, FloatField, DateTimeField, EnumField, ListField
 from datetime import datetime
+from app.utils.name_search import search_terms
 
 class Patient(Document):
     # Identification and Demographic Information
     patient_id = StringField(required=True, unique=True, min_value=9, max_value=9)
     name = StringField(required=True)
+    name_search = ListField(StringField())  # normalized name prefixes for typeahead, set in clean()
     age = IntField(required=True, min_value=5, max_value=120)
     gender = StringField(required=True, choices=["Male", "Female", "Other"])
     
@@ -21,6 +23,7 @@ class Patient(Document):
     bmi = FloatField(required=True, min_value=0)
     smoking_status = StringField(required=True, choices=["Smokes", "Formerly Smoked", "Never Smoked", "Unknown"])
     stroke_risk = FloatField(required=True, min_value=0, max_value=100)
+    model_version = StringField()  # StrokePredictor.model_version that computed stroke_risk
     
     # Metadata
     record_entry_date = DateTimeField(default=datetime.now, required=True)
@@ -28,8 +31,23 @@ class Patient(Document):
     updated_at = DateTimeField()
     updated_by = StringField()
 
-    # Meta class for collection name and ordering
+    # Meta class for collection name, ordering and indexes
     meta = {
         'collection': 'patients',
-        'ordering': ['-record_entry_date']  # Orders by newest records first
+        'ordering': ['-record_entry_date'],  # Orders by newest records first
+        'indexes': [
+            # Newest-first listing; patient_id breaks ties between equal dates
+            ('-record_entry_date', '-patient_id'),
+            # Records entered by one user, newest first
+            ('created_by', '-record_entry_date'),
+            # Risk range filters and risk-level buckets
+            'stroke_risk',
+            # Typeahead name prefix search
+            'name_search'
+        ],
+        'index_background': True  # build without blocking writes on a live collection
     }
+
+    def clean(self):
+        # Keep the typeahead terms in step with the name on every validate()/save()
+        self.name_search = search_terms(self.name)
@@ -1,6 +1,11 @@
 # models/user.py
 from app import db, bcrypt
+from flask import current_app
 from flask_login import UserMixin
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.utils.password_hashing import hash_rounds
+from app.utils.user_cache import invalidate_user
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
@@ -10,10 +15,36 @@ class User(db.Model, UserMixin):
     password = db.Column(db.String(150), nullable=False)
     role = db.Column(db.String(50), nullable=False, default="doctor")
     
+    @staticmethod
+    def hash_password(password):
+        """bcrypt hash of password at the configured cost (BCRYPT_ROUNDS)."""
+        return bcrypt.generate_password_hash(password).decode('utf-8')
+
     def set_password(self, password):
         """Hashes password and stores it in password_hash."""
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password = self.hash_password(password)
 
     def check_password(self, password):
         """Checks if the provided password matches the stored hash."""
         return bcrypt.check_password_hash(self.password, password)
+
+    def needs_rehash(self):
+        """True when the stored hash was made with a different cost than BCRYPT_ROUNDS."""
+        return hash_rounds(self.password) != current_app.config['BCRYPT_LOG_ROUNDS']
+
+
+# Role changes can come from anywhere (admin scripts, the shell), so any
+# committed role update drops the user from the session cache
+@event.listens_for(User, 'after_update')
+def _track_role_change(mapper, connection, user):
+    if inspect(user).attrs.role.history.has_changes():
+        inspect(user).session.info.setdefault('role_changed_users', set()).add(user.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_role_changes(session):
+    for user_id in session.info.pop('role_changed_users', ()):
+        invalidate_user(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_role_changes(session):
+    session.info.pop('role_changed_users', None)
@@ -1,4 +1,5 @@
 let page = 1;
+let cursor = null;
 let loading = false;
 let hasMore = true;
 let totalPatients = [];
@@ -38,6 +39,7 @@ async function loadPatients(reset = false) {
 
     if (reset) {
         page = 1;
+        cursor = null;
         hasMore = true;
         totalPatients = [];
         clearPatients();
@@ -47,10 +49,13 @@ async function loadPatients(reset = false) {
     showLoader();
     await delay(1000);
     try {
-        const response = await fetch(`/patient/list?page=${page}`);
+        // Follow the server's cursor when it sends one; page numbers are the fallback
+        const query = cursor ? `cursor=${encodeURIComponent(cursor)}` : `page=${page}`;
+        const response = await fetch(`/patient/list?${query}`);
         const data = await response.json();
 
-        if (data.patients.length < 10) {
+        cursor = data.next_cursor || null;
+        if (data.has_more === false || data.patients.length < 10) {
             hasMore = false;
         }
 
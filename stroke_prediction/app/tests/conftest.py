@@ -11,6 +11,18 @@ from app.models.user import User
 
 
 # MongoDB Mock Database Setup  --------------------------------
+# pymongo >= 4.11 passes sort= to bulk update/replace operations, which
+# mongomock 4.3 does not accept yet; drop it so bulk_write works in tests
+from mongomock.collection import BulkOperationBuilder
+
+def _ignore_sort(method):
+    def add(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return add
+
+for _name in ('add_update', 'add_replace'):
+    setattr(BulkOperationBuilder, _name, _ignore_sort(getattr(BulkOperationBuilder, _name)))
+
 @pytest.fixture(scope='function', autouse=True)
 def setup_db():
     """Setup test database before each test"""
@@ -19,6 +31,13 @@ def setup_db():
     yield
     disconnect()  # Cleanup after test
 
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Each test builds a fresh SQLite database, so cached users would be stale"""
+    from app.utils.user_cache import user_cache
+    if user_cache is not None:
+        user_cache.clear()
+
 
 
 # Model Evaluation Tests -----------------------------------
@@ -129,9 +148,15 @@ def sample_invalid_ids():
 # User Authentication, Login, Registration Tests --------------------------------
 
 @pytest.fixture
-def app():
+def app(monkeypatch):
     """Create application for the tests."""
+    monkeypatch.setenv('SQLITE_DATABASE_URI', 'sqlite:///:memory:')
+    monkeypatch.setenv('BCRYPT_ROUNDS', '4')  # fast hashes; the cost is not under test
+    disconnect()
     app = create_app()
+    # Swap the MongoDB connection made by create_app for the mock one
+    disconnect()
+    connect('testdb', host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
     app.config.update({
         'TESTING': True,
         'WTF_CSRF_ENABLED': False,
@@ -166,4 +191,41 @@ def test_user(app, _db):
     user.set_password('password123')
     db.session.add(user)
     db.session.commit()
-    return user
\ No newline at end of file
+    return user
+
+@pytest.fixture
+def login(client):
+    """Log the test client in as test_user; returns the login response"""
+    def log_in(password='password123'):
+        return client.post('/auth/login', data={
+            'email': 'test@example.com',
+            'password': password
+        })
+    return log_in
+
+@pytest.fixture
+def make_admin():
+    """Promote test_user to admin (test_user itself is detached, so update the row)"""
+    def promote():
+        User.query.filter_by(email='test@example.com').update({'role': 'admin'})
+        db.session.commit()
+    return promote
+
+
+# Patient Records --------------------------------
+
+@pytest.fixture
+def make_patient():
+    """Build an unsaved Patient; keyword arguments override the defaults"""
+    from app.models.patient import Patient
+
+    def build(patient_id, **fields):
+        defaults = dict(
+            name=f"Patient {patient_id}", age=50, gender='Female', ever_married='Yes',
+            work_type='Private', residence_type='Urban', heart_disease='No', hypertension='No',
+            avg_glucose_level=100.0, bmi=25.0, smoking_status='Unknown', stroke_risk=12.5,
+            record_entry_date=datetime.now(), created_by='Test User'
+        )
+        defaults.update(fields)
+        return Patient(patient_id=patient_id, **defaults)
+    return build
@@ -0,0 +1,86 @@
+from datetime import timedelta
+import pytest
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+from app import db
+
+@pytest.fixture
+def token(app, client, test_user):
+    with app.app_context():
+        response = client.post('/api/v1/token', json={'email': 'test@example.com', 'password': 'password123'})
+        assert response.status_code == 200
+        return response.get_json()['access_token']
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+class TestToken:
+    def test_claims_carry_name_and_role(self, app, token):
+        with app.app_context():
+            claims = decode_token(token)
+            assert claims['name'] == 'Test User' and claims['role'] == 'staff'
+            assert claims['exp'] - claims['iat'] == 15 * 60
+
+    def test_invalid_credentials(self, app, client, test_user):
+        with app.app_context():
+            response = client.post('/api/v1/token', json={'email': 'test@example.com', 'password': 'wrong-password'})
+            assert response.status_code == 401
+            assert client.post('/api/v1/token', json={'email': 'test@example.com'}).status_code == 400
+
+    def test_missing_and_expired_tokens(self, app, client, test_user):
+        with app.app_context():
+            response = client.get('/api/v1/list')
+            assert response.status_code == 401 and response.get_json()['success'] is False
+
+            expired = create_access_token('1', additional_claims={'name': 'Test User', 'role': 'staff'},
+                                          expires_delta=timedelta(seconds=-1))
+            response = client.get('/api/v1/list', headers=bearer(expired))
+            assert response.status_code == 401 and 'expired' in response.get_json()['message']
+
+            assert client.get('/api/v1/list', headers=bearer('not-a-token')).status_code == 401
+
+class TestPredictionApi:
+    def test_predict_without_csrf_or_user_lookup(self, app, client, token, high_risk_patient):
+        app.config['WTF_CSRF_ENABLED'] = True
+        queries = []
+        with app.app_context():
+            engine = db.engine
+        count = lambda conn, cursor, statement, *args: queries.append(statement) if 'users' in statement else None
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            with app.app_context():
+                response = client.post('/api/v1/predict', json=dict(high_risk_patient, name='API Patient', age=75),
+                                       headers=bearer(token))
+                assert response.status_code == 200
+                body = response.get_json()
+                assert body['success'] and body['risk_level']
+
+                # The session route still requires a CSRF token
+                assert client.post('/patient/predict', data=dict(high_risk_patient, name='Form Patient')).status_code == 400
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+        assert queries == []
+
+        with app.app_context():
+            patient = client.get(f"/api/v1/search?patient_id={body['patient_id']}", headers=bearer(token)).get_json()
+            assert patient['patient']['created_by'] == 'Test User'
+            assert patient['patient']['name'] == 'API Patient'
+
+    def test_predict_validation(self, app, client, token, high_risk_patient):
+        with app.app_context():
+            assert client.post('/api/v1/predict', json=[], headers=bearer(token)).status_code == 400
+            response = client.post('/api/v1/predict', json=high_risk_patient, headers=bearer(token))
+            assert response.status_code == 400
+            assert response.get_json()['message'] == 'Missing required field: name'
+
+    def test_batch_list_and_search(self, app, client, token, high_risk_patient, low_risk_patient):
+        with app.app_context():
+            rows = [dict(high_risk_patient, name='Batch One'), dict(low_risk_patient, name='Batch Two')]
+            body = client.post('/api/v1/predict_batch', json=rows, headers=bearer(token)).get_json()
+            assert body['saved'] == 2
+
+            listed = client.get('/api/v1/list?limit=1', headers=bearer(token)).get_json()
+            assert len(listed['patients']) == 1 and listed['has_more']
+
+            assert client.get('/api/v1/search?patient_id=410000000', headers=bearer(token)).status_code == 404
+            assert client.get('/api/v1/search', headers=bearer(token)).status_code == 400
@@ -0,0 +1,97 @@
+import io
+from app.models.patient import Patient
+
+def patient_row(**overrides):
+    row = {
+        'name': 'Batch Patient',
+        'age': 75,
+        'gender': 'Male',
+        'hypertension': 1,
+        'heart_disease': 1,
+        'ever_married': 'Yes',
+        'work_type': 'Private',
+        'residence_type': 'Urban',
+        'avg_glucose_level': 210,
+        'bmi': 32.5,
+        'smoking_status': 'smokes'
+    }
+    row.update(overrides)
+    return row
+
+class TestPredictBatch:
+    def test_json_batch_with_invalid_rows(self, app, client, test_user, login):
+        """Invalid rows are reported per row without failing the batch"""
+        with app.app_context():
+            login()
+            rows = [
+                patient_row(),
+                patient_row(age=150),
+                patient_row(name='Young Patient', age=17, hypertension=0, heart_disease=0,
+                            ever_married='No', smoking_status='never smoked'),
+                {'name': 'Missing Fields'}
+            ]
+
+            response = client.post('/patient/predict_batch', json=rows)
+
+            assert response.status_code == 200
+            body = response.get_json()
+            assert body['total'] == 4
+            assert body['saved'] == 2
+            assert body['failed'] == 2
+
+            results = body['results']
+            assert [r['success'] for r in results] == [True, False, True, False]
+            assert 'Age must be between 0 and 120' in results[1]['message']
+            assert 'Missing required field' in results[3]['message']
+            assert results[0]['risk'] > results[2]['risk']
+
+            saved = Patient.objects(patient_id__in=[results[0]['patient_id'], results[2]['patient_id']])
+            assert saved.count() == 2
+            assert {p.created_by for p in saved} == {'Test User'}
+            assert len({results[0]['patient_id'], results[2]['patient_id']}) == 2
+
+    def test_ids_follow_row_order_and_skip_invalid_rows(self, app, client, test_user, login):
+        with app.app_context():
+            login()
+            rows = [
+                patient_row(name='First'),
+                patient_row(name='Too Young', age=3),  # scores, but fails Patient validation
+                patient_row(name='Second'),
+                patient_row(name='Third')
+            ]
+
+            results = client.post('/patient/predict_batch', json=rows).get_json()['results']
+
+            assert [r['success'] for r in results] == [True, False, True, True]
+            ids = [int(r['patient_id']) for r in results if r['success']]
+            # Consecutive and ascending: no ID was spent on the invalid row
+            assert ids == list(range(ids[0], ids[0] + 3))
+            assert [r['name'] for r in results if r['success']] == ['First', 'Second', 'Third']
+
+    def test_csv_upload(self, app, client, test_user, login):
+        with app.app_context():
+            login()
+            header = list(patient_row().keys())
+            lines = [','.join(header)]
+            for name in ('CSV One', 'CSV Two', 'CSV Three'):
+                lines.append(','.join(str(patient_row(name=name)[field]) for field in header))
+            csv_file = io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+            response = client.post(
+                '/patient/predict_batch',
+                data={'file': (csv_file, 'patients.csv')},
+                content_type='multipart/form-data'
+            )
+
+            assert response.status_code == 200
+            body = response.get_json()
+            assert body['saved'] == 3
+            assert Patient.objects(name__startswith='CSV').count() == 3
+            assert Patient.objects(name='CSV One').first().heart_disease == 'Yes'
+
+    def test_rejects_non_array_body(self, app, client, test_user, login):
+        with app.app_context():
+            login()
+            response = client.post('/patient/predict_batch', json={'name': 'Not a list'})
+            assert response.status_code == 400
+            assert response.get_json()['success'] is False
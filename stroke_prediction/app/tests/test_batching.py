@@ -0,0 +1,119 @@
+import threading
+import pytest
+from app.utils.batching import MicroBatcher
+from app.utils.prediction import StrokePredictor
+
+class RecordingPredictor(StrokePredictor):
+    """StrokePredictor that remembers the size of every batch it scores"""
+    def __init__(self):
+        super().__init__(backend='numpy')
+        self.batch_sizes = []
+
+    def predict_risk_batch(self, rows):
+        self.batch_sizes.append(len(rows))
+        return super().predict_risk_batch(rows)
+
+def run_concurrently(batcher, patients):
+    results = [None] * len(patients)
+    start = threading.Barrier(len(patients))
+
+    def worker(i):
+        start.wait()
+        try:
+            results[i] = batcher.predict_risk(patients[i])
+        except ValueError as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(patients))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+def test_concurrent_calls_are_coalesced(high_risk_patient, low_risk_patient):
+    predictor = RecordingPredictor()
+    batcher = MicroBatcher(predictor, max_batch_size=16, window_ms=50)
+    patients = [high_risk_patient, low_risk_patient] * 16
+
+    results = run_concurrently(batcher, patients)
+
+    # Each caller gets its own result, identical to an unbatched call
+    assert results[0] == predictor.predict_risk(high_risk_patient)
+    assert results[1] == predictor.predict_risk(low_risk_patient)
+    assert results == [results[0], results[1]] * 16
+
+    # Fewer forward passes than callers, none larger than the cap
+    assert sum(predictor.batch_sizes) == 32
+    assert len(predictor.batch_sizes) < 32
+    assert max(predictor.batch_sizes) <= 16
+
+    stats = batcher.stats.snapshot()
+    assert stats['requests'] == 32
+    assert stats['batches'] == len(predictor.batch_sizes)
+    assert sum(stats['batch_size_histogram'].values()) == stats['batches']
+    assert stats['queue_delay_ms']['max'] >= stats['queue_delay_ms']['p50'] >= 0
+
+def test_errors_go_to_their_own_caller(high_risk_patient, invalid_patient):
+    batcher = MicroBatcher(StrokePredictor(backend='numpy'), max_batch_size=8, window_ms=50)
+
+    results = run_concurrently(batcher, [high_risk_patient, invalid_patient] * 4)
+
+    for result in results[0::2]:
+        assert not isinstance(result, Exception)
+        assert result > 30.0
+    for result in results[1::2]:
+        assert isinstance(result, ValueError)
+        assert "Age must be between 0 and 120" in str(result)
+
+def test_single_call_raises_value_error(invalid_patient):
+    batcher = MicroBatcher(StrokePredictor(backend='numpy'), window_ms=1)
+    with pytest.raises(ValueError) as exc_info:
+        batcher.predict_risk(invalid_patient)
+    assert "Age must be between 0 and 120" in str(exc_info.value)
+
+def test_short_batch_result_fails_every_caller(high_risk_patient):
+    class ShortPredictor:
+        def predict_risk_batch(self, rows):
+            return [12.5]  # one result, whatever the batch size
+
+    batcher = MicroBatcher(ShortPredictor(), max_batch_size=4, window_ms=50, timeout=5)
+    results = run_concurrently(batcher, [high_risk_patient] * 4)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert "returned 1 results for" in str(results[0])
+
+def test_missing_result_times_out(high_risk_patient):
+    release = threading.Event()
+
+    class StuckPredictor:
+        def predict_risk_batch(self, rows):
+            release.wait()
+            return [12.5] * len(rows)
+
+    batcher = MicroBatcher(StuckPredictor(), window_ms=1, timeout=0.1)
+    try:
+        with pytest.raises(ValueError, match='no result from the batch worker'):
+            batcher.predict_risk(high_risk_patient)
+    finally:
+        release.set()
+
+def test_dead_worker_is_replaced(high_risk_patient):
+    batcher = MicroBatcher(StrokePredictor(backend='numpy'), window_ms=1)
+    assert batcher.predict_risk(high_risk_patient) > 30.0
+
+    batcher._worker = threading.Thread(target=lambda: None)  # a worker that has exited
+    batcher._worker.start()
+    batcher._worker.join()
+    assert batcher.predict_risk(high_risk_patient) > 30.0
+
+def test_from_env_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('PREDICTION_BATCH_WINDOW_MS', raising=False)
+    predictor = StrokePredictor(backend='numpy')
+    assert MicroBatcher.from_env(predictor) is predictor
+
+    monkeypatch.setenv('PREDICTION_BATCH_WINDOW_MS', '5')
+    monkeypatch.setenv('PREDICTION_MAX_BATCH_SIZE', '32')
+    batcher = MicroBatcher.from_env(predictor)
+    assert isinstance(batcher, MicroBatcher)
+    assert batcher.max_batch_size == 32
@@ -0,0 +1,31 @@
+from benchmarks.suite import compare, flatten
+
+BASELINE = {
+    'meta': {'backend': 'numpy', 'cpu_count': 8},
+    'cold_start': {'median_s': 2.0},
+    'single_row': {'count': 1000, 'p50_ms': 0.10, 'p99_ms': 0.20},
+    'throughput': {'64': {'rows_per_s': 50000.0}},
+    'peak_rss_mb': 200.0
+}
+
+def test_flatten_skips_metadata():
+    flat = flatten(BASELINE)
+    assert flat['single_row.p99_ms'] == 0.20
+    assert flat['throughput.64.rows_per_s'] == 50000.0
+    assert not any(key.startswith('meta') or key.endswith('count') for key in flat)
+
+def test_compare_flags_regressions_in_both_directions():
+    current = {
+        'cold_start': {'median_s': 2.1},                  # 5% slower: within threshold
+        'single_row': {'p50_ms': 0.10, 'p99_ms': 0.30},   # 50% slower
+        'throughput': {'64': {'rows_per_s': 30000.0}},    # 40% fewer rows/s
+        'peak_rss_mb': 150.0                              # improvement
+    }
+
+    rows = {metric: (change, regressed) for metric, _, _, change, regressed in compare(BASELINE, current, 0.1)}
+
+    assert not rows['cold_start.median_s'][1]
+    assert rows['single_row.p99_ms'][1]
+    assert rows['throughput.64.rows_per_s'][1]
+    assert rows['throughput.64.rows_per_s'][0] > 0
+    assert rows['peak_rss_mb'][0] < 0 and not rows['peak_rss_mb'][1]
@@ -0,0 +1,102 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+import pytest
+from app.utils.patient_export import EXPORT_FIELDS, export_filters, iter_csv
+
+@pytest.fixture
+def saved_patients(make_patient):
+    patients = []
+    for i, (risk, entry_date) in enumerate([
+        (5.0, datetime(2024, 1, 10)),
+        (45.0, datetime(2024, 2, 20, 18, 30)),
+        (85.0, datetime(2024, 3, 5)),
+    ]):
+        patient = make_patient(
+            f"{410030000 + i}", name=f"Patient, {i}", hypertension='Yes',
+            stroke_risk=risk, record_entry_date=entry_date, created_by='Dr. Irfan'
+        )
+        patient.save()
+        patients.append(patient)
+    return patients
+
+def test_export_filters():
+    assert export_filters({'start': '2024-02-01', 'end': '2024-02-29'}) == {
+        'record_entry_date__gte': datetime(2024, 2, 1),
+        'record_entry_date__lt': datetime(2024, 3, 1)
+    }
+    assert export_filters({'risk_level': 'High'}) == {'stroke_risk__gte': 40, 'stroke_risk__lt': 60}
+    assert export_filters({'min_risk': '10', 'max_risk': '50'}) == {
+        'stroke_risk__gte': 10.0, 'stroke_risk__lte': 50.0
+    }
+    for args in ({'start': 'yesterday'}, {'risk_level': 'Extreme'}, {'min_risk': 'high'}):
+        with pytest.raises(ValueError):
+            export_filters(args)
+
+def test_csv_reads_rows_lazily():
+    consumed = []
+
+    def rows():
+        for i in range(10):
+            consumed.append(i)
+            yield {'patient_id': str(i)}
+
+    chunks = iter_csv(rows(), rows_per_chunk=3)
+    next(chunks)  # header
+    next(chunks)
+    assert len(consumed) == 3
+    assert len(list(chunks)) == 3  # 3 + 3 + 1 remaining rows
+
+class TestExportRoute:
+    def test_requires_admin(self, app, client, test_user, saved_patients, login):
+        with app.app_context():
+            login()
+            assert client.get('/patient/export').status_code == 403
+
+    def test_csv_export(self, app, client, test_user, saved_patients, login, make_admin):
+        with app.app_context():
+            make_admin()
+            login()
+            response = client.get('/patient/export')
+            assert response.status_code == 200
+            assert response.is_streamed
+            assert response.mimetype == 'text/csv'
+            assert 'attachment' in response.headers['Content-Disposition']
+
+            rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+            assert len(rows) == 3
+            assert set(rows[0]) == set(EXPORT_FIELDS)
+            exported = {row['patient_id']: row for row in rows}
+            assert exported['410030001']['name'] == 'Patient, 1'
+            assert exported['410030001']['record_entry_date'] == '2024-02-20T18:30:00'
+
+    def test_ndjson_export_with_filters(self, app, client, test_user, saved_patients, login, make_admin):
+        with app.app_context():
+            make_admin()
+            login()
+            response = client.get('/patient/export?format=ndjson&start=2024-02-01&end=2024-03-31&min_risk=50')
+            assert response.status_code == 200
+            assert response.mimetype == 'application/x-ndjson'
+
+            rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            assert [row['patient_id'] for row in rows] == ['410030002']
+            assert rows[0]['stroke_risk'] == 85.0
+
+    def test_gzip_export(self, app, client, test_user, saved_patients, login, make_admin):
+        with app.app_context():
+            make_admin()
+            login()
+            response = client.get('/patient/export?risk_level=Low', headers={'Accept-Encoding': 'gzip'})
+            assert response.headers['Content-Encoding'] == 'gzip'
+
+            rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.get_data()).decode('utf-8'))))
+            assert [row['patient_id'] for row in rows] == ['410030000']
+
+    def test_invalid_request(self, app, client, test_user, saved_patients, login, make_admin):
+        with app.app_context():
+            make_admin()
+            login()
+            assert client.get('/patient/export?format=xml').status_code == 400
+            assert client.get('/patient/export?start=last-week').status_code == 400
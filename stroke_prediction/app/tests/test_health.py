@@ -0,0 +1,69 @@
+import threading
+import pytest
+from app.utils.model_loader import PredictorLoader, ModelNotReadyError
+from app.utils.prediction import StrokePredictor
+from app.views import process_patient
+
+def test_loader_loads_in_background():
+    loader = PredictorLoader(lambda: StrokePredictor(backend='numpy'))
+    loader.start()
+
+    predictor = loader.get(timeout=30)
+
+    assert loader.is_ready
+    assert loader.status()['load_seconds'] is not None
+    assert loader.get(timeout=0) is predictor
+
+def test_loader_times_out_while_loading():
+    release = threading.Event()
+
+    def slow_factory():
+        release.wait()
+        return StrokePredictor(backend='numpy')
+
+    loader = PredictorLoader(slow_factory)
+    with pytest.raises(ModelNotReadyError):
+        loader.get(timeout=0.05)
+    assert loader.status()['loading'] is True
+
+    release.set()
+    assert loader.get(timeout=30) is not None
+
+def test_loader_reports_failure():
+    def broken_factory():
+        raise OSError("model file missing")
+
+    loader = PredictorLoader(broken_factory)
+    with pytest.raises(ModelNotReadyError) as exc_info:
+        loader.get(timeout=5)
+    assert "model file missing" in str(exc_info.value)
+    assert loader.status()['ready'] is False
+
+def test_ready_endpoint(client):
+    process_patient.predictor_loader.get(timeout=30)
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    assert response.get_json()['ready'] is True
+
+def test_predict_returns_503_when_model_not_loaded(app, client, test_user, monkeypatch, high_risk_patient, login):
+    release = threading.Event()
+
+    def slow_factory():
+        release.wait()
+        return StrokePredictor(backend='numpy')
+
+    loader = PredictorLoader(slow_factory)
+    monkeypatch.setattr(process_patient, 'predictor_loader', loader)
+    monkeypatch.setenv('PREDICTION_READY_TIMEOUT', '0.05')
+
+    with app.app_context():
+        login()
+
+        # Non-prediction routes are served while the model loads
+        assert client.get('/patient/count').status_code == 200
+
+        response = client.post('/patient/predict', data=dict(high_risk_patient, name='Waiting'))
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '5'
+
+    release.set()
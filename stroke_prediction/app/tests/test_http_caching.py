@@ -0,0 +1,124 @@
+import gzip
+import json
+import re
+from datetime import datetime
+import pytest
+from app.utils import compression
+from app.utils.static_assets import StaticAssets, FAR_FUTURE_SECONDS
+
+def save_patient(make_patient, i):
+    make_patient(
+        f"{410040000 + i}", name=f"Patient, Number {i}", stroke_risk=30.0,
+        record_entry_date=datetime(2024, 1, 1 + i), created_by='Dr. Irfan'
+    ).save()
+
+@pytest.fixture
+def saved_patients(make_patient):
+    for i in range(12):
+        save_patient(make_patient, i)
+
+class TestConditionalJson:
+    def test_list_revalidates_with_etag(self, app, client, test_user, saved_patients, login, make_patient):
+        with app.app_context():
+            login()
+            response = client.get('/patient/list')
+            assert response.status_code == 200
+            etag = response.headers['ETag']
+            assert 'no-cache' in response.headers['Cache-Control']
+
+            unchanged = client.get('/patient/list', headers={'If-None-Match': etag})
+            assert unchanged.status_code == 304
+            assert unchanged.get_data() == b''
+
+            save_patient(make_patient, 20)
+            changed = client.get('/patient/list', headers={'If-None-Match': etag})
+            assert changed.status_code == 200
+            assert changed.headers['ETag'] != etag
+
+    def test_count_revalidates_with_etag(self, app, client, test_user, saved_patients, login):
+        with app.app_context():
+            login()
+            response = client.get('/patient/count?exact=1')
+            assert response.get_json()['count'] == 12
+            assert client.get('/patient/count?exact=1',
+                              headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    def test_errors_get_no_etag(self, app, client, test_user, login):
+        with app.app_context():
+            login()
+            response = client.get('/patient/list?limit=0')
+            assert response.status_code == 400
+            assert 'ETag' not in response.headers
+
+class TestCompression:
+    def test_list_is_gzipped(self, app, client, test_user, saved_patients, login):
+        with app.app_context():
+            login()
+            plain = client.get('/patient/list')
+            assert 'Content-Encoding' not in plain.headers
+            assert plain.content_length >= 1024
+
+            response = client.get('/patient/list', headers={'Accept-Encoding': 'gzip'})
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert 'Accept-Encoding' in response.headers['Vary']
+            assert json.loads(gzip.decompress(response.get_data())) == plain.get_json()
+            assert response.content_length < plain.content_length
+
+            # The compressed representation carries a weak validator that still revalidates
+            etag = response.headers['ETag']
+            assert etag.startswith('W/')
+            assert client.get('/patient/list', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+
+    def test_small_responses_are_not_compressed(self, app, client, test_user, login):
+        with app.app_context():
+            login()
+            response = client.get('/patient/count?exact=1', headers={'Accept-Encoding': 'gzip'})
+            assert 'Content-Encoding' not in response.headers
+
+    def test_brotli_falls_back_to_gzip(self, app, client, test_user, saved_patients, monkeypatch, login):
+        monkeypatch.setattr(compression, 'brotli', None)
+        with app.app_context():
+            login()
+            assert 'Content-Encoding' not in client.get('/patient/list', headers={'Accept-Encoding': 'br'}).headers
+            response = client.get('/patient/list', headers={'Accept-Encoding': 'br, gzip'})
+            assert response.headers['Content-Encoding'] == 'gzip'
+
+    def test_brotli_when_installed(self, app, client, test_user, saved_patients, login):
+        brotli = pytest.importorskip('brotli')
+        with app.app_context():
+            login()
+            response = client.get('/patient/list', headers={'Accept-Encoding': 'br, gzip'})
+            assert response.headers['Content-Encoding'] == 'br'
+            assert json.loads(brotli.decompress(response.get_data()))['success']
+
+class TestStaticAssets:
+    def test_pages_link_hashed_assets(self, app, client):
+        with app.app_context():
+            html = client.get('/').get_data(as_text=True)
+            urls = re.findall(r'/static/js/render_patients_list\.js\?v=[0-9a-f]{12}', html)
+            assert urls
+
+            response = client.get(urls[0], headers={'Accept-Encoding': 'gzip'})
+            assert response.status_code == 200
+            assert f'max-age={FAR_FUTURE_SECONDS}' in response.headers['Cache-Control']
+            assert 'immutable' in response.headers['Cache-Control']
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert b'fetch' in gzip.decompress(response.get_data())
+
+    def test_unversioned_or_stale_urls_are_not_cached(self, app, client):
+        with app.app_context():
+            for url in ('/static/js/render_patients_list.js', '/static/js/render_patients_list.js?v=000000000000'):
+                response = client.get(url)
+                assert response.status_code == 200
+                assert 'immutable' not in response.headers.get('Cache-Control', '')
+
+    def test_hash_follows_file_content(self, tmp_path):
+        assets = StaticAssets()
+        assets.static_folder = str(tmp_path)
+        (tmp_path / 'site.css').write_text('body { color: red; }')
+        first = assets.file_hash('site.css')
+        assert first == assets.file_hash('site.css')
+
+        (tmp_path / 'site.css').write_text('body { color: blue; }')
+        assert assets.file_hash('site.css') != first
+        assert assets.file_hash('missing.css') is None
@@ -1,5 +1,10 @@
+import threading
+import mongomock
 import pytest
-from app.utils.id_generator import IDGenerator
+from concurrent.futures import ThreadPoolExecutor
+from app.models.counter import Counter
+from app.models.patient import Patient
+from app.utils.id_generator import IDGenerator, PatientIDAllocator
 
 def test_generate_patient_id_format(current_date_portion):
     """Test if generated ID has correct format"""
@@ -31,4 +36,61 @@ def test_id_uniqueness():
     for _ in range(5):  # Generate 5 IDs
         new_id = IDGenerator.generate_patient_id()
         assert new_id not in ids, "Generated IDs should be unique"
-        ids.add(new_id)
\ No newline at end of file
+        ids.add(new_id)
+
+
+def test_generate_patient_ids_batch(current_date_portion):
+    """Test batch ID generation returns unique, well-formed IDs"""
+    ids = IDGenerator.generate_patient_ids(50)
+
+    assert len(ids) == 50
+    assert len(set(ids)) == 50, "Batch IDs should be unique"
+    for patient_id in ids:
+        assert len(patient_id) == 9 and patient_id.isdigit()
+        assert patient_id[:5] == current_date_portion
+
+@pytest.fixture
+def atomic_mongomock(monkeypatch):
+    """MongoDB applies $inc atomically; mongomock does not, so serialize it like the server would"""
+    lock = threading.Lock()
+    find_one_and_update = mongomock.collection.Collection.find_one_and_update
+
+    def locked(self, *args, **kwargs):
+        with lock:
+            return find_one_and_update(self, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.Collection, 'find_one_and_update', locked)
+
+def test_parallel_allocation_is_unique(current_date_portion, atomic_mongomock):
+    """Many workers allocating concurrently never hand out the same ID"""
+    allocators = [PatientIDAllocator(block_size=7) for _ in range(4)]  # one per simulated worker
+
+    def allocate(i):
+        return [allocators[i % 4].allocate()[0] for _ in range(50)]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        ids = [patient_id for chunk in pool.map(allocate, range(32)) for patient_id in chunk]
+
+    assert len(ids) == 1600
+    assert len(set(ids)) == 1600, "Allocated IDs should be unique"
+    assert all(IDGenerator.validate_patient_id(patient_id) for patient_id in ids[:20])
+
+    # Blocks are reserved with one counter update each, not one lookup per ID
+    counter = Counter.objects.get(name=f'patient_id:{current_date_portion}')
+    assert 1600 <= counter.value <= 1600 + 4 * 7
+
+def test_allocator_skips_existing_ids(current_date_portion):
+    """IDs already saved (e.g. by the old random generator) are never reused"""
+    taken = f"{current_date_portion}0001"
+    Patient._get_collection().insert_one({'patient_id': taken})
+
+    ids = PatientIDAllocator(block_size=5).allocate(5)
+
+    assert taken not in ids
+    assert len(set(ids)) == 5
+
+def test_allocator_daily_capacity(current_date_portion):
+    Counter(name=f'patient_id:{current_date_portion}', value=PatientIDAllocator.DAILY_CAPACITY).save()
+    with pytest.raises(ValueError) as exc_info:
+        PatientIDAllocator().allocate()
+    assert "capacity" in str(exc_info.value)
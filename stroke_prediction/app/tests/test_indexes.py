@@ -0,0 +1,77 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from mongoengine import connect, disconnect
+from app.models.patient import Patient
+from app.utils.db_indexes import ensure_declared_indexes, index_report, plan_stages
+from app.utils.pagination import after_cursor
+
+def test_missing_indexes_are_reported_then_created():
+    report = index_report(Patient)
+    assert report['collection'] == 'patients'
+    assert {tuple(spec['fields'][0]) for spec in report['missing']} >= {
+        ('record_entry_date', -1), ('created_by', 1), ('stroke_risk', 1), ('patient_id', 1)
+    }
+
+    ensure_declared_indexes([Patient])
+
+    report = index_report(Patient)
+    assert report['missing'] == [] and report['mismatched'] == []
+
+def test_undeclared_index_is_reported():
+    ensure_declared_indexes([Patient])
+    Patient._get_collection().create_index('name')
+    assert index_report(Patient)['undeclared'] == ['name_1']
+
+def test_plan_stages_finds_nested_stages():
+    explain = {'queryPlanner': {'winningPlan': {
+        'stage': 'LIMIT',
+        'inputStage': {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'stroke_risk_1'}}
+    }}}
+    assert plan_stages(explain) == ['LIMIT', 'FETCH', 'IXSCAN']
+
+
+# Query plans need a real server; mongomock has no explain()
+@pytest.fixture
+def real_mongo():
+    uri = os.getenv('MONGO_TEST_URI')
+    if not uri:
+        pytest.skip('Set MONGO_TEST_URI to check query plans against a real MongoDB')
+    disconnect()
+    connect('stroke_index_test', host=uri)
+    Patient.drop_collection()
+    ensure_declared_indexes([Patient])
+    now = datetime.now()
+    Patient._get_collection().insert_many([{
+        'patient_id': f"{100000000 + i}",
+        'name': f"Patient {i}",
+        'name_search': [f"patient {i}", f"{i}"],
+        'created_by': f"Dr. {i % 5}",
+        'stroke_risk': float(i % 100),
+        'record_entry_date': now - timedelta(minutes=i)
+    } for i in range(500)])
+    yield
+    Patient.drop_collection()
+
+def list_query(cursor=None):
+    """The keyset query /patient/list sends, optionally resuming after a (date, patient_id) cursor"""
+    queryset = Patient.objects()
+    if cursor:
+        queryset = queryset.filter(after_cursor(*cursor))
+    return queryset.order_by('-record_entry_date', '-patient_id').limit(11)
+
+ROUTE_QUERIES = {
+    'list': lambda: list_query(),
+    'list_after_cursor': lambda: list_query((datetime.now() - timedelta(minutes=20), '100000020')),
+    'search': lambda: Patient.objects(patient_id='100000042'),
+    'created_by': lambda: Patient.objects(created_by='Dr. 3').order_by('-record_entry_date'),
+    'risk_range': lambda: Patient.objects(stroke_risk__gte=60),
+    'typeahead_name': lambda: Patient.objects(name_search__startswith='patient 4').order_by().limit(10),
+    'typeahead_id': lambda: Patient.objects(patient_id__startswith='1000001').order_by().limit(10),
+}
+
+@pytest.mark.parametrize('query', sorted(ROUTE_QUERIES))
+def test_route_queries_use_an_index(real_mongo, query):
+    stages = plan_stages(ROUTE_QUERIES[query]().explain())
+    assert 'COLLSCAN' not in stages, f"{query} scans the whole collection: {stages}"
+    assert 'IXSCAN' in stages
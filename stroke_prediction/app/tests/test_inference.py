@@ -0,0 +1,118 @@
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+from app.utils.inference import (
+    BACKEND_PREFERENCE, load_backend, load_variant, quantize_layers, save_variant
+)
+from app.utils.prediction import StrokePredictor
+
+def test_numpy_backend_matches_keras(high_risk_patient, low_risk_patient):
+    """NumPy and Keras backends should give the same probabilities"""
+    keras_predictor = StrokePredictor(backend='keras')
+    numpy_predictor = StrokePredictor(backend='numpy')
+
+    for patient in (high_risk_patient, low_risk_patient):
+        features = keras_predictor._preprocess_data(patient)
+        expected = keras_predictor.backend.predict(features)
+        actual = numpy_predictor.backend.predict(features)
+        np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-6)
+
+def test_numpy_backend_matches_keras_on_batch():
+    """Parity should hold across a batch of random feature vectors"""
+    keras_predictor = StrokePredictor(backend='keras')
+    numpy_predictor = StrokePredictor(backend='numpy')
+
+    rng = np.random.default_rng(42)
+    features = rng.normal(size=(256, 17)).astype(np.float32)
+    features[:, 8:] = rng.integers(0, 2, size=(256, 9))
+
+    expected = keras_predictor.backend.predict(features)
+    actual = numpy_predictor.backend.predict(features)
+
+    assert actual.shape == (256,)
+    np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-6)
+
+def test_predict_risk_same_for_both_backends(high_risk_patient):
+    keras_risk = StrokePredictor(backend='keras').predict_risk(high_risk_patient)
+    numpy_risk = StrokePredictor(backend='numpy').predict_risk(high_risk_patient)
+    assert keras_risk == pytest.approx(numpy_risk, abs=0.1)
+
+def test_unknown_backend():
+    with pytest.raises(ValueError) as exc_info:
+        load_backend('does-not-exist', 'model.keras')
+    assert "Unknown prediction backend" in str(exc_info.value)
+
+@pytest.mark.parametrize('variant, tolerance', [('float16', 1e-3), ('int8', 2e-2)])
+def test_quantized_variants_track_float32(variant, tolerance):
+    """Exported float16/int8 variants stay close to the float32 model"""
+    reference = StrokePredictor(backend='numpy')
+    quantized = StrokePredictor(backend='numpy', variant=variant)
+
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(512, 17)).astype(np.float32)
+    features[:, 8:] = rng.integers(0, 2, size=(512, 9))
+
+    np.testing.assert_allclose(
+        quantized.backend.predict(features),
+        reference.backend.predict(features),
+        atol=tolerance
+    )
+    assert quantized.model_version != reference.model_version
+
+def test_variant_round_trip(tmp_path):
+    backend = StrokePredictor(backend='numpy').backend
+    layers = quantize_layers(backend.layers, 'int8')
+    save_variant(layers, tmp_path / 'model.int8.npz')
+
+    loaded = load_variant(tmp_path / 'model.int8.npz')
+
+    assert len(loaded) == len(layers)
+    for (kernel, bias, activation, scale), original in zip(loaded, layers):
+        assert kernel.dtype == np.int8
+        np.testing.assert_array_equal(kernel, original[0])
+        np.testing.assert_array_equal(scale, original[3])
+        assert activation == original[2]
+
+def test_keras_backend_rejects_variants():
+    with pytest.raises(ValueError):
+        load_backend('keras', 'model.keras', 'int8')
+
+def test_lite_backend_matches_numpy():
+    """The portable TFLite export gives the same probabilities as the NumPy pass"""
+    pytest.importorskip('ai_edge_litert', reason='TFLite runtime not installed')
+    lite = StrokePredictor(backend='lite')
+    reference = StrokePredictor(backend='numpy')
+
+    rng = np.random.default_rng(1)
+    features = rng.normal(size=(64, 17)).astype(np.float32)
+    features[:, 8:] = rng.integers(0, 2, size=(64, 9))
+
+    np.testing.assert_allclose(
+        lite.backend.predict(features), reference.backend.predict(features), rtol=1e-4, atol=1e-6
+    )
+    # Changing batch size resizes the interpreter input
+    np.testing.assert_allclose(
+        lite.backend.predict(features[:1]), reference.backend.predict(features[:1]), rtol=1e-4, atol=1e-6
+    )
+
+def test_auto_selects_cheapest_backend():
+    assert StrokePredictor(backend='auto').backend.name == BACKEND_PREFERENCE[0]
+
+@pytest.mark.parametrize('backend', ['numpy', 'lite'])
+def test_light_backends_do_not_import_tensorflow(backend):
+    """Only the keras backend may pull TensorFlow into a web worker"""
+    if backend == 'lite':
+        pytest.importorskip('ai_edge_litert', reason='TFLite runtime not installed')
+    code = (
+        "import sys\n"
+        "from app.utils.prediction import StrokePredictor\n"
+        f"StrokePredictor(backend='{backend}')\n"
+        "assert 'tensorflow' not in sys.modules and 'keras' not in sys.modules\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=Path(__file__).resolve().parents[2],
+        capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,177 @@
+import socket
+import threading
+import time
+import pytest
+from app.utils import model_server
+from app.utils.batching import MicroBatcher
+from app.utils.model_loader import ModelNotReadyError
+from app.utils.model_server import (
+    MAX_FIELD_BYTES, ModelServer, ModelServerClient, encode_rows, decode_rows, encode_results,
+    decode_results, read_frame, write_frame
+)
+from app.utils.prediction import StrokePredictor
+
+@pytest.fixture
+def local_predictor():
+    return StrokePredictor(backend='numpy')
+
+def start_server(socket_path, predictor):
+    server = ModelServer(socket_path, predictor)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def server_client(tmp_path, local_predictor):
+    socket_path = str(tmp_path / 'model.sock')
+    server = start_server(socket_path, MicroBatcher(local_predictor, window_ms=5))
+    yield ModelServerClient(socket_path)
+    stop_server(server)
+
+def test_wire_format_round_trip(high_risk_patient):
+    rows = [high_risk_patient, {'age': '40', 'gender': None, 'bmi': 'ünïcode'}]
+    decoded = decode_rows(encode_rows(rows))
+    assert decoded[0] == high_risk_patient
+    assert decoded[1] == {'age': '40', 'bmi': 'ünïcode'}
+
+    results = decode_results(encode_results([12.5, ValueError('Prediction error: bad row')]))
+    assert results[0] == 12.5
+    assert isinstance(results[1], ValueError)
+    assert str(results[1]) == 'Prediction error: bad row'
+
+def test_encode_rejects_what_the_wire_format_cannot_carry():
+    longest = 'x' * MAX_FIELD_BYTES
+    assert decode_rows(encode_rows([{'name': 'n', 'bmi': longest}]))[0]['bmi'] == longest
+
+    with pytest.raises(ValueError, match='bmi'):
+        encode_rows([{'bmi': 'x' * (MAX_FIELD_BYTES + 1)}])
+    with pytest.raises(ValueError, match='rows'):
+        encode_rows([{}] * (model_server.MAX_ROWS + 1))
+
+def test_client_matches_in_process(server_client, local_predictor, high_risk_patient, low_risk_patient):
+    for patient in (high_risk_patient, low_risk_patient):
+        assert server_client.predict_risk(patient) == pytest.approx(
+            float(local_predictor.predict_risk(patient))
+        )
+
+def test_client_raises_validation_errors(server_client, invalid_patient):
+    with pytest.raises(ValueError) as exc_info:
+        server_client.predict_risk(invalid_patient)
+    assert "Age must be between 0 and 120" in str(exc_info.value)
+
+def test_client_batch_and_concurrency(server_client, local_predictor, high_risk_patient, invalid_patient):
+    results = server_client.predict_risk_batch([high_risk_patient, invalid_patient])
+    assert results[0] == pytest.approx(float(local_predictor.predict_risk(high_risk_patient)))
+    assert isinstance(results[1], ValueError)
+
+    expected = float(local_predictor.predict_risk(high_risk_patient))
+    seen = []
+
+    def worker():
+        for _ in range(10):
+            seen.append(server_client.predict_risk(high_risk_patient))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert len(seen) == 80
+    assert all(risk == pytest.approx(expected) for risk in seen)
+
+def test_oversized_rows_fail_alone(server_client, high_risk_patient):
+    results = server_client.predict_risk_batch([high_risk_patient, dict(high_risk_patient, bmi='9' * 70000)])
+    assert not isinstance(results[0], Exception)
+    assert isinstance(results[1], ValueError)
+
+    with pytest.raises(ValueError, match='too long'):
+        server_client.predict_risk(dict(high_risk_patient, bmi='9' * 70000))
+
+def test_large_batches_are_split(server_client, local_predictor, high_risk_patient, low_risk_patient, monkeypatch):
+    monkeypatch.setattr(model_server, 'MAX_ROWS', 2)
+    rows = [high_risk_patient, low_risk_patient] * 3
+    results = server_client.predict_risk_batch(rows)
+    assert results == pytest.approx([float(local_predictor.predict_risk(row)) for row in rows])
+
+def test_malformed_frame_does_not_stop_the_server(server_client, high_risk_patient):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5)
+    sock.connect(server_client.socket_path)
+    write_frame(sock, b'\x00\x05\x00')  # claims 5 rows, carries none
+    with pytest.raises(ConnectionError):
+        read_frame(sock)
+    sock.close()
+
+    assert server_client.predict_risk(high_risk_patient) > 0
+
+def test_client_reports_server_model_version(server_client, local_predictor):
+    assert server_client.model_version == local_predictor.model_version
+
+def test_patients_scored_by_the_server_record_its_model_version(app, client, test_user, login, server_client,
+                                                                 local_predictor, high_risk_patient, monkeypatch):
+    from app.models.patient import Patient
+    from app.views import process_patient
+    monkeypatch.setattr(process_patient, 'get_predictor', lambda: server_client)
+
+    with app.app_context():
+        login()
+        body = client.post('/patient/predict', data=dict(high_risk_patient, name='Served Patient')).get_json()
+        rows = [dict(high_risk_patient, name='Batch Patient')]
+        batch = client.post('/patient/predict_batch', json=rows).get_json()
+
+    for patient_id in (body['patient_id'], batch['results'][0]['patient_id']):
+        assert Patient.objects.get(patient_id=patient_id).model_version == local_predictor.model_version
+
+class SlowPredictor:
+    model_version = 'slow'
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = 0
+
+    def predict_risk(self, patient_data):
+        self.calls += 1
+        time.sleep(self.seconds)
+        return 10.0
+
+def test_slow_requests_are_not_resent(tmp_path, high_risk_patient):
+    socket_path = str(tmp_path / 'slow.sock')
+    predictor = SlowPredictor(0.5)
+    server = start_server(socket_path, predictor)
+    try:
+        client = ModelServerClient(socket_path, timeout=0.1)
+        with pytest.raises(ModelNotReadyError):
+            client.predict_risk(high_risk_patient)
+        time.sleep(0.6)
+        assert predictor.calls == 1
+    finally:
+        stop_server(server)
+
+def test_stale_connection_is_replaced(server_client, local_predictor, high_risk_patient):
+    expected = float(local_predictor.predict_risk(high_risk_patient))
+    assert server_client.predict_risk(high_risk_patient) == pytest.approx(expected)
+
+    # As after a server restart: the peer of the pooled connection is gone
+    stale, peer = socket.socketpair()
+    peer.close()
+    server_client._local.sock.close()
+    server_client._local.sock = stale
+    assert server_client.predict_risk(high_risk_patient) == pytest.approx(expected)
+    assert server_client._local.sock is not stale
+
+def test_unreachable_server_answers_503(app, client, test_user, login, tmp_path, high_risk_patient, monkeypatch):
+    from app.views import process_patient
+    unreachable = ModelServerClient(str(tmp_path / 'missing.sock'))
+    monkeypatch.setattr(process_patient, 'get_predictor', lambda: unreachable)
+
+    with app.app_context():
+        login()
+        response = client.post('/patient/predict', data=dict(high_risk_patient, name='Unscored Patient'))
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+        assert not response.get_json()['success']
+        assert client.post('/patient/predict_batch', json=[high_risk_patient]).status_code == 503
@@ -0,0 +1,106 @@
+import threading
+import pytest
+from app import db, bcrypt
+from app.models.user import User
+from app.utils.password_hashing import HashingBusyError, PasswordHasher, hash_rounds, password_hasher
+
+def stored_hash():
+    return User.query.filter_by(email='test@example.com').first().password
+
+def test_hash_rounds():
+    assert hash_rounds(bcrypt.generate_password_hash('secret', rounds=5).decode('utf-8')) == 5
+    assert hash_rounds('not a hash') is None
+    assert hash_rounds(None) is None
+
+def test_hasher_fails_fast_when_full():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(hasher.run(slow)))
+    thread.start()
+    started.wait(5)
+    with pytest.raises(HashingBusyError):
+        hasher.run(lambda: 'too many')
+    release.set()
+    thread.join()
+
+    assert results == ['done'] and hasher.rejected == 1
+    assert hasher.run(lambda: 'free again') == 'free again'
+
+class TestLoginHashing:
+    def test_rehash_on_login_when_cost_changes(self, app, client, test_user, login):
+        with app.app_context():
+            user = User.query.filter_by(email='test@example.com').first()
+            user.password = bcrypt.generate_password_hash('password123', rounds=5).decode('utf-8')
+            db.session.commit()
+
+            assert login().status_code == 302
+            assert hash_rounds(stored_hash()) == app.config['BCRYPT_LOG_ROUNDS'] == 4
+            assert bcrypt.check_password_hash(stored_hash(), 'password123')
+
+    def test_current_cost_is_not_rehashed(self, app, client, test_user, login):
+        with app.app_context():
+            before = stored_hash()
+            assert login().status_code == 302
+            assert stored_hash() == before
+
+    def test_wrong_password_is_not_rehashed(self, app, client, test_user, login):
+        with app.app_context():
+            user = User.query.filter_by(email='test@example.com').first()
+            user.password = bcrypt.generate_password_hash('password123', rounds=5).decode('utf-8')
+            db.session.commit()
+
+            assert login('wrong-password').status_code == 200
+            assert hash_rounds(stored_hash()) == 5
+
+    def test_busy_hasher_returns_503(self, app, client, test_user, monkeypatch, login):
+        def busy(*args):
+            raise HashingBusyError('Too many sign-in attempts at once, please try again in a moment')
+        monkeypatch.setattr(password_hasher, 'run', busy)
+
+        with app.app_context():
+            response = login()
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+            assert b'Too many sign-in attempts' in response.data
+
+class TestUpdatePasswordHashing:
+    def update_password(self, client, current='password123', new='new-password456'):
+        return client.post('/profile/update_password', data={
+            'current_password': current, 'new_password': new
+        })
+
+    def test_runs_on_the_hashing_pool(self, app, client, test_user, monkeypatch, login):
+        calls = []
+        run = password_hasher.run
+
+        def recording_run(fn, *args):
+            calls.append(fn.__name__)
+            return run(fn, *args)
+        monkeypatch.setattr(password_hasher, 'run', recording_run)
+
+        with app.app_context():
+            login()
+            calls.clear()
+            assert self.update_password(client).status_code == 302
+            assert calls == ['check_password', 'hash_password']
+            assert bcrypt.check_password_hash(stored_hash(), 'new-password456')
+
+    def test_busy_hasher_returns_503(self, app, client, test_user, monkeypatch, login):
+        with app.app_context():
+            login()
+
+            def busy(*args):
+                raise HashingBusyError('Too many sign-in attempts at once, please try again in a moment')
+            monkeypatch.setattr(password_hasher, 'run', busy)
+
+            response = self.update_password(client)
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+            assert bcrypt.check_password_hash(stored_hash(), 'password123')
@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta
+import pytest
+from app.utils.patient_counts import PatientCounts, patient_counts
+
+JUNE = datetime(2024, 6, 15)
+
+@pytest.fixture(autouse=True)
+def fresh_counts(monkeypatch):
+    monkeypatch.setattr(patient_counts, '_reconciled_at', None)
+    monkeypatch.setattr(patient_counts, '_next_attempt', 0)
+
+@pytest.fixture
+def saved_patients(make_patient):
+    patients = [
+        make_patient("410020000", created_by='Dr. Irfan', stroke_risk=5.0, record_entry_date=JUNE),
+        make_patient("410020001", created_by='Dr. Irfan', stroke_risk=45.0, record_entry_date=JUNE),
+        make_patient("410020002", created_by='Nida Yasir', stroke_risk=85.0, record_entry_date=datetime(2024, 7, 1)),
+    ]
+    for patient in patients:
+        patient.save()
+    return patients
+
+def test_reconcile_counts_collection(saved_patients):
+    patient_counts.reconcile()
+    counts = patient_counts.read(breakdown=True)
+
+    assert counts['count'] == 3
+    assert counts['by_creator'] == {'Dr. Irfan': 2, 'Nida Yasir': 1}
+    assert counts['by_risk_level'] == {'Low': 1, 'Moderate': 0, 'High': 1, 'Very High': 0, 'Critical': 1}
+    assert counts['by_month'] == {'2024-06': 2, '2024-07': 1}
+
+def test_incremental_updates_match_reconcile(saved_patients, make_patient):
+    patient_counts.reconcile()
+
+    added = make_patient("410020003", created_by='Dr. Irfan', stroke_risk=65.0, record_entry_date=datetime(2024, 8, 31, 23, 59))
+    added.save()
+    patient_counts.record_inserted([added])
+    saved_patients[2].delete()
+    patient_counts.record_deleted([saved_patients[2]])
+
+    incremental = patient_counts.read(breakdown=True)
+    patient_counts.reconcile()
+    exact = patient_counts.read(breakdown=True)
+
+    assert incremental['count'] == exact['count'] == 3
+    assert incremental['by_creator'] == exact['by_creator'] == {'Dr. Irfan': 3}
+    assert incremental['by_risk_level'] == exact['by_risk_level']
+    assert incremental['by_month'] == exact['by_month'] == {'2024-06': 2, '2024-08': 1}
+
+def test_risk_level_boundaries(saved_patients, make_patient):
+    for i, risk in enumerate((0.0, 20.0, 79.99, 80.0, 100.0), start=10):
+        make_patient(f"{410020000 + i}", created_by='Dr. Irfan', stroke_risk=risk, record_entry_date=JUNE).save()
+    counts = patient_counts.reconcile()
+    assert counts['by_risk_level'] == {'Low': 2, 'Moderate': 1, 'High': 1, 'Very High': 1, 'Critical': 3}
+
+def test_increments_during_reconcile_are_kept(saved_patients, make_patient, monkeypatch):
+    patient_counts.reconcile()
+    compute = PatientCounts.compute
+    calls = []
+
+    def compute_racing_an_insert(self):
+        counts = compute(self)
+        calls.append(counts)
+        if len(calls) == 1:
+            # Saved after the aggregation read the collection, counted before the replace
+            added = make_patient("410020003", created_by='Dr. Irfan', stroke_risk=65.0, record_entry_date=JUNE)
+            added.save()
+            patient_counts.record_inserted([added])
+        return counts
+
+    monkeypatch.setattr(PatientCounts, 'compute', compute_racing_an_insert)
+    counts = patient_counts.reconcile()
+    assert len(calls) == 2 and counts['total'] == 4
+    assert patient_counts.read()['count'] == 4
+
+def test_reconcile_gives_up_while_counts_keep_changing(saved_patients, monkeypatch):
+    patient_counts.reconcile()
+    patient_counts.record_inserted(saved_patients[:1])  # pretend drift: 4 counted, 3 stored
+    compute = PatientCounts.compute
+
+    def compute_racing_writes(self):
+        patient_counts._apply({'total': 0})  # an $inc lands during every attempt
+        return compute(self)
+
+    monkeypatch.setattr(PatientCounts, 'compute', compute_racing_writes)
+    assert patient_counts.reconcile(attempts=2) is None
+    assert patient_counts.read()['count'] == 4
+
+def test_periodic_reconcile_runs_in_one_process(saved_patients):
+    patient_counts._collection().insert_one({
+        '_id': PatientCounts.LEASE_ID, 'owner': -1, 'expires_at': datetime.now() + timedelta(hours=1)
+    })
+    patient_counts.maybe_reconcile().join(timeout=10)
+    assert patient_counts.read() is None
+    assert patient_counts.maybe_reconcile() is None  # backs off instead of retrying every request
+
+    patient_counts._collection().delete_one({'_id': PatientCounts.LEASE_ID})
+    patient_counts._next_attempt = 0
+    patient_counts.maybe_reconcile().join(timeout=10)
+    assert patient_counts.read()['count'] == 3
+    assert patient_counts._collection().find_one({'_id': PatientCounts.LEASE_ID})['expires_at'] > datetime.now()
+
+def test_unreconciled_counts_are_not_trusted(saved_patients):
+    patient_counts.record_inserted(saved_patients)
+    assert patient_counts.read() is None
+
+class TestCountRoute:
+    def test_estimate_then_counter(self, app, client, test_user, saved_patients, login):
+        with app.app_context():
+            login()
+            body = client.get('/patient/count').get_json()
+            assert body == {'count': 3, 'source': 'estimate'}
+
+            # The first request started a background reconcile
+            patient_counts._reconcile_lock.acquire(timeout=10)
+            patient_counts._reconcile_lock.release()
+
+            body = client.get('/patient/count').get_json()
+            assert body['count'] == 3 and body['source'] == 'counter'
+
+    def test_predict_increments_counter(self, app, client, test_user, saved_patients, high_risk_patient, login):
+        with app.app_context():
+            login()
+            patient_counts.reconcile()
+            response = client.post('/patient/predict', data=dict(high_risk_patient, name='New Patient'))
+            assert response.status_code == 200
+
+            body = client.get('/patient/count?breakdown=1').get_json()
+            assert body['count'] == 4
+            assert body['by_creator']['Test User'] == 1
+
+    def test_exact_count(self, app, client, test_user, saved_patients, login):
+        with app.app_context():
+            login()
+            assert client.get('/patient/count?exact=1').get_json() == {'count': 3, 'source': 'exact'}
+
+class TestStatsRoute:
+    def wait_for_rebuild(self):
+        patient_counts._reconcile_lock.acquire(timeout=10)
+        patient_counts._reconcile_lock.release()
+
+    def test_unavailable_until_first_rebuild(self, app, client, test_user, saved_patients, login):
+        with app.app_context():
+            login()
+            response = client.get('/patient/stats')
+            assert response.status_code == 503
+            assert response.headers['Retry-After']
+
+            self.wait_for_rebuild()
+            body = client.get('/patient/stats').get_json()
+            assert body['success'] and body['total'] == 3
+            assert body['by_risk_level']['Critical'] == 1
+            assert body['by_creator'] == {'Dr. Irfan': 2, 'Nida Yasir': 1}
+            assert body['by_month'] == {'2024-06': 2, '2024-07': 1}
+
+    def test_delete_updates_stats(self, app, client, test_user, saved_patients, login, make_admin):
+        with app.app_context():
+            make_admin()
+            login()
+            patient_counts.reconcile()
+
+            response = client.post(f'/patient/delete/{saved_patients[2].patient_id}')
+            assert response.status_code == 200
+
+            body = client.get('/patient/stats').get_json()
+            assert body['total'] == 2
+            assert body['by_risk_level']['Critical'] == 0
+            assert body['by_month'] == {'2024-06': 2}
+
+    def test_rebuild_requires_admin(self, app, client, test_user, saved_patients, login, make_admin):
+        with app.app_context():
+            login()
+            assert client.get('/patient/stats?rebuild=1').status_code == 403
+
+            make_admin()
+            body = client.get('/patient/stats?rebuild=1').get_json()
+            assert body['success'] and body['total'] == 3
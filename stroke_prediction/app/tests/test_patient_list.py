@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+import pytest
+from app.models.patient import Patient
+from app.views import process_patient
+from app.utils.pagination import decode_cursor, encode_cursor
+
+@pytest.fixture
+def patients():
+    """25 patients where pairs share an entry date, to exercise the tie-break"""
+    start = datetime(2024, 6, 1, 12, 0, 0)
+    Patient._get_collection().insert_many([{
+        'patient_id': f"{410010000 + i}",
+        'name': f"Patient {i}",
+        'age': 40 + i,
+        'gender': 'Female',
+        'stroke_risk': float(i),
+        'record_entry_date': start + timedelta(minutes=i // 2),
+        'created_by': 'Test User',
+        'bmi': 25.0
+    } for i in range(25)])
+    expected = sorted(
+        Patient._get_collection().find({}, {'record_entry_date': 1, 'patient_id': 1}),
+        key=lambda p: (p['record_entry_date'], p['patient_id']), reverse=True
+    )
+    return [p['patient_id'] for p in expected]
+
+def test_cursor_round_trip():
+    entry_date = datetime(2024, 6, 1, 12, 30, 15, 123000)
+    assert decode_cursor(encode_cursor(entry_date, '410010007')) == (entry_date, '410010007')
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+class TestListPatients:
+    def test_cursor_pages_cover_every_patient_once(self, app, client, test_user, patients, login):
+        with app.app_context():
+            login()
+            seen, cursor = [], None
+            for _ in range(3):
+                query = f'?cursor={cursor}' if cursor else ''
+                body = client.get(f'/patient/list{query}').get_json()
+                seen.extend(p['patient_id'] for p in body['patients'])
+                cursor = body['next_cursor']
+
+            assert seen == patients
+            assert cursor is None and body['has_more'] is False
+
+    def test_page_fallback_matches_cursor_order(self, app, client, test_user, patients, login):
+        with app.app_context():
+            login()
+            body = client.get('/patient/list?page=2').get_json()
+            assert [p['patient_id'] for p in body['patients']] == patients[10:20]
+            assert body['has_more'] is True
+
+    def test_projection_returns_only_listed_fields(self, app, client, test_user, patients, login):
+        with app.app_context():
+            login()
+            body = client.get('/patient/list?limit=3').get_json()
+            assert len(body['patients']) == 3
+            assert set(body['patients'][0]) == {
+                'patient_id', 'name', 'age', 'gender', 'stroke_risk', 'record_entry_date'
+            }
+            datetime.fromisoformat(body['patients'][0]['record_entry_date'])
+
+    def test_limit_is_capped(self, app, client, test_user, patients, monkeypatch, login):
+        monkeypatch.setattr(process_patient, 'MAX_LIST_PAGE_SIZE', 20)
+        with app.app_context():
+            login()
+            body = client.get('/patient/list?limit=100000').get_json()
+            assert len(body['patients']) == 20
+            assert body['has_more'] is True
+
+    def test_invalid_cursor(self, app, client, test_user, login):
+        with app.app_context():
+            login()
+            response = client.get('/patient/list?cursor=garbage')
+            assert response.status_code == 400
+            assert response.get_json()['success'] is False
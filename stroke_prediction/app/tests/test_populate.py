@@ -0,0 +1,50 @@
+import pytest
+from app.models.patient import Patient
+from app.utils.prediction import StrokePredictor
+import Populate_MongoDB
+
+@pytest.fixture(scope='module')
+def predictor():
+    return StrokePredictor(backend='numpy')
+
+def test_chunks_are_reproducible():
+    first = Populate_MongoDB.generate_chunk(100, 5, seed=7)
+    second = Populate_MongoDB.generate_chunk(100, 5, seed=7)
+    assert [d['name'] for d in first[1]] == [d['name'] for d in second[1]]
+    assert first[0] == second[0]
+    assert [d['patient_id'] for d in first[1]] == [str(400000100 + i) for i in range(5)]
+
+def test_generated_documents_are_valid():
+    _, documents, _ = Populate_MongoDB.generate_chunk(0, 50, seed=1)
+    for document in documents:
+        Patient(stroke_risk=10.0, **document).validate()
+
+def test_bulk_load(predictor):
+    stats = Populate_MongoDB.generate_database(250, chunk_size=60, workers=2, predictor=predictor)
+
+    assert stats['insert'][0] == 250 and stats['failed'] == 0
+    assert Patient.objects.count() == 250
+    assert len(Patient.objects.distinct('patient_id')) == 250
+    assert all(0 <= p.stroke_risk <= 100 for p in Patient.objects.only('stroke_risk'))
+    for stage in ('generate', 'score', 'insert', 'total'):
+        rows, seconds = stats[stage]
+        assert rows == 250 and seconds > 0
+
+def test_rerun_tops_up(predictor):
+    Populate_MongoDB.generate_database(30, chunk_size=10, workers=1, predictor=predictor)
+    stats = Populate_MongoDB.generate_database(20, chunk_size=10, workers=1, predictor=predictor)
+    assert stats['start_id'] == 400000030
+    assert stats['insert'][0] == 20 and stats['failed'] == 0
+    assert Patient.objects.count() == 50
+    assert max(Patient.objects.distinct('patient_id')) == '400000049'
+
+def test_overlapping_start_id_reports_duplicates(predictor):
+    Populate_MongoDB.generate_database(30, chunk_size=10, workers=1, predictor=predictor)
+    stats = Populate_MongoDB.generate_database(30, chunk_size=10, workers=1, predictor=predictor,
+                                               start_id=400000020)
+    assert stats['insert'][0] == 20 and stats['failed'] == 10
+    assert Patient.objects.count() == 50
+
+def test_start_id_outside_synthetic_range(predictor):
+    with pytest.raises(ValueError):
+        Populate_MongoDB.generate_database(10, predictor=predictor, start_id=499999995)
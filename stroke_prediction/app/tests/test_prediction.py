@@ -1,4 +1,7 @@
 import pytest
+import random
+import numpy as np
+import pandas as pd
 from app.utils.prediction import StrokePredictor
 
 def test_high_risk_prediction(high_risk_patient):
@@ -15,4 +18,90 @@ def test_invalid_input(invalid_patient):
     predictor = StrokePredictor()
     with pytest.raises(ValueError) as exc_info:
         predictor.predict_risk(invalid_patient)
-    assert "Age must be between 0 and 120" in str(exc_info.value)
\ No newline at end of file
+    assert "Age must be between 0 and 120" in str(exc_info.value)
+
+def reference_preprocess(predictor, data):
+    """Original pandas/sklearn preprocessing, kept as the parity reference"""
+    df = pd.DataFrame([{
+        'gender': data['gender'],
+        'age': float(data['age']),
+        'hypertension': int(data['hypertension']),
+        'heart_disease': int(data['heart_disease']),
+        'ever_married': data['ever_married'],
+        'Residence_type': data['residence_type'].title(),
+        'avg_glucose_level': float(data['avg_glucose_level']),
+        'bmi': float(data['bmi']),
+        'work_type': data['work_type'],
+        'smoking_status': data['smoking_status']
+    }])
+    df.loc[df['gender'] == 'Other', 'gender'] = 'Female'
+    for col in ['gender', 'ever_married', 'Residence_type']:
+        df[col] = predictor.label_encoders[col].transform(df[col])
+    numerical_df = pd.DataFrame(
+        predictor.imputer.transform(df[predictor.NUMERICAL_COLUMNS].copy()),
+        columns=predictor.NUMERICAL_COLUMNS
+    )
+    numerical_df = pd.DataFrame(
+        predictor.scaler.transform(numerical_df),
+        columns=predictor.NUMERICAL_COLUMNS
+    )
+    df[predictor.NUMERICAL_COLUMNS] = numerical_df
+    df = pd.get_dummies(df, columns=['work_type', 'smoking_status'])
+    for col in predictor.EXPECTED_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0
+    return np.asarray(df[predictor.EXPECTED_COLUMNS], dtype=np.float32)
+
+def test_fast_preprocessing_is_bit_compatible():
+    predictor = StrokePredictor()
+    rng = random.Random(7)
+
+    for _ in range(200):
+        data = {
+            'gender': rng.choice(['Male', 'Female', 'Other']),
+            'age': str(rng.randint(0, 120)),
+            'hypertension': rng.choice(['0', '1']),
+            'heart_disease': rng.choice(['0', '1']),
+            'ever_married': rng.choice(['Yes', 'No']),
+            'residence_type': rng.choice(['Urban', 'Rural', 'urban']),
+            'avg_glucose_level': str(round(rng.uniform(0, 300), 2)),
+            'bmi': str(round(rng.uniform(10, 100), 1)),
+            'work_type': rng.choice(['Private', 'Self-employed', 'Govt_job', 'children', 'Never_worked']),
+            'smoking_status': rng.choice(['formerly smoked', 'never smoked', 'smokes', 'Unknown'])
+        }
+        fast = predictor._preprocess_data(data)
+        expected = reference_preprocess(predictor, data)
+
+        assert fast.dtype == np.float32
+        assert fast.shape == expected.shape
+        assert np.array_equal(fast, expected), f"Mismatch for {data}"
+
+def test_preprocessing_rejects_unknown_category(high_risk_patient):
+    predictor = StrokePredictor()
+    high_risk_patient['ever_married'] = 'Maybe'
+    with pytest.raises(ValueError) as exc_info:
+        predictor._preprocess_data(high_risk_patient)
+    assert "Error preprocessing data" in str(exc_info.value)
+
+def test_batch_matches_single_predictions(high_risk_patient, low_risk_patient, invalid_patient):
+    predictor = StrokePredictor()
+    unknown_category = dict(low_risk_patient, ever_married='Maybe')
+    rows = [high_risk_patient, invalid_patient, low_risk_patient, unknown_category]
+
+    results = predictor.predict_risk_batch(rows)
+
+    assert results[0] == predictor.predict_risk(high_risk_patient)
+    assert results[2] == predictor.predict_risk(low_risk_patient)
+    assert isinstance(results[1], ValueError)
+    assert "Age must be between 0 and 120" in str(results[1])
+    assert isinstance(results[3], ValueError)
+
+def test_batch_preprocessing_matches_single_rows(high_risk_patient, low_risk_patient):
+    predictor = StrokePredictor()
+    other_gender = dict(high_risk_patient, gender='Other', work_type='children')
+    rows = [high_risk_patient, low_risk_patient, other_gender]
+
+    batch = predictor._preprocess_batch(rows)
+    single = np.concatenate([predictor._preprocess_data(row) for row in rows])
+
+    assert np.array_equal(batch, single)
@@ -0,0 +1,135 @@
+import multiprocessing
+import time
+import numpy as np
+import pytest
+from app.utils.prediction import StrokePredictor
+from app.utils.prediction_cache import PredictionCache
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / 'prediction_cache.sqlite3'
+
+@pytest.fixture
+def cached_predictor(cache_path):
+    predictor = StrokePredictor(backend='numpy')
+    predictor.cache = PredictionCache(cache_path, predictor.model_version)
+    return predictor
+
+def test_cache_hit_returns_same_risk(cached_predictor, high_risk_patient):
+    first = cached_predictor.predict_risk(high_risk_patient)
+    assert cached_predictor.cache.misses == 1
+
+    second = cached_predictor.predict_risk(high_risk_patient)
+    assert cached_predictor.cache.hits == 1
+    assert second == first
+    assert second == StrokePredictor(backend='numpy').predict_risk(high_risk_patient)
+
+def test_equivalent_inputs_share_an_entry(cached_predictor, high_risk_patient):
+    cached_predictor.predict_risk(high_risk_patient)
+    cached_predictor.predict_risk(dict(high_risk_patient, age='75.0', bmi='32.50'))
+
+    stats = cached_predictor.cache.stats()
+    assert stats['hits'] == 1
+    assert stats['entries'] == 1
+
+def test_batch_uses_cache(cached_predictor, high_risk_patient, low_risk_patient):
+    cached_predictor.predict_risk(high_risk_patient)
+    results = cached_predictor.predict_risk_batch([high_risk_patient, low_risk_patient])
+
+    assert cached_predictor.cache.hits == 1
+    assert cached_predictor.cache.misses == 2
+    assert results[1] == StrokePredictor(backend='numpy').predict_risk(low_risk_patient)
+
+def test_new_model_version_invalidates(cache_path):
+    features = np.ones((1, 17), dtype=np.float32)
+    old_cache = PredictionCache(cache_path, 'old-model')
+    old_cache.put_many(features, [0.25])
+    assert old_cache.get_many(features) == [0.25]
+
+    new_cache = PredictionCache(cache_path, 'new-model')
+    assert new_cache.get_many(features) == [None]
+    assert new_cache.stats()['entries'] == 0
+
+def test_versions_share_a_file_without_clobbering(cache_path):
+    """Workers with different backends/variants keep their own entries for the same features"""
+    features = np.ones((1, 17), dtype=np.float32)
+    numpy_cache = PredictionCache(cache_path, 'hash:numpy:float32')
+    numpy_cache.put_many(features, [0.25])
+
+    lite_cache = PredictionCache(cache_path, 'hash:lite:float32')
+    lite_cache.put_many(features, [0.26])
+
+    assert PredictionCache(cache_path, 'hash:numpy:float32').get_many(features) == [0.25]
+    assert lite_cache.get_many(features) == [0.26]
+    assert lite_cache.stats()['entries'] == 1
+    assert lite_cache.stats()['entries_all_versions'] == 2
+
+def test_unused_versions_age_out(cache_path):
+    features = np.ones((1, 17), dtype=np.float32)
+    PredictionCache(cache_path, 'old-model').put_many(features, [0.25])
+
+    current = PredictionCache(cache_path, 'new-model', max_entries=1)
+    time.sleep(0.01)
+    current.put_many(features, [0.3])
+    current.prune()
+
+    # The old version's entry was least recently used, so it went first
+    assert current.stats()['entries_all_versions'] == 1
+    assert current.get_many(features) == [0.3]
+
+def test_old_schema_is_replaced(cache_path):
+    import sqlite3
+    conn = sqlite3.connect(cache_path)
+    conn.execute('CREATE TABLE predictions (key BLOB PRIMARY KEY, model_version TEXT NOT NULL, '
+                 'probability REAL NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)')
+    conn.close()
+
+    cache = PredictionCache(cache_path, 'v1')
+    features = np.ones((1, 17), dtype=np.float32)
+    cache.put_many(features, [0.5])
+    assert cache.get_many(features) == [0.5]
+
+def test_saved_time_is_signed(cache_path):
+    cache = PredictionCache(cache_path, 'v1')
+    features = np.ones((1, 17), dtype=np.float32)
+    cache.put_many(features, [0.5])
+    cache.get_many(features)
+    cache.record_compute(0.0, 1)  # a model faster than any lookup
+
+    assert cache.stats()['estimated_saved_ms'] < 0
+
+def test_lru_eviction_bounds_size(cache_path):
+    cache = PredictionCache(cache_path, 'v1', max_entries=10)
+    features = np.arange(19 * 17, dtype=np.float32).reshape(19, 17)
+    cache.put_many(features[:10], np.linspace(0, 1, 10))
+    time.sleep(0.01)
+    cache.get_many(features[:1])  # touch the first entry so it survives
+    time.sleep(0.01)
+    cache.put_many(features[10:], np.linspace(0, 1, 9))
+
+    cache.prune()
+
+    assert cache.stats()['entries'] == 10
+    assert cache.get_many(features[:1])[0] is not None
+    assert cache.get_many(features[1:2])[0] is None
+
+def test_ttl_expiry(cache_path):
+    cache = PredictionCache(cache_path, 'v1', ttl_seconds=-1)
+    features = np.ones((1, 17), dtype=np.float32)
+    cache.put_many(features, [0.5])
+    assert cache.get_many(features) == [None]
+
+def _read_in_child(path, queue):
+    cache = PredictionCache(path, 'v1')
+    queue.put(cache.get_many(np.ones((1, 17), dtype=np.float32)))
+
+def test_shared_across_processes(cache_path):
+    PredictionCache(cache_path, 'v1').put_many(np.ones((1, 17), dtype=np.float32), [0.75])
+
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    child = context.Process(target=_read_in_child, args=(str(cache_path), queue))
+    child.start()
+    child.join(timeout=30)
+
+    assert queue.get(timeout=5) == [0.75]
@@ -0,0 +1,78 @@
+import pytest
+from app.models.patient import Patient
+from app.utils.prediction import StrokePredictor
+from app.utils.rescoring import RescoringJob, prediction_input
+import Populate_MongoDB
+
+@pytest.fixture(scope='module')
+def predictor():
+    return StrokePredictor(backend='numpy')
+
+@pytest.fixture
+def stored_patients():
+    """25 patients scored by an "old" model"""
+    _, documents, _ = Populate_MongoDB.generate_chunk(0, 25, seed=3)
+    for document in documents:
+        document['stroke_risk'] = 1.0
+        document['model_version'] = 'old'
+    Patient._get_collection().insert_many(documents)
+    return documents
+
+def test_prediction_input_reverses_stored_values():
+    for _ in range(50):
+        data, document = Populate_MongoDB.generate_patient_data()
+        assert prediction_input(document) == data
+
+def test_rescores_all_patients(predictor, stored_patients):
+    stats = RescoringJob(predictor, chunk_size=10).run()
+
+    assert stats['finished'] and stats['failed'] == 0
+    assert stats['write'][0] == 25
+    expected = predictor.predict_risk_batch([prediction_input(document) for document in stored_patients])
+    for document, risk in zip(stored_patients, expected):
+        patient = Patient.objects.get(patient_id=document['patient_id'])
+        assert patient.stroke_risk == risk
+        assert patient.model_version == predictor.model_version
+
+def test_resumes_from_checkpoint(predictor, stored_patients):
+    first = RescoringJob(predictor, chunk_size=10).run(limit=10)
+    assert not first['finished'] and first['write'][0] == 10
+    checkpoint = RescoringJob(predictor).checkpoint()
+    assert checkpoint['last_patient_id'] == stored_patients[9]['patient_id']
+    assert checkpoint['rescored'] == 10
+
+    second = RescoringJob(predictor, chunk_size=10).run()
+    assert second['finished'] and second['resumed_after'] == stored_patients[9]['patient_id']
+    assert second['write'][0] == 15
+    assert Patient.objects(model_version=predictor.model_version).count() == 25
+
+def test_skips_patients_at_current_version(predictor, stored_patients):
+    job = RescoringJob(predictor, chunk_size=10)
+    job.run()
+    job.reset()
+    assert job.run()['write'][0] == 0
+
+    job.reset()
+    assert RescoringJob(predictor, chunk_size=10, force=True).run()['write'][0] == 25
+
+def test_runs_again_after_finishing_without_reset(predictor, stored_patients):
+    job = RescoringJob(predictor, chunk_size=10)
+    assert job.run()['finished']
+    assert 'last_patient_id' not in job.checkpoint()
+
+    # A patient early in patient_id order goes stale after the pass finished
+    first_id = stored_patients[0]['patient_id']
+    Patient._get_collection().update_one({'patient_id': first_id}, {'$set': {'model_version': 'old'}})
+
+    stats = job.run()
+    assert stats['finished'] and stats['resumed_after'] is None
+    assert stats['write'][0] == 1
+    assert Patient.objects.get(patient_id=first_id).model_version == predictor.model_version
+    assert job.checkpoint()['rescored'] == 1
+
+def test_rows_the_model_rejects_are_left_alone(predictor, stored_patients):
+    Patient._get_collection().update_one({'patient_id': stored_patients[0]['patient_id']}, {'$set': {'bmi': 5.0}})
+
+    stats = RescoringJob(predictor, chunk_size=10).run()
+    assert stats['failed'] == 1 and stats['write'][0] == 24
+    assert Patient.objects.get(patient_id=stored_patients[0]['patient_id']).model_version == 'old'
@@ -0,0 +1,83 @@
+import threading
+import mongomock
+import pytest
+from mongoengine import connect, disconnect
+from sqlalchemy import text
+from app import create_app, db
+from app.models.user import User
+from app.utils.sqlite_engine import TUNED_PRAGMAS, sqlite_engine_options, sqlite_pragmas_from_env
+
+@pytest.fixture
+def file_app(monkeypatch, tmp_path):
+    """Build an app on a SQLite file with the given SQLITE_PROFILE"""
+    def build(profile):
+        monkeypatch.setenv('SQLITE_PROFILE', profile)
+        monkeypatch.setenv('SQLITE_DATABASE_URI', f"sqlite:///{tmp_path / f'{profile}.db'}")
+        disconnect()
+        app = create_app()
+        # Swap the MongoDB connection made by create_app for the mock one
+        disconnect()
+        connect('testdb', host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+        with app.app_context():
+            db.create_all()
+        return app
+    return build
+
+def pragma(name):
+    return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+def test_profile_from_env(monkeypatch):
+    assert sqlite_pragmas_from_env() == TUNED_PRAGMAS
+
+    monkeypatch.setenv('SQLITE_BUSY_TIMEOUT', '10000')
+    assert sqlite_pragmas_from_env()['busy_timeout'] == '10000'
+
+    monkeypatch.setenv('SQLITE_PROFILE', 'default')
+    assert sqlite_pragmas_from_env() is None
+
+    monkeypatch.setenv('SQLITE_PROFILE', 'fast')
+    with pytest.raises(ValueError):
+        sqlite_pragmas_from_env()
+
+def test_pool_options_only_for_files():
+    assert sqlite_engine_options('sqlite:///:memory:', TUNED_PRAGMAS) == {}
+    assert sqlite_engine_options('sqlite:////tmp/users.db', None) == {}
+
+    options = sqlite_engine_options('sqlite:////tmp/users.db', TUNED_PRAGMAS)
+    assert options['connect_args'] == {'check_same_thread': False}
+    assert options['pool_size'] > 0 and options['pool_timeout'] == 5.0
+
+def test_tuned_pragmas_applied(file_app):
+    with file_app('tuned').app_context():
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 5000
+        assert pragma('cache_size') == -16000
+
+def test_default_profile_leaves_sqlite_defaults(file_app):
+    with file_app('default').app_context():
+        assert pragma('journal_mode') == 'delete'
+
+def test_concurrent_writes(file_app):
+    app = file_app('tuned')
+    errors = []
+
+    def register(thread):
+        for i in range(20):
+            with app.app_context():
+                try:
+                    db.session.add(User(name=f'User {thread}-{i}', email=f'{thread}-{i}@example.com',
+                                        password='x', role='staff'))
+                    db.session.commit()
+                except Exception as e:
+                    errors.append(e)
+
+    threads = [threading.Thread(target=register, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with app.app_context():
+        assert User.query.count() == 160
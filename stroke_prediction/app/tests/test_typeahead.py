@@ -0,0 +1,58 @@
+import pytest
+from app.models.patient import Patient
+from app.utils.name_search import normalize_name, search_terms
+from app.utils.patient_search import backfill_name_search, typeahead
+
+@pytest.fixture
+def patients(make_patient):
+    names = ['Ayesha Noor Khan', 'Ayaan Malik', 'José Ñúñez', 'Bilal Khan', 'Sara  AHMED']
+    saved = [make_patient(f"61017{str(i).zfill(4)}", name=name) for i, name in enumerate(names)]
+    for patient in saved:
+        patient.save()
+    return saved
+
+def test_search_terms():
+    assert normalize_name('  José   ÑÚÑEZ ') == 'jose nunez'
+    assert search_terms('Ayesha Noor Khan') == ['ayesha noor khan', 'noor khan', 'khan']
+    assert search_terms('') == []
+
+def test_save_sets_search_terms(patients):
+    raw = Patient._get_collection().find_one({'patient_id': '610170004'})
+    assert raw['name_search'] == ['sara ahmed', 'ahmed']
+
+def test_name_prefix_is_case_and_accent_insensitive(patients):
+    assert {p['name'] for p in typeahead('AY')} == {'Ayesha Noor Khan', 'Ayaan Malik'}
+    assert [p['name'] for p in typeahead('nun')] == ['José Ñúñez']
+    assert {p['name'] for p in typeahead('khan')} == {'Ayesha Noor Khan', 'Bilal Khan'}
+    assert [p['name'] for p in typeahead('ayesha noor k')] == ['Ayesha Noor Khan']
+    assert typeahead('zz') == []
+
+def test_patient_id_prefix(patients):
+    assert len(typeahead('61017')) == 5
+    assert [p['patient_id'] for p in typeahead('SW6101700')][:2] == ['610170000', '610170001']
+    assert [p['patient_id'] for p in typeahead('610170003')] == ['610170003']
+
+def test_limit_and_projection(patients):
+    matches = typeahead('61017', limit=2)
+    assert len(matches) == 2
+    assert set(matches[0]) == {'patient_id', 'name', 'age', 'gender', 'stroke_risk'}
+
+def test_backfill_existing_patients():
+    Patient._get_collection().insert_many([
+        {'patient_id': '610179998', 'name': 'Old Record'},
+        {'patient_id': '610179999', 'name': 'Older Record'},
+    ])
+    assert backfill_name_search(batch_size=1) == 2
+    assert [p['patient_id'] for p in typeahead('rec')] == ['610179998', '610179999']
+    assert backfill_name_search() == 0
+
+class TestTypeaheadRoute:
+    def test_typeahead(self, app, client, test_user, patients, login):
+        with app.app_context():
+            login()
+            body = client.get('/patient/typeahead?q=kha&limit=1').get_json()
+            assert body['success'] is True
+            assert len(body['matches']) == 1
+
+            assert client.get('/patient/typeahead?q=').get_json()['matches'] == []
+            assert client.get('/patient/typeahead?q=a&limit=x').status_code == 400
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+import pytest
+from app import db
+from app.models.user import User
+from app.utils.user_cache import UserCache, UserSnapshot, user_cache
+
+def fake_user(user_id, name='User'):
+    return SimpleNamespace(id=user_id, name=name, email=f'{user_id}@example.com', role='staff')
+
+def test_snapshot_is_read_only():
+    snapshot = UserSnapshot(fake_user(1, 'Dr. Irfan'))
+    assert snapshot.name == 'Dr. Irfan' and snapshot.get_id() == '1' and snapshot.is_authenticated
+    with pytest.raises(AttributeError):
+        snapshot.role = 'admin'
+
+def test_entries_expire(monkeypatch):
+    cache = UserCache(ttl_seconds=30)
+    now = [1000.0]
+    monkeypatch.setattr('app.utils.user_cache.time.monotonic', lambda: now[0])
+
+    loads = []
+    load = lambda user_id: loads.append(user_id) or fake_user(user_id)
+    cache.get(1, load)
+    cache.get(1, load)
+    now[0] += 31
+    cache.get(1, load)
+    assert loads == [1, 1]
+    assert cache.stats()['hits'] == 1
+
+def test_size_is_bounded():
+    cache = UserCache(max_size=2)
+    cache.get(1, fake_user)
+    cache.get(2, fake_user)
+    cache.get(1, fake_user)  # 2 is now least recently used
+    cache.get(3, fake_user)
+    assert cache.stats()['size'] == 2
+
+    loads = []
+    cache.get(1, lambda user_id: loads.append(user_id) or fake_user(user_id))
+    cache.get(2, lambda user_id: loads.append(user_id) or fake_user(user_id))
+    assert loads == [2]
+
+def test_missing_users_are_not_cached():
+    cache = UserCache()
+    assert cache.get(1, lambda user_id: None) is None
+    assert cache.get(1, fake_user).id == 1
+
+@pytest.fixture
+def account(app):
+    """A user created outside any app context that stays open, so each test
+    client request gets its own app context and session, as in production
+    (test_user keeps one app context open, and Flask-Login would reuse the
+    logged-in User from it instead of calling the loader)"""
+    with app.app_context():
+        db.create_all()
+        user = User(name='Test User', email='test@example.com', role='staff')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    yield user_id
+    with app.app_context():
+        db.drop_all()
+
+def stored_user(app, user_id):
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        return user.name, user.role, user.check_password('newpassword456')
+
+class TestCachedLoader:
+    def test_requests_reuse_cached_user(self, app, client, account, login):
+        login()
+        for _ in range(5):
+            assert client.get('/patient/count').status_code == 200
+        stats = user_cache.stats()
+        assert stats['misses'] == 1 and stats['hits'] == 4
+
+    def test_update_name_invalidates(self, app, client, account, login):
+        login()
+        client.get('/profile/settings')
+        client.post('/profile/update_name', data={'new_name': 'Renamed User'})
+
+        assert b'Renamed User' in client.get('/profile/settings').data
+        assert stored_user(app, account)[0] == 'Renamed User'
+
+    def test_update_password_invalidates(self, app, client, account, login):
+        login()
+        client.get('/profile/settings')
+        client.post('/profile/update_password', data={
+            'current_password': 'password123', 'new_password': 'newpassword456'
+        })
+        assert stored_user(app, account)[2]
+        assert user_cache.stats()['size'] == 0
+
+        client.get('/auth/logout')
+        assert login('newpassword456').status_code == 302
+
+    def test_role_change_invalidates(self, app, client, account, login):
+        login()
+        assert client.post('/patient/delete/410000000').status_code == 403
+
+        with app.app_context():
+            db.session.get(User, account).role = 'admin'
+            db.session.commit()
+        assert client.post('/patient/delete/410000000').status_code == 404
+
+    def test_role_change_rolled_back_keeps_entry(self, app, client, account, login):
+        login()
+        client.get('/patient/count')
+
+        with app.app_context():
+            db.session.get(User, account).role = 'admin'
+            db.session.flush()
+            db.session.rollback()
+        assert user_cache.stats()['size'] == 1
+        assert client.post('/patient/delete/410000000').status_code == 403
@@ -0,0 +1,129 @@
+import threading
+from types import SimpleNamespace
+from app.models.patient import Patient
+from app.utils.write_behind import WriteBehindQueue
+from app.views import process_patient
+
+class RecordingWriter:
+    def __init__(self, release=None):
+        self.batches = []
+        self.release = release
+
+    def __call__(self, patients):
+        if self.release is not None:
+            self.release.wait(timeout=10)
+        self.batches.append([patient.patient_id for patient in patients])
+        return {}
+
+def fake_patient(i):
+    return SimpleNamespace(patient_id=str(i))
+
+def test_flushes_in_batches_and_on_close():
+    writer = RecordingWriter()
+    write_queue = WriteBehindQueue(writer, batch_size=25)
+
+    for i in range(100):
+        assert write_queue.submit(fake_patient(i))
+    write_queue.close()
+
+    written = [patient_id for batch in writer.batches for patient_id in batch]
+    assert written == [str(i) for i in range(100)]
+    assert max(len(batch) for batch in writer.batches) <= 25
+
+    stats = write_queue.stats()
+    assert stats['written'] == 100 and stats['depth'] == 0
+    assert stats['flushes'] == len(writer.batches)
+    assert not write_queue.submit(fake_patient(101)), "closed queue rejects new documents"
+
+def test_full_queue_applies_backpressure():
+    release = threading.Event()
+    write_queue = WriteBehindQueue(RecordingWriter(release), max_size=2, batch_size=1, put_timeout=0.01)
+
+    accepted = [write_queue.submit(fake_patient(i)) for i in range(10)]
+
+    # One document is held by the blocked flusher, two fill the queue
+    assert accepted.count(True) <= 3
+    assert accepted[-1] is False
+    assert write_queue.stats()['rejected_when_full'] == accepted.count(False)
+
+    release.set()
+    write_queue.close()
+    assert write_queue.stats()['written'] == accepted.count(True)
+
+def test_pending_patient_is_findable():
+    release = threading.Event()
+    write_queue = WriteBehindQueue(RecordingWriter(release))
+    patient = fake_patient(7)
+    write_queue.submit(patient)
+
+    assert write_queue.find_pending('7') is patient
+    release.set()
+    write_queue.close()
+    assert write_queue.find_pending('7') is None
+
+def test_failed_bulk_writes_are_retried_one_by_one():
+    saved = []
+
+    def save_one(patient):
+        if patient.patient_id == '1':
+            raise ValueError('still broken')
+        saved.append(patient.patient_id)
+
+    write_queue = WriteBehindQueue(lambda patients: {i: 'bulk failed' for i in range(len(patients))},
+                                   save_one=save_one)
+    for i in range(3):
+        write_queue.submit(fake_patient(i))
+    write_queue.close()
+
+    assert sorted(saved) == ['0', '2']
+    stats = write_queue.stats()
+    assert stats['written'] == 2 and stats['failed'] == 1
+    assert [failure['patient_id'] for failure in stats['recent_failures']] == ['1']
+    assert 'still broken' in stats['recent_failures'][0]['error']
+
+class TestPredictWriteBehind:
+    def test_predict_queues_then_persists(self, app, client, test_user, high_risk_patient, monkeypatch, login):
+        write_queue = WriteBehindQueue(process_patient.save_patients)
+        monkeypatch.setattr(process_patient, 'write_queue', write_queue)
+
+        with app.app_context():
+            login()
+            response = client.post('/patient/predict', data=dict(high_risk_patient, name='Queued Patient'))
+            body = response.get_json()
+            assert response.status_code == 200
+            assert body['success'] is True and body['queued'] is True
+            assert body['message'] == 'Patient data queued for saving'
+
+            # Visible to search straight away, whether or not it is flushed yet
+            search = client.get(f"/patient/search?patient_id={body['patient_id']}")
+            assert search.status_code == 200
+
+            write_queue.close()
+            assert Patient.objects(patient_id=body['patient_id']).count() == 1
+
+            metrics = client.get('/patient/metrics').get_json()
+            assert metrics['write_queue']['written'] == 1
+
+    def test_rejected_bulk_write_falls_back_to_save(self, app, client, test_user, high_risk_patient, monkeypatch, login):
+        bulk_write_down = lambda patients: {i: 'bulk write failed' for i in range(len(patients))}
+        write_queue = WriteBehindQueue(bulk_write_down, save_one=process_patient.save_patient)
+        monkeypatch.setattr(process_patient, 'write_queue', write_queue)
+
+        with app.app_context():
+            login()
+            body = client.post('/patient/predict', data=dict(high_risk_patient, name='Retried Patient')).get_json()
+            write_queue.close()
+            assert Patient.objects(patient_id=body['patient_id']).count() == 1
+            assert write_queue.stats()['failed'] == 0
+
+    def test_invalid_patient_is_not_queued(self, app, client, test_user, high_risk_patient, monkeypatch, login):
+        write_queue = WriteBehindQueue(process_patient.save_patients)
+        monkeypatch.setattr(process_patient, 'write_queue', write_queue)
+
+        with app.app_context():
+            login()
+            # Passes prediction but fails the Patient schema (age < 5)
+            response = client.post('/patient/predict', data=dict(high_risk_patient, name='Too Young', age='3'))
+            assert response.status_code == 500
+            assert write_queue.stats()['enqueued'] == 0
+            write_queue.close()
@@ -0,0 +1,158 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+import numpy as np
+
+
+class _PendingPrediction:
+    """One caller waiting for its slot in a batch"""
+    __slots__ = ('data', 'enqueued_at', 'done', 'result')
+
+    def __init__(self, data):
+        self.data = data
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+
+
+class BatchingStats:
+    """Batch-size distribution and queueing delay for the micro-batcher"""
+
+    def __init__(self, sample_size=2048):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes = Counter()
+        self.queue_delays = deque(maxlen=sample_size)  # seconds, most recent requests
+
+    def record(self, batch_size, queue_delays):
+        with self._lock:
+            self.batches += 1
+            self.requests += batch_size
+            self.batch_sizes[batch_size] += 1
+            self.queue_delays.extend(queue_delays)
+
+    def snapshot(self):
+        with self._lock:
+            delays_ms = np.array(self.queue_delays) * 1000
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'batch_size_histogram': {
+                    str(size): count for size, count in sorted(self.batch_sizes.items())
+                },
+                'queue_delay_ms': {
+                    'p50': float(np.percentile(delays_ms, 50)) if delays_ms.size else 0.0,
+                    'p95': float(np.percentile(delays_ms, 95)) if delays_ms.size else 0.0,
+                    'p99': float(np.percentile(delays_ms, 99)) if delays_ms.size else 0.0,
+                    'max': float(delays_ms.max()) if delays_ms.size else 0.0,
+                }
+            }
+
+
+class MicroBatcher:
+    """Coalesce concurrent predict_risk calls into batched forward passes.
+
+    Requests that arrive within ``window_ms`` of the first queued request
+    (up to ``max_batch_size``) are scored with one call to
+    ``predictor.predict_risk_batch`` and each caller gets its own result.
+    A caller whose result has not arrived after ``timeout`` seconds gets a
+    ValueError instead of waiting forever.
+    """
+
+    def __init__(self, predictor, max_batch_size=64, window_ms=2.0, timeout=30.0):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000.0
+        self.timeout = timeout
+        self.stats = BatchingStats()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+    @classmethod
+    def from_env(cls, predictor):
+        """Wrap ``predictor`` when PREDICTION_BATCH_WINDOW_MS is set, else return it as is"""
+        window_ms = float(os.getenv('PREDICTION_BATCH_WINDOW_MS', '0'))
+        if window_ms <= 0:
+            return predictor
+        max_batch_size = int(os.getenv('PREDICTION_MAX_BATCH_SIZE', '64'))
+        timeout = float(os.getenv('PREDICTION_BATCH_TIMEOUT', '30'))
+        return cls(predictor, max_batch_size=max_batch_size, window_ms=window_ms, timeout=timeout)
+
+    def __getattr__(self, name):
+        # Everything else (validate_input, backend, ...) comes from the predictor
+        return getattr(self.predictor, name)
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so restart the worker in each process;
+        # a worker that died is replaced and picks up the requests still queued
+        if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+            if self._worker is None or self._worker_pid != os.getpid() or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='prediction-batcher', daemon=True
+                )
+                self._worker_pid = os.getpid()
+                self._worker.start()
+
+    def predict_risk(self, patient_data):
+        """Predict stroke risk for a patient, batched with concurrent callers"""
+        self._ensure_worker()
+        pending = _PendingPrediction(patient_data)
+        self._queue.put(pending)
+        if not pending.done.wait(self.timeout):
+            raise ValueError(f"Prediction error: no result from the batch worker within {self.timeout:g}s")
+
+        if isinstance(pending.result, Exception):
+            raise pending.result
+        return pending.result
+
+    def predict_risk_batch(self, rows):
+        """Already-batched calls go straight to the predictor"""
+        return self.predictor.predict_risk_batch(rows)
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until the window closes"""
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued_at + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Window closed; still take whatever is already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.monotonic()
+
+            try:
+                results = list(self.predictor.predict_risk_batch([pending.data for pending in batch]))
+                if len(results) != len(batch):
+                    raise ValueError(f"predict_risk_batch returned {len(results)} results for {len(batch)} rows")
+            except Exception as e:
+                print(f"Batch prediction error details: {str(e)}")  # For debugging
+                # Every caller in the batch gets the error, none is left waiting
+                results = [ValueError(f"Prediction error: {str(e)}")] * len(batch)
+
+            for pending, result in zip(batch, results):
+                pending.result = result
+                pending.done.set()
+
+            self.stats.record(len(batch), [started - pending.enqueued_at for pending in batch])
@@ -0,0 +1,122 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli  # type: ignore  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+}
+
+
+class ResponseCompressor:
+    """Compresses text responses with brotli (when installed) or gzip.
+
+    Runs as an after_request hook. Responses smaller than ``min_size``
+    bytes, non-200 responses, responses that already carry a
+    Content-Encoding (such as the gzip export stream) and other streamed
+    responses are left alone. Static files are compressed once per ETag and
+    the result kept in a small LRU, so repeated asset requests cost a
+    dictionary lookup.
+    """
+
+    def __init__(self, level=6, brotli_quality=5, min_size=1024, max_size=4 * 1024 * 1024, cache_size=64):
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+        self.max_size = max_size
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (etag, encoding) -> compressed bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build the compressor unless COMPRESS_LEVEL is 0, else return None"""
+        level = int(os.getenv('COMPRESS_LEVEL', '6'))
+        if level <= 0:
+            return None
+        return cls(
+            level=level,
+            brotli_quality=int(os.getenv('COMPRESS_BROTLI_QUALITY', '5')),
+            min_size=int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+        )
+
+    def init_app(self, app):
+        app.after_request(self.compress)
+
+    def encoding_for(self, accept_encodings):
+        """Best encoding the client accepts, or None"""
+        if brotli is not None and accept_encodings['br']:
+            return 'br'
+        if accept_encodings['gzip']:
+            return 'gzip'
+        return None
+
+    def encode(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compress(self, response):
+        if (response.status_code != 200
+                or response.mimetype not in COMPRESSIBLE_TYPES
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        # Generated streams (e.g. a plain export) would have to be buffered; files are fine
+        if response.is_streamed and not response.direct_passthrough:
+            return response
+        length = response.content_length
+        if length is None or length < self.min_size or length > self.max_size:
+            return response
+
+        # The body now depends on Accept-Encoding, whether or not this client gets it compressed
+        response.vary.add('Accept-Encoding')
+        encoding = self.encoding_for(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        cache_key = (etag, encoding) if response.direct_passthrough and etag else None
+        body = self._cached(cache_key)
+        if body is None:
+            response.direct_passthrough = False
+            body = self.encode(response.get_data(), encoding)
+            self._store(cache_key, body)
+        elif hasattr(response.response, 'close'):
+            response.response.close()  # the file is not read; release its handle now
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        # Byte ranges would refer to the uncompressed file
+        response.headers.pop('Accept-Ranges', None)
+        if etag and not weak:
+            # Same content, different bytes: keep If-None-Match working with a weak validator
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _cached(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+            return body
+
+    def _store(self, key, body):
+        if key is None:
+            return
+        with self._lock:
+            self._cache[key] = body
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+response_compressor = ResponseCompressor.from_env()
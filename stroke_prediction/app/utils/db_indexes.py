@@ -0,0 +1,70 @@
+from app.models.counter import Counter
+from app.models.patient import Patient
+
+# Documents whose declared indexes manage_indexes.py creates and verifies
+MANAGED_DOCUMENTS = [Patient, Counter]
+
+
+def _raw_collection(document):
+    # Document._get_collection() would create missing indexes as a side effect
+    return document._get_db()[document._get_collection_name()]
+
+
+def index_report(document):
+    """Compare the indexes declared on ``document`` with those in the database.
+
+    Returns a dict with the declared specs that are ``missing``, existing
+    indexes whose options differ (``mismatched``) and indexes the database has
+    that the model does not declare (``undeclared``).
+    """
+    existing = {
+        tuple(info['key']): (name, bool(info.get('unique')))
+        for name, info in _raw_collection(document).index_information().items()
+    }
+
+    missing, mismatched = [], []
+    declared = set()
+    for spec in document._meta['index_specs']:
+        key = tuple(tuple(field) for field in spec['fields'])
+        declared.add(key)
+        if key not in existing:
+            missing.append(spec)
+        elif existing[key][1] != bool(spec.get('unique')):
+            mismatched.append(existing[key][0])
+
+    undeclared = [
+        name for key, (name, _) in existing.items()
+        if key not in declared and key != (('_id', 1),)
+    ]
+    return {
+        'collection': document._get_collection_name(),
+        'missing': missing,
+        'mismatched': mismatched,
+        'undeclared': undeclared
+    }
+
+
+def ensure_declared_indexes(documents=None):
+    """Create any missing declared indexes and return the reports taken beforehand"""
+    reports = []
+    for document in documents or MANAGED_DOCUMENTS:
+        reports.append(index_report(document))
+        document.ensure_indexes()
+    return reports
+
+
+def plan_stages(explain):
+    """All stage names in the winning plan of an ``explain()`` result"""
+    planner = explain.get('queryPlanner', explain)
+    stack = [planner.get('winningPlan', {})]
+    stages = []
+    while stack:
+        plan = stack.pop()
+        # Newer servers wrap the classic plan in queryPlan
+        plan = plan.get('queryPlan', plan)
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        if 'inputStage' in plan:
+            stack.append(plan['inputStage'])
+        stack.extend(plan.get('inputStages', []))
+    return stages
@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import abort
+from flask import abort, make_response, request
 from flask_login import current_user
 
 def role_required(*roles):
@@ -11,3 +11,20 @@ def role_required(*roles):
             return f(*args, **kwargs)
         return decorated_function
     return decorator
+
+def conditional_response(f):
+    """Add an ETag to successful responses and answer a matching If-None-Match with 304.
+
+    Cache-Control: no-cache makes browsers revalidate every time, so polling
+    fetches get an empty 304 instead of the same JSON while nothing changed.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        response.add_etag()
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return decorated_function
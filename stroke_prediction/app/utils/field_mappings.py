@@ -0,0 +1,40 @@
+# Conversions between the form/model vocabulary and the values stored in MongoDB
+
+def map_binary_to_yes_no(value):
+    """Convert '0'/'1' to 'No'/'Yes'"""
+    return 'Yes' if value == '1' else 'No'
+
+def map_yes_no_to_binary(value):
+    """Convert 'Yes'/'No' back to the '1'/'0' the model expects"""
+    return '1' if value == 'Yes' else '0'
+
+# Form/model vocabulary -> values stored in MongoDB
+SMOKING_STATUS_MAPPING = {
+    'formerly smoked': 'Formerly Smoked',
+    'never smoked': 'Never Smoked',
+    'smokes': 'Smokes',
+    'Unknown': 'Unknown'
+}
+WORK_TYPE_MAPPING = {
+    'Private': 'Private',
+    'Self-employed': 'Self-Employed',
+    'Govt_job': 'Govt Job',
+    'children': 'Children',
+    'Never_worked': 'Never Worked'
+}
+
+def map_smoking_status(status):
+    """Map form smoking status to MongoDB expected format"""
+    return SMOKING_STATUS_MAPPING.get(status, status)
+
+def unmap_smoking_status(status):
+    """Map a stored smoking status back to the form/model vocabulary"""
+    return {stored: form for form, stored in SMOKING_STATUS_MAPPING.items()}.get(status, status)
+
+def map_work_type(work):
+    """Map form work type to MongoDB expected format"""
+    return WORK_TYPE_MAPPING.get(work, work)
+
+def unmap_work_type(work):
+    """Map a stored work type back to the form/model vocabulary"""
+    return {stored: form for form, stored in WORK_TYPE_MAPPING.items()}.get(work, work)
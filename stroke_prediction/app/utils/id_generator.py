@@ -1,38 +1,89 @@
+from collections import deque
 from datetime import datetime
-import random
+import os
+import threading
+from app.models.counter import Counter
 from app.models.patient import Patient
 
+
+class PatientIDAllocator:
+    """Hands out date-prefixed patient IDs from blocks reserved on a shared counter.
+
+    Each process reserves ``block_size`` sequence numbers at a time with one
+    atomic ``$inc`` on the day's counter document and serves IDs from memory
+    until the block runs out, so IDs are unique across workers without a
+    lookup per ID.
+    """
+    SEQUENCE_DIGITS = 4
+    DAILY_CAPACITY = 10 ** SEQUENCE_DIGITS
+
+    def __init__(self, block_size=50):
+        if block_size < 1:
+            raise ValueError("block_size must be at least 1")
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._block = deque()
+        self._date_portion = None
+        self._pid = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(block_size=int(os.getenv('PATIENT_ID_BLOCK_SIZE', '50')))
+
+    @staticmethod
+    def date_portion(now=None):
+        """Last digit of the year, then 2-digit month and day (e.g. 61017)"""
+        now = now or datetime.now()
+        return f"{str(now.year)[-1]}{str(now.month).zfill(2)}{str(now.day).zfill(2)}"
+
+    def _reserve_block(self, date_portion, size):
+        """Claim the next ``size`` sequence numbers for the day and return their IDs"""
+        counter = Counter.objects(name=f'patient_id:{date_portion}').modify(
+            upsert=True, new=True, inc__value=size
+        )
+        start = counter.value - size
+        if start >= self.DAILY_CAPACITY:
+            raise ValueError(f"Daily patient ID capacity ({self.DAILY_CAPACITY}) exhausted for {date_portion}")
+
+        candidates = [
+            f"{date_portion}{str(seq).zfill(self.SEQUENCE_DIGITS)}"
+            for seq in range(start, min(counter.value, self.DAILY_CAPACITY))
+        ]
+        # One query per block skips IDs saved before the counter existed
+        existing = set(Patient.objects(patient_id__in=candidates).distinct('patient_id'))
+        return [patient_id for patient_id in candidates if patient_id not in existing]
+
+    def allocate(self, count=1):
+        """Return ``count`` unused patient IDs"""
+        with self._lock:
+            date_portion = self.date_portion()
+            # A new day or a forked worker must not reuse the previous block
+            if date_portion != self._date_portion or self._pid != os.getpid():
+                self._block.clear()
+                self._date_portion = date_portion
+                self._pid = os.getpid()
+
+            while len(self._block) < count:
+                needed = count - len(self._block)
+                self._block.extend(self._reserve_block(date_portion, max(self.block_size, needed)))
+
+            return [self._block.popleft() for _ in range(count)]
+
+
+allocator = PatientIDAllocator.from_env()
+
+
 class IDGenerator:
     @staticmethod
     def generate_patient_id():
+        """Allocate one 9-digit ID: 5-digit date portion plus a 4-digit daily sequence"""
+        return allocator.allocate()[0]
 
-        max_attempts = 5
-        
-        for attempt in range(max_attempts):
-            # Get current date components
-            now = datetime.now()
-            year_digit = str(now.year)[-1]  # Last digit of the year
-            month_digits = str(now.month).zfill(2)  # Ensure 2 digits
-            day_digits = str(now.day).zfill(2)  # Ensure 2 digits
-            
-            # Create date portion of the ID
-            date_portion = f"{year_digit}{month_digits}{day_digits}"
-            
-            # Generate a random 4-digit sequence
-            random_sequence = str(random.randint(0, 9999)).zfill(4)
-            
-            # Combine to create 8-digit ID
-            patient_id = f"{date_portion}{random_sequence}"
-            
-            # Validate the generated ID
-            if IDGenerator.validate_patient_id(patient_id):
-                return str(patient_id)  # Return if valid
-            else:
-                print(f"Attempt {attempt + 1}: Generated invalid ID {patient_id}. Retrying...")
-        
-        # If all attempts fail, raise an exception or handle the failure
-        raise ValueError("Failed to generate a valid patient ID after maximum attempts.")
 
+    @staticmethod
+    def generate_patient_ids(count):
+        """Allocate ``count`` unique IDs"""
+        return allocator.allocate(count) if count else []
 
     def check_patient_id(patient_id):
 
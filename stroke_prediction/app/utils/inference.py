@@ -0,0 +1,282 @@
+import importlib.util
+import io
+import json
+import threading
+import zipfile
+from pathlib import Path
+import numpy as np
+
+
+# Weight precisions the NumPy backend can run
+VARIANTS = ('float32', 'float16', 'int8')
+
+
+def variant_path(model_path, variant):
+    """Where the exported weights for ``variant`` live, next to the .keras file"""
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.{variant}.npz")
+
+
+def lite_path(model_path):
+    """Where the portable TFLite export lives, next to the .keras file"""
+    return Path(model_path).with_suffix('.tflite')
+
+
+def _lite_interpreter_class():
+    """The standalone TFLite interpreter, without importing TensorFlow"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter  # type: ignore
+    except ImportError:
+        from tflite_runtime.interpreter import Interpreter  # type: ignore
+    return Interpreter
+
+
+def quantize_layers(layers, variant):
+    """Convert folded float32 layers to the storage precision of ``variant``.
+
+    float16 halves the kernels; int8 stores each kernel column as symmetric
+    int8 values plus one float32 scale per output unit. Biases stay float32.
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown model variant '{variant}'. Choose one of: {', '.join(VARIANTS)}")
+
+    quantized = []
+    for kernel, bias, activation, _ in layers:
+        scale = None
+        if variant == 'float16':
+            kernel = kernel.astype(np.float16)
+        elif variant == 'int8':
+            scale = np.abs(kernel).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            kernel = np.clip(np.round(kernel / scale), -127, 127).astype(np.int8)
+            scale = scale.astype(np.float32)
+        quantized.append((kernel, bias, activation, scale))
+    return quantized
+
+
+def save_variant(layers, path):
+    """Write quantized layers to an .npz file"""
+    arrays = {}
+    for i, (kernel, bias, activation, scale) in enumerate(layers):
+        arrays[f'kernel_{i}'] = kernel
+        arrays[f'bias_{i}'] = bias
+        arrays[f'activation_{i}'] = np.array(activation)
+        if scale is not None:
+            arrays[f'scale_{i}'] = scale
+    np.savez(path, n_layers=np.array(len(layers)), **arrays)
+
+
+def load_variant(path):
+    """Read layers written by save_variant"""
+    with np.load(path) as data:
+        return [
+            (
+                data[f'kernel_{i}'],
+                data[f'bias_{i}'],
+                str(data[f'activation_{i}']),
+                data[f'scale_{i}'] if f'scale_{i}' in data else None
+            )
+            for i in range(int(data['n_layers']))
+        ]
+
+
+class KerasBackend:
+    """Reference backend that runs the saved model through Keras"""
+    name = 'keras'
+
+    @staticmethod
+    def is_available(model_path, variant='float32'):
+        return variant == 'float32' and importlib.util.find_spec('keras') is not None
+
+    def __init__(self, model_path, variant='float32'):
+        if variant != 'float32':
+            raise ValueError("The keras backend only runs the float32 model")
+        from keras.models import load_model  # type: ignore
+        self.model = load_model(model_path)
+
+    def predict(self, features):
+        """Return a 1-D array of stroke probabilities"""
+        features = np.asarray(features, dtype=np.float32)
+        return self.model.predict(features, verbose=0)[:, 0]
+
+
+class LiteBackend:
+    """Runs the portable .tflite export with the standalone TFLite interpreter"""
+    name = 'lite'
+
+    @staticmethod
+    def is_available(model_path, variant='float32'):
+        if variant != 'float32' or not lite_path(model_path).exists():
+            return False
+        return any(
+            importlib.util.find_spec(module) is not None
+            for module in ('ai_edge_litert', 'tflite_runtime')
+        )
+
+    def __init__(self, model_path, variant='float32'):
+        if variant != 'float32':
+            raise ValueError("The lite backend only runs the float32 model")
+        self.interpreter = _lite_interpreter_class()(model_path=str(lite_path(model_path)))
+        self.interpreter.allocate_tensors()
+        self._input_index = self.interpreter.get_input_details()[0]['index']
+        self._output_index = self.interpreter.get_output_details()[0]['index']
+        self._batch_size = None
+        self._lock = threading.Lock()  # the interpreter is not thread-safe
+
+    def predict(self, features):
+        """Return a 1-D array of stroke probabilities"""
+        x = np.ascontiguousarray(features, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[None, :]
+
+        with self._lock:
+            if x.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input_index, x.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = x.shape[0]
+            self.interpreter.set_tensor(self._input_index, x)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output_index)[:, 0].copy()
+
+
+class NumpyBackend:
+    """Pure-NumPy forward pass over the weights stored in a .keras archive"""
+    name = 'numpy'
+
+    @staticmethod
+    def is_available(model_path, variant='float32'):
+        if variant == 'float32':
+            return Path(model_path).exists()
+        return variant_path(model_path, variant).exists()
+
+    ACTIVATIONS = {
+        'linear': lambda x: x,
+        'relu': lambda x: np.maximum(x, 0, out=x),
+        'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    }
+
+    def __init__(self, model_path, variant='float32'):
+        if variant == 'float32':
+            self.layers = self._fold_layers(*self._read_archive(model_path))
+        elif variant in VARIANTS:
+            self.layers = load_variant(variant_path(model_path, variant))
+        else:
+            raise ValueError(f"Unknown model variant '{variant}'. Choose one of: {', '.join(VARIANTS)}")
+
+    @classmethod
+    def from_layers(cls, layers):
+        """Build a backend around already folded (or quantized) layers"""
+        backend = cls.__new__(cls)
+        backend.layers = layers
+        return backend
+
+    @staticmethod
+    def _read_archive(model_path):
+        """Read the layer config and weights without importing Keras"""
+        import h5py
+
+        with zipfile.ZipFile(model_path) as archive:
+            config = json.loads(archive.read('config.json'))
+            weights_file = io.BytesIO(archive.read('model.weights.h5'))
+
+        weights = {}
+        with h5py.File(weights_file, 'r') as f:
+            for layer_name, group in f['layers'].items():
+                variables = group['vars']
+                weights[layer_name] = [
+                    np.asarray(variables[str(i)], dtype=np.float64)
+                    for i in range(len(variables))
+                ]
+
+        return config['config']['layers'], weights
+
+    def _fold_layers(self, layer_configs, weights):
+        """Collapse the Sequential stack into (kernel, bias, activation, scale) steps.
+
+        The model applies BatchNormalization after each Dense activation, so
+        every BN layer is an affine transform ``x * scale + shift`` that can be
+        folded into the kernel and bias of the next Dense layer. Dropout is a
+        no-op at inference time.
+        """
+        layers = []
+        scale, shift = None, None
+
+        for layer in layer_configs:
+            kind = layer['class_name']
+            config = layer['config']
+
+            if kind == 'Dense':
+                kernel, bias = weights[config['name']]
+                if scale is not None:
+                    bias = bias + shift @ kernel
+                    kernel = kernel * scale[:, None]
+                    scale, shift = None, None
+                activation = config.get('activation', 'linear')
+                if activation not in self.ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation: {activation}")
+                layers.append((kernel, bias, activation))
+
+            elif kind == 'BatchNormalization':
+                gamma, beta, mean, variance = weights[config['name']]
+                bn_scale = gamma / np.sqrt(variance + config['epsilon'])
+                bn_shift = beta - mean * bn_scale
+                if scale is None:
+                    scale, shift = bn_scale, bn_shift
+                else:
+                    scale, shift = scale * bn_scale, shift * bn_scale + bn_shift
+
+            elif kind not in ('InputLayer', 'Dropout'):
+                raise ValueError(f"Unsupported layer type: {kind}")
+
+        if scale is not None:
+            # Trailing BN with no Dense after it stays as a final affine step
+            layers.append((np.diag(scale), shift, 'linear'))
+
+        return [
+            (kernel.astype(np.float32), bias.astype(np.float32), activation, None)
+            for kernel, bias, activation in layers
+        ]
+
+    def predict(self, features):
+        """Return a 1-D array of stroke probabilities"""
+        x = np.asarray(features, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[None, :]
+
+        for kernel, bias, activation, scale in self.layers:
+            x = x @ kernel
+            if scale is not None:
+                x = x * scale  # int8 kernels: dequantize the output, not the weights
+            x = self.ACTIVATIONS[activation](x + bias)
+
+        return x[:, 0]
+
+
+BACKENDS = {
+    KerasBackend.name: KerasBackend,
+    LiteBackend.name: LiteBackend,
+    NumpyBackend.name: NumpyBackend,
+}
+
+# Cheapest runtime first; 'auto' picks the first one that is available
+BACKEND_PREFERENCE = ('numpy', 'lite', 'keras')
+
+
+def select_backend(model_path, variant='float32'):
+    """Name of the cheapest backend whose runtime and artifact are available"""
+    for name in BACKEND_PREFERENCE:
+        if BACKENDS[name].is_available(model_path, variant):
+            return name
+    raise ValueError(f"No prediction backend can load {model_path} ({variant})")
+
+
+def load_backend(name, model_path, variant='float32'):
+    """Instantiate the inference backend registered under ``name`` (or 'auto')"""
+    if name == 'auto':
+        name = select_backend(model_path, variant)
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown prediction backend '{name}'. "
+            f"Choose one of: auto, {', '.join(sorted(BACKENDS))}"
+        )
+    return BACKENDS[name](model_path, variant)
@@ -0,0 +1,92 @@
+import threading
+import time
+
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when the predictor is not loaded within the allowed wait"""
+
+
+# Canned patient used to warm up the predictor after loading
+WARMUP_PATIENT = {
+    'gender': 'Male',
+    'age': '60',
+    'hypertension': '0',
+    'heart_disease': '0',
+    'ever_married': 'Yes',
+    'residence_type': 'Urban',
+    'avg_glucose_level': '100',
+    'bmi': '25.0',
+    'work_type': 'Private',
+    'smoking_status': 'never smoked'
+}
+
+
+class PredictorLoader:
+    """Load the predictor on a background thread so the app can serve immediately.
+
+    ``factory`` builds the predictor; once it returns, a warm-up inference is
+    run and waiting requests are released.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.predictor = None
+        self.error = None
+        self.load_seconds = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Begin loading in the background; safe to call more than once"""
+        with self._lock:
+            if self.predictor is not None:
+                return
+            # Already loading; a thread started before a fork is not alive in the child
+            if self._thread is not None and self._thread.is_alive():
+                return
+            # First start, a retry after a failed load, or a freshly forked worker
+            self.error = None
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._load, name='predictor-loader', daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        started = time.monotonic()
+        try:
+            predictor = self.factory()
+            predictor.predict_risk(WARMUP_PATIENT)
+            self.predictor = predictor
+            self.load_seconds = time.monotonic() - started
+            print(f"Prediction model loaded in {self.load_seconds:.2f}s")
+        except Exception as e:
+            print(f"Error loading prediction model: {str(e)}")
+            self.error = str(e)
+        finally:
+            self._ready.set()
+
+    @property
+    def is_ready(self):
+        return self.predictor is not None
+
+    def get(self, timeout=None):
+        """Return the predictor, waiting up to ``timeout`` seconds for it to load"""
+        if self.predictor is not None:
+            return self.predictor
+
+        self.start()
+        self._ready.wait(timeout)
+
+        if self.predictor is None:
+            if self.error:
+                raise ModelNotReadyError(f"Prediction model failed to load: {self.error}")
+            raise ModelNotReadyError("Prediction model is still loading, please retry shortly")
+        return self.predictor
+
+    def status(self):
+        return {
+            'ready': self.is_ready,
+            'loading': self._thread is not None and self._thread.is_alive(),
+            'error': self.error,
+            'load_seconds': self.load_seconds
+        }
@@ -0,0 +1,255 @@
+import os
+import socket
+import socketserver
+import struct
+import threading
+from app.utils.model_loader import ModelNotReadyError
+
+# Field order on the wire; requests carry values only, no keys
+FIELDS = [
+    'age', 'gender', 'hypertension', 'heart_disease', 'ever_married',
+    'work_type', 'residence_type', 'avg_glucose_level', 'bmi', 'smoking_status'
+]
+
+_FRAME = struct.Struct('>I')     # payload length
+_COUNT = struct.Struct('>H')     # rows in a request or response
+_LENGTH = struct.Struct('>H')    # string length
+_RISK = struct.Struct('>Bd')     # status, risk percentage
+_MISSING = 0xFFFF                # length marker for an absent/None field
+_OK, _ERROR = 0, 1
+MAX_ROWS = 0xFFFF                # rows per frame (_COUNT)
+MAX_FIELD_BYTES = _MISSING - 1   # longest encodable value
+_VERSION_REQUEST = b''           # empty frame: "which model are you serving?"
+# Failures that mean the request never reached the server, so sending it again is safe
+_RETRYABLE_ERRORS = (FileNotFoundError, ConnectionRefusedError, ConnectionResetError, BrokenPipeError)
+
+
+def _encode_row(row):
+    """Length-prefixed UTF-8 values of one row; ValueError if a value does not fit"""
+    parts = []
+    for field in FIELDS:
+        value = row.get(field)
+        if value is None:
+            parts.append(_LENGTH.pack(_MISSING))
+            continue
+        encoded = str(value).encode('utf-8')
+        if len(encoded) > MAX_FIELD_BYTES:
+            raise ValueError(f"Invalid {field}: value is too long")
+        parts.append(_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+
+def encode_rows(rows):
+    """Pack patient dicts as length-prefixed UTF-8 values in FIELDS order"""
+    if len(rows) > MAX_ROWS:
+        raise ValueError(f"At most {MAX_ROWS} rows fit in one model server request")
+    return _COUNT.pack(len(rows)) + b''.join(_encode_row(row) for row in rows)
+
+
+def decode_rows(payload):
+    (count,) = _COUNT.unpack_from(payload, 0)
+    offset = _COUNT.size
+    rows = []
+    for _ in range(count):
+        row = {}
+        for field in FIELDS:
+            (length,) = _LENGTH.unpack_from(payload, offset)
+            offset += _LENGTH.size
+            if length == _MISSING:
+                continue
+            row[field] = payload[offset:offset + length].decode('utf-8')
+            offset += length
+        rows.append(row)
+    return rows
+
+
+def encode_results(results):
+    """Pack risk percentages, or error messages for rows that failed"""
+    parts = [_COUNT.pack(len(results))]
+    for result in results:
+        if isinstance(result, Exception):
+            message = str(result).encode('utf-8')[:0xFFFE]
+            parts.append(struct.pack('>B', _ERROR))
+            parts.append(_LENGTH.pack(len(message)))
+            parts.append(message)
+        else:
+            parts.append(_RISK.pack(_OK, float(result)))
+    return b''.join(parts)
+
+
+def decode_results(payload):
+    (count,) = _COUNT.unpack_from(payload, 0)
+    offset = _COUNT.size
+    results = []
+    for _ in range(count):
+        status = payload[offset]
+        if status == _OK:
+            _, risk = _RISK.unpack_from(payload, offset)
+            offset += _RISK.size
+            results.append(risk)
+        else:
+            (length,) = _LENGTH.unpack_from(payload, offset + 1)
+            offset += 1 + _LENGTH.size
+            results.append(ValueError(payload[offset:offset + length].decode('utf-8')))
+            offset += length
+    return results
+
+
+def _read_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Model server connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_frame(sock):
+    (length,) = _FRAME.unpack(_read_exact(sock, _FRAME.size))
+    return _read_exact(sock, length)
+
+
+def write_frame(sock, payload):
+    sock.sendall(_FRAME.pack(len(payload)) + payload)
+
+
+class _PredictionHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        predictor = self.server.predictor
+        while True:
+            try:
+                payload = read_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            if payload == _VERSION_REQUEST:
+                version = getattr(predictor, 'model_version', None) or ''
+                write_frame(self.request, version.encode('utf-8'))
+                continue
+            try:
+                rows = decode_rows(payload)
+            except (struct.error, UnicodeDecodeError) as e:
+                # The frame cannot be answered row by row; drop this client, keep serving others
+                print(f"Model server: malformed request ({str(e)}), closing connection")
+                return
+
+            try:
+                if len(rows) == 1:
+                    # Single rows go through the micro-batcher so concurrent clients coalesce
+                    results = [predictor.predict_risk(rows[0])]
+                else:
+                    results = predictor.predict_risk_batch(rows)
+            except Exception as e:
+                error = e if isinstance(e, ValueError) else ValueError(f"Prediction error: {str(e)}")
+                results = [error] * len(rows)
+
+            write_frame(self.request, encode_results(results))
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Owns the one predictor and serves web workers over a Unix socket"""
+    daemon_threads = True
+
+    def __init__(self, socket_path, predictor):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.predictor = predictor
+        super().__init__(socket_path, _PredictionHandler)
+
+
+class ModelServerClient:
+    """Drop-in for StrokePredictor.predict_risk that calls a ModelServer"""
+    cache = None
+
+    def __init__(self, socket_path, timeout=30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._model_version = None
+
+    @classmethod
+    def from_env(cls):
+        """Build a client when PREDICTION_SERVER_SOCKET is set, else return None"""
+        socket_path = os.getenv('PREDICTION_SERVER_SOCKET')
+        return cls(socket_path) if socket_path else None
+
+    @property
+    def model_version(self):
+        """model_version of the server's predictor, as reported when the last connection opened"""
+        if self._model_version is None:
+            try:
+                self._connection()
+            except (ConnectionError, OSError):
+                pass
+        return self._model_version
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork
+        sock = getattr(self._local, 'sock', None)
+        if sock is None or self._local.pid != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            try:
+                # Ask every new connection, so a restarted server with a new model is noticed
+                write_frame(sock, _VERSION_REQUEST)
+                self._model_version = read_frame(sock).decode('utf-8') or None
+            except (ConnectionError, OSError):
+                sock.close()
+                raise
+            self._local.sock = sock
+            self._local.pid = os.getpid()
+        return sock
+
+    def _drop_connection(self):
+        if getattr(self._local, 'sock', None) is not None:
+            self._local.sock.close()
+        self._local.sock = None
+
+    def _call(self, rows):
+        """Send one request; ModelNotReadyError if the server cannot be reached or does not answer"""
+        payload = encode_rows(rows)
+        for attempt in range(2):
+            written = False
+            try:
+                sock = self._connection()
+                write_frame(sock, payload)
+                written = True
+                return decode_results(read_frame(sock))
+            except (ConnectionError, OSError) as e:
+                self._drop_connection()
+                # Retry once on a fresh connection, but only if the server cannot be working
+                # on this request: resending a slow one would double the load on a busy server
+                if written or attempt or not isinstance(e, _RETRYABLE_ERRORS):
+                    print(f"Error calling the model server: {str(e)}")
+                    raise ModelNotReadyError("Prediction server is unavailable, please retry shortly") from e
+
+    def predict_risk(self, patient_data):
+        """Predict stroke risk for a patient"""
+        (result,) = self._call([patient_data])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def predict_risk_batch(self, rows):
+        """Predict stroke risk for many patients, MAX_ROWS per round trip.
+
+        Rows with a value too long for the wire format get a ValueError
+        result without being sent.
+        """
+        results = [None] * len(rows)
+        sendable = []
+        for i, row in enumerate(rows):
+            try:
+                _encode_row(row)
+            except ValueError as e:
+                results[i] = e
+            else:
+                sendable.append(i)
+        for start in range(0, len(sendable), MAX_ROWS):
+            chunk = sendable[start:start + MAX_ROWS]
+            for i, result in zip(chunk, self._call([rows[i] for i in chunk])):
+                results[i] = result
+        return results
@@ -0,0 +1,19 @@
+import unicodedata
+
+
+def normalize_name(name):
+    """Lowercase, accent-free, single-spaced form of a name used for prefix search"""
+    decomposed = unicodedata.normalize('NFKD', str(name or ''))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def search_terms(name):
+    """Index terms for a name: the full name, then the name from each later word on.
+
+    "Ayesha Noor Khan" -> ["ayesha noor khan", "noor khan", "khan"], so a
+    prefix query matches the start of the first, middle or last name.
+    """
+    words = normalize_name(name).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime
+from mongoengine.queryset.visitor import Q
+
+
+def encode_cursor(record_entry_date, patient_id):
+    """Opaque cursor pointing just after the given (date, patient_id) sort key"""
+    payload = json.dumps([record_entry_date.isoformat(), patient_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (record_entry_date, patient_id) sort key stored in ``cursor``"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        entry_date, patient_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(entry_date), str(patient_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+
+def after_cursor(record_entry_date, patient_id):
+    """Filter for records that sort after the cursor in newest-first order"""
+    return Q(record_entry_date__lt=record_entry_date) | Q(
+        record_entry_date=record_entry_date, patient_id__lt=patient_id
+    )
+
+
+def keyset_page(queryset, fields, limit, cursor=None, page=None):
+    """Read one newest-first page of raw dicts with only ``fields``.
+
+    With a ``cursor`` the page starts right after it, so every page costs the
+    same; ``page`` (1-based) falls back to skip/limit for older clients.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        queryset = queryset.filter(after_cursor(*decode_cursor(cursor)))
+
+    queryset = (
+        queryset.order_by('-record_entry_date', '-patient_id')
+        .only(*fields).exclude('id')
+        .as_pymongo()
+    )
+    if not cursor and page:
+        queryset = queryset.skip((page - 1) * limit)
+
+    # Read one extra row to learn whether another page exists
+    rows = list(queryset.limit(limit + 1))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]['record_entry_date'], rows[-1]['patient_id'])
@@ -0,0 +1,64 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when too many password hashes are already running or queued"""
+
+
+def hash_rounds(password_hash):
+    """bcrypt cost factor stored in a hash such as $2b$12$..., or None"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small thread pool with a cap on waiting calls.
+
+    bcrypt releases the GIL, so ``workers`` hashes (about one per core)
+    run in parallel while request threads wait for their result. At most
+    ``max_pending`` calls may be running or queued; beyond that run()
+    raises HashingBusyError at once, so a login burst gets a quick 503
+    instead of every worker thread stalling behind the queue.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls):
+        workers = int(os.getenv('BCRYPT_WORKERS', '0')) or None
+        max_pending = int(os.getenv('BCRYPT_MAX_PENDING', '0')) or None
+        return cls(workers=workers, max_pending=max_pending)
+
+    def _pool(self):
+        # Pool threads do not survive a fork, so each worker process starts its own
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def run(self, fn, *args):
+        """Call ``fn(*args)`` on the pool and return its result"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusyError('Too many sign-in attempts at once, please try again in a moment')
+        try:
+            return self._pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+
+password_hasher = PasswordHasher.from_env()
@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from mongoengine.connection import get_db
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from app.models.patient import Patient
+from app.utils.risk_levels import get_risk_level, risk_level_ranges
+
+# Monthly intake buckets, e.g. 2024-06
+MONTH_FORMAT = '%Y-%m'
+
+
+def _encode_key(key):
+    # Creator names like "Dr. Irfan" cannot be used as field paths as-is
+    return str(key).replace('%', '%25').replace('.', '%2E').replace('$', '%24')
+
+
+def _decode_key(key):
+    return key.replace('%2E', '.').replace('%24', '$').replace('%25', '%')
+
+
+class PatientCounts:
+    """Patient rollups kept in one document and updated with $inc on every
+    insert and delete, so /patient/count and /patient/stats are a single read.
+
+    Holds the total plus counts per creator, per risk level and per month of
+    record_entry_date. Increments can drift (e.g. writes that bypass the
+    app), so the rollups are rebuilt from the patients collection every
+    ``reconcile_interval`` seconds in a background thread, or on demand.
+    Until the first rebuild the counts are not trusted and read() returns None.
+
+    Every $inc also bumps ``seq``; a rebuild only replaces the document if
+    ``seq`` is unchanged since it started, so increments are never lost.
+    They can be applied twice, though: a patient saved before the rebuild's
+    aggregation whose $inc lands after the replace is counted by both, so
+    the counts can be over by the writes in flight during a rebuild until
+    the next one (/patient/count?exact=1 is always exact).
+    The periodic rebuild is guarded by a lease document, so one process
+    per interval runs it rather than every worker.
+    """
+    COLLECTION = 'patient_counts'
+    DOCUMENT_ID = 'patients'
+    LEASE_ID = 'reconcile_lease'
+    # How long a process that lost the lease waits before trying again
+    LEASE_RETRY_SECONDS = 60
+
+    def __init__(self, reconcile_interval=3600):
+        self.reconcile_interval = reconcile_interval
+        self._reconcile_lock = threading.Lock()
+        self._reconciled_at = None
+        self._next_attempt = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(reconcile_interval=float(os.getenv('PATIENT_COUNT_RECONCILE_SECONDS', '3600')))
+
+    def _collection(self):
+        return get_db()[self.COLLECTION]
+
+    @staticmethod
+    def _changes(patients, sign):
+        changes = {}
+        for patient in patients:
+            for field in ('total',
+                          f'by_creator.{_encode_key(patient.created_by)}',
+                          f'by_risk_level.{get_risk_level(patient.stroke_risk)}',
+                          f'by_month.{patient.record_entry_date.strftime(MONTH_FORMAT)}'):
+                changes[field] = changes.get(field, 0) + sign
+        return changes
+
+    def _apply(self, changes):
+        if not changes:
+            return
+        try:
+            self._collection().update_one({'_id': self.DOCUMENT_ID}, {'$inc': dict(changes, seq=1)}, upsert=True)
+        except PyMongoError as e:
+            # Counts are reconciled later; never fail the write that triggered them
+            print(f"Error updating patient counts: {str(e)}")
+
+    def record_inserted(self, patients):
+        """Count newly saved Patient documents"""
+        self._apply(self._changes(patients, 1))
+
+    def record_deleted(self, patients):
+        """Uncount deleted Patient documents"""
+        self._apply(self._changes(patients, -1))
+
+    def compute(self):
+        """Exact rollups from one aggregation pass over the patients collection"""
+        ranges = list(risk_level_ranges())
+        boundaries = [float('-inf')] + [upper for _, _, upper in ranges[:-1]] + [float('inf')]
+        # $bucket labels each bucket with its lower boundary
+        level_for_bucket = {boundary: level for (level, _, _), boundary in zip(ranges, boundaries)}
+
+        (facets,) = Patient._get_collection().aggregate([{'$facet': {
+            'total': [{'$count': 'count'}],
+            'by_creator': [{'$group': {'_id': '$created_by', 'count': {'$sum': 1}}}],
+            'by_risk_level': [{'$bucket': {
+                'groupBy': '$stroke_risk', 'boundaries': boundaries,
+                'default': None, 'output': {'count': {'$sum': 1}}
+            }}],
+            'by_month': [{'$group': {
+                '_id': {'$dateToString': {'format': MONTH_FORMAT, 'date': '$record_entry_date'}},
+                'count': {'$sum': 1}
+            }}]
+        }}])
+
+        by_risk_level = {level: 0 for level, _, _ in ranges}
+        for row in facets['by_risk_level']:
+            if row['_id'] in level_for_bucket:
+                by_risk_level[level_for_bucket[row['_id']]] = row['count']
+        return {
+            'total': facets['total'][0]['count'] if facets['total'] else 0,
+            'by_creator': {
+                _encode_key(row['_id']): row['count'] for row in facets['by_creator'] if row['_id'] is not None
+            },
+            'by_risk_level': by_risk_level,
+            'by_month': {row['_id']: row['count'] for row in facets['by_month'] if row['_id'] is not None}
+        }
+
+    def reconcile(self, attempts=3):
+        """Replace the stored counts with exact ones; returns them, or None if
+        increments kept landing while the aggregation ran"""
+        collection = self._collection()
+        for _ in range(attempts):
+            doc = collection.find_one({'_id': self.DOCUMENT_ID}, {'seq': 1})
+            seq = doc.get('seq') if doc else None
+            counts = self.compute()
+            counts['seq'] = seq or 0
+            counts['reconciled_at'] = datetime.now()
+            # An $inc during compute() may be for a patient the aggregation did not see;
+            # replacing would lose it, so only replace when seq has not moved
+            try:
+                if doc is None:
+                    collection.insert_one(dict(counts, _id=self.DOCUMENT_ID))
+                elif not collection.replace_one({'_id': self.DOCUMENT_ID, 'seq': seq}, counts).matched_count:
+                    continue
+            except DuplicateKeyError:
+                continue  # the first $inc created the document meanwhile
+            self._reconciled_at = time.time()
+            return counts
+        print(f"Patient counts changed during {attempts} reconcile attempts; keeping the incremental counts")
+        return None
+
+    def read(self, breakdown=False):
+        """Return {'count', 'reconciled_at'[, 'by_creator', 'by_risk_level', 'by_month']}, or None
+        when the counts have never been reconciled"""
+        doc = self._collection().find_one({'_id': self.DOCUMENT_ID})
+        if not doc or 'reconciled_at' not in doc:
+            return None
+        self._reconciled_at = doc['reconciled_at'].timestamp()
+
+        counts = {
+            'count': doc.get('total', 0),
+            'source': 'counter',
+            'reconciled_at': doc['reconciled_at'].isoformat()
+        }
+        if breakdown:
+            counts['by_creator'] = {
+                _decode_key(key): value for key, value in doc.get('by_creator', {}).items() if value
+            }
+            counts['by_risk_level'] = {
+                level: doc.get('by_risk_level', {}).get(level, 0) for level, _, _ in risk_level_ranges()
+            }
+            counts['by_month'] = {
+                month: value for month, value in sorted(doc.get('by_month', {}).items()) if value
+            }
+        return counts
+
+    def maybe_reconcile(self):
+        """Start a background reconcile when the counts are missing or older than the interval"""
+        if self._reconciled_at is not None and time.time() - self._reconciled_at < self.reconcile_interval:
+            return None
+        if time.time() < self._next_attempt:
+            return None  # another process holds the lease
+        if not self._reconcile_lock.acquire(blocking=False):
+            return None  # already running in this process
+        thread = threading.Thread(target=self._reconcile_in_background, daemon=True)
+        thread.start()
+        return thread
+
+    def _claim_lease(self):
+        """Take the periodic reconcile for this interval; False if another process already has it"""
+        now = datetime.now()
+        try:
+            self._collection().update_one(
+                {'_id': self.LEASE_ID, 'expires_at': {'$lte': now}},
+                {'$set': {'expires_at': now + timedelta(seconds=self.reconcile_interval), 'owner': os.getpid()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def _release_lease(self):
+        self._collection().delete_one({'_id': self.LEASE_ID, 'owner': os.getpid()})
+
+    def _reconcile_in_background(self):
+        try:
+            if not self._claim_lease():
+                self._next_attempt = time.time() + min(self.LEASE_RETRY_SECONDS, self.reconcile_interval)
+                return
+            if self.reconcile() is None:
+                self._release_lease()  # let the next request try again
+        except Exception as e:
+            print(f"Error reconciling patient counts: {str(e)}")
+            try:
+                self._release_lease()
+            except PyMongoError:
+                pass
+        finally:
+            self._reconcile_lock.release()
+
+
+patient_counts = PatientCounts.from_env()
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+from app.models.patient import Patient
+from app.utils.risk_levels import risk_level_ranges
+
+# Columns in an export, in CSV order
+EXPORT_FIELDS = [
+    'patient_id', 'name', 'age', 'gender', 'ever_married', 'work_type', 'residence_type',
+    'heart_disease', 'hypertension', 'avg_glucose_level', 'bmi', 'smoking_status',
+    'stroke_risk', 'model_version', 'record_entry_date', 'created_by', 'updated_at', 'updated_by'
+]
+
+# Documents fetched from the server per cursor batch, and rows per yielded chunk
+EXPORT_BATCH_SIZE = 1000
+ROWS_PER_CHUNK = 500
+
+
+def parse_date(value, end=False):
+    """ISO date or datetime; a bare ``end`` date includes that whole day"""
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def export_filters(args):
+    """Queryset filters from the request arguments; raises ValueError on bad input"""
+    filters = {}
+    if args.get('start'):
+        filters['record_entry_date__gte'] = parse_date(args['start'])
+    if args.get('end'):
+        filters['record_entry_date__lt'] = parse_date(args['end'], end=True)
+
+    if args.get('risk_level'):
+        ranges = {level: (lower, upper) for level, lower, upper in risk_level_ranges()}
+        if args['risk_level'] not in ranges:
+            raise ValueError(f"Unknown risk level: {args['risk_level']}")
+        lower, upper = ranges[args['risk_level']]
+        if lower is not None:
+            filters['stroke_risk__gte'] = lower
+        if upper is not None:
+            filters['stroke_risk__lt'] = upper
+    if args.get('min_risk'):
+        filters['stroke_risk__gte'] = max(float(args['min_risk']), filters.get('stroke_risk__gte', 0))
+    if args.get('max_risk'):
+        filters['stroke_risk__lte'] = float(args['max_risk'])
+    return filters
+
+
+def export_rows(filters, batch_size=EXPORT_BATCH_SIZE):
+    """Raw patient dicts matching ``filters``, read lazily ``batch_size`` at a time"""
+    # order_by() drops the default sort so the server streams without sorting the whole match
+    return (
+        Patient.objects(**filters).order_by()
+        .only(*EXPORT_FIELDS).exclude('id')
+        .as_pymongo()
+        .batch_size(batch_size)
+    )
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows, rows_per_chunk=ROWS_PER_CHUNK):
+    """Yield CSV text: a header line, then ``rows_per_chunk`` rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+
+    for chunk in _chunks(rows, rows_per_chunk):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_format_value(row.get(field)) for field in EXPORT_FIELDS] for row in chunk)
+        yield buffer.getvalue()
+
+
+def iter_ndjson(rows, rows_per_chunk=ROWS_PER_CHUNK):
+    """Yield one JSON object per line, ``rows_per_chunk`` lines at a time"""
+    for chunk in _chunks(rows, rows_per_chunk):
+        yield ''.join(
+            json.dumps({field: _format_value(row.get(field)) for field in EXPORT_FIELDS}) + '\n'
+            for row in chunk
+        )
+
+
+def gzip_stream(chunks, level=6):
+    """Compress a stream of text chunks into gzip bytes as they arrive"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
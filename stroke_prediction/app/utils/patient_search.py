@@ -0,0 +1,56 @@
+from pymongo import UpdateOne
+from app.models.patient import Patient
+from app.utils.name_search import normalize_name, search_terms
+
+# Fields returned for each typeahead match
+TYPEAHEAD_FIELDS = ['patient_id', 'name', 'age', 'gender', 'stroke_risk']
+
+
+def typeahead(query, limit=10, max_time_ms=200):
+    """Up to ``limit`` patients whose patient_id or name starts with ``query``.
+
+    Digits (optionally prefixed with the "SW" shown in the UI) match
+    patient_id prefixes on the unique patient_id index; anything else matches
+    a normalized first, middle or last name prefix on the name_search index.
+    Results come back in index order, so no sort stage is needed, and the
+    server gives up after ``max_time_ms`` (pymongo raises ExecutionTimeout).
+    """
+    text = query.strip()
+    if text[:2].upper() == 'SW' and text[2:].isdigit():
+        text = text[2:]
+
+    if text.isdigit():
+        queryset = Patient.objects(patient_id__startswith=text)
+    else:
+        text = normalize_name(text)
+        if not text:
+            return []
+        queryset = Patient.objects(name_search__startswith=text)
+
+    # order_by() drops the default newest-first sort, which would read every match
+    return list(
+        queryset.order_by()
+        .only(*TYPEAHEAD_FIELDS).exclude('id')
+        .as_pymongo()
+        .limit(limit)
+        .max_time_ms(max_time_ms)
+    )
+
+
+def backfill_name_search(batch_size=1000):
+    """Set name_search on patients saved before it existed; returns the number updated"""
+    collection = Patient._get_collection()
+    cursor = collection.find({'name_search': {'$exists': False}}, {'name': 1}).batch_size(batch_size)
+
+    updated, operations = 0, []
+    for document in cursor:
+        operations.append(UpdateOne(
+            {'_id': document['_id']},
+            {'$set': {'name_search': search_terms(document.get('name'))}}
+        ))
+        if len(operations) >= batch_size:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += collection.bulk_write(operations, ordered=False).modified_count
+    return updated
@@ -1,25 +1,45 @@
-from keras.models import load_model # type: ignore
 import numpy as np
-import pandas as pd
+import hashlib
 import pickle
 import os
+import time
 from pathlib import Path
+from app.utils.inference import load_backend, lite_path, variant_path
+from app.utils.prediction_cache import PredictionCache
 
 class StrokePredictor:
-    def __init__(self):
+    def __init__(self, backend=None, variant=None):
         base_path = Path(os.path.dirname(__file__))
         models_path = base_path.parent / 'static' / 'models'
         
-        # Load the model
-        self.model = load_model(models_path / 'stroke_prediction_model_Best.keras')
+        model_path = models_path / 'stroke_prediction_model_Best.keras'
+        preprocessors_path = models_path / 'preprocessors.pkl'
+        
+        # Load the model through the selected inference backend and weight precision
+        backend = backend or os.getenv('PREDICTION_BACKEND', 'auto')
+        self.variant = variant or os.getenv('PREDICTION_MODEL_VARIANT', 'float32')
+        self.backend = load_backend(backend, model_path, self.variant)
         
         # Load preprocessors
-        with open(models_path / 'preprocessors.pkl', 'rb') as f:
+        with open(preprocessors_path, 'rb') as f:
             preprocessors = pickle.load(f)
             self.scaler = preprocessors['scaler']
             self.label_encoders = preprocessors['label_encoders']
             self.imputer = preprocessors['imputer']
         
+        # Identify the model artifact so cached results never outlive it
+        artifacts = [model_path, preprocessors_path]
+        if self.variant != 'float32':
+            artifacts.append(variant_path(model_path, self.variant))
+        if self.backend.name == 'lite':
+            artifacts.append(lite_path(model_path))
+        self.model_version = self._artifact_version(*artifacts)
+        
+        # Optional cross-process cache of model outputs (PREDICTION_CACHE_PATH)
+        self.cache = PredictionCache.from_env(
+            f"{self.model_version}:{self.backend.name}:{self.variant}"
+        )
+        
         # Define expected columns and their order
         self.EXPECTED_COLUMNS = [
             'gender', 'age', 'hypertension', 'heart_disease', 'ever_married',
@@ -32,61 +52,128 @@ class StrokePredictor:
         
         # Define numerical columns
         self.NUMERICAL_COLUMNS = ['age', 'avg_glucose_level', 'bmi']
+        
+        # Precompute lookup tables so requests skip pandas/sklearn entirely
+        self._compile_preprocessors()
+
+    @staticmethod
+    def _artifact_version(*paths):
+        """Short content hash of the model and preprocessor files"""
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    def _compile_preprocessors(self):
+        """Turn the fitted sklearn preprocessors into plain lookup tables"""
+        # Category -> code dictionaries, same codes LabelEncoder assigns
+        self._category_codes = {
+            col: {category: code for code, category in enumerate(encoder.classes_)}
+            for col, encoder in self.label_encoders.items()
+        }
+        
+        # Imputer medians and scaler parameters for the numerical columns
+        self._impute_values = np.asarray(self.imputer.statistics_, dtype=np.float64)
+        self._scale_mean = np.asarray(self.scaler.mean_, dtype=np.float64)
+        self._scale_std = np.asarray(self.scaler.scale_, dtype=np.float64)
+        
+        # Fixed positions in EXPECTED_COLUMNS
+        self._column_index = {col: i for i, col in enumerate(self.EXPECTED_COLUMNS)}
+        self._numerical_index = [self._column_index[col] for col in self.NUMERICAL_COLUMNS]
+        self._one_hot_index = {}
+        for prefix in ('work_type', 'smoking_status'):
+            for col, i in self._column_index.items():
+                if col.startswith(f'{prefix}_'):
+                    self._one_hot_index[(prefix, col[len(prefix) + 1:])] = i
+
+    def _encode_category(self, col, value):
+        try:
+            return self._category_codes[col][value]
+        except KeyError:
+            raise ValueError(f"y contains previously unseen labels: '{value}'")
 
     def _preprocess_data(self, data):
-        """Preprocess patient data for prediction"""
+        """Preprocess patient data into a (1, n_features) float32 array"""
         try:
-            # Create DataFrame with one row
-            df = pd.DataFrame([{
-                'gender': data['gender'],
-                'age': float(data['age']),
-                'hypertension': int(data['hypertension']),
-                'heart_disease': int(data['heart_disease']),
-                'ever_married': data['ever_married'],
-                'Residence_type': data['residence_type'].title(),
-                'avg_glucose_level': float(data['avg_glucose_level']),
-                'bmi': float(data['bmi']),
-                'work_type': data['work_type'],
-                'smoking_status': data['smoking_status']
-            }])
+            index = self._column_index
+            row = np.zeros((1, len(self.EXPECTED_COLUMNS)), dtype=np.float32)
             
             # Handle 'Other' gender
-            df.loc[df['gender'] == 'Other', 'gender'] = 'Female'
+            gender = data['gender']
+            if gender == 'Other':
+                gender = 'Female'
             
             # Encode categorical variables
-            for col in ['gender', 'ever_married', 'Residence_type']:
-                df[col] = self.label_encoders[col].transform(df[col])
+            row[0, index['gender']] = self._encode_category('gender', gender)
+            row[0, index['hypertension']] = int(data['hypertension'])
+            row[0, index['heart_disease']] = int(data['heart_disease'])
+            row[0, index['ever_married']] = self._encode_category('ever_married', data['ever_married'])
+            row[0, index['Residence_type']] = self._encode_category(
+                'Residence_type', data['residence_type'].title()
+            )
             
-            # Create a separate DataFrame for numerical features
-            numerical_df = df[self.NUMERICAL_COLUMNS].copy()
+            # Impute missing values and scale numerical features
+            numerical = np.array([
+                float(data['age']),
+                float(data['avg_glucose_level']),
+                float(data['bmi'])
+            ])
+            numerical = np.where(np.isnan(numerical), self._impute_values, numerical)
+            row[0, self._numerical_index] = (numerical - self._scale_mean) / self._scale_std
             
-            # Handle missing values in numerical columns
-            numerical_df = pd.DataFrame(
-                self.imputer.transform(numerical_df),
-                columns=self.NUMERICAL_COLUMNS
-            )
+            # One-hot encode work_type and smoking_status (unknown values stay all zero)
+            for prefix in ('work_type', 'smoking_status'):
+                i = self._one_hot_index.get((prefix, data[prefix]))
+                if i is not None:
+                    row[0, i] = 1
             
-            # Scale numerical features
-            numerical_df = pd.DataFrame(
-                self.scaler.transform(numerical_df),
-                columns=self.NUMERICAL_COLUMNS
-            )
+            return row
             
-            # Update original DataFrame with scaled values
-            df[self.NUMERICAL_COLUMNS] = numerical_df
+        except Exception as e:
+            print(f"Preprocessing error details: {str(e)}")  # For debugging
+            raise ValueError(f"Error preprocessing data: {str(e)}")
+
+    def _preprocess_batch(self, rows):
+        """Preprocess many patients into an (n, n_features) float32 array in one pass"""
+        try:
+            index = self._column_index
+            matrix = np.zeros((len(rows), len(self.EXPECTED_COLUMNS)), dtype=np.float32)
             
-            # One-hot encode work_type and smoking_status
-            df = pd.get_dummies(df, columns=['work_type', 'smoking_status'])
+            # Encode categorical variables ('Other' gender is treated as 'Female')
+            matrix[:, index['gender']] = [
+                self._encode_category('gender', 'Female' if row['gender'] == 'Other' else row['gender'])
+                for row in rows
+            ]
+            matrix[:, index['hypertension']] = [int(row['hypertension']) for row in rows]
+            matrix[:, index['heart_disease']] = [int(row['heart_disease']) for row in rows]
+            matrix[:, index['ever_married']] = [
+                self._encode_category('ever_married', row['ever_married']) for row in rows
+            ]
+            matrix[:, index['Residence_type']] = [
+                self._encode_category('Residence_type', row['residence_type'].title()) for row in rows
+            ]
             
-            # Add missing columns if any
-            for col in self.EXPECTED_COLUMNS:
-                if col not in df.columns:
-                    df[col] = 0
+            # Impute missing values and scale numerical features
+            numerical = np.array([
+                [float(row['age']), float(row['avg_glucose_level']), float(row['bmi'])]
+                for row in rows
+            ], dtype=np.float64).reshape(len(rows), len(self.NUMERICAL_COLUMNS))
+            numerical = np.where(np.isnan(numerical), self._impute_values, numerical)
+            matrix[:, self._numerical_index] = (numerical - self._scale_mean) / self._scale_std
             
-            # Ensure columns are in correct order
-            df = df[self.EXPECTED_COLUMNS]
+            # One-hot encode work_type and smoking_status (unknown values stay all zero)
+            for prefix in ('work_type', 'smoking_status'):
+                hits = [
+                    (i, self._one_hot_index.get((prefix, row[prefix])))
+                    for i, row in enumerate(rows)
+                ]
+                hits = [(i, col) for i, col in hits if col is not None]
+                if hits:
+                    row_index, col_index = zip(*hits)
+                    matrix[list(row_index), list(col_index)] = 1
             
-            return df
+            return matrix
             
         except Exception as e:
             print(f"Preprocessing error details: {str(e)}")  # For debugging
@@ -139,25 +226,94 @@ class StrokePredictor:
             processed_data = self._preprocess_data(patient_data)
             
             # Get prediction
-            prediction = self.model.predict(processed_data)[0][0]
-            
-            # Convert to percentage and round appropriately
-            risk_percentage = prediction * 100
-            
-            # Round based on value ranges
-            if risk_percentage > 90:
-                return 90.0  # Cap at 90% for very high risk
-            elif risk_percentage < 0.01:
-                return round(risk_percentage, 4)
-            elif risk_percentage < 0.1:
-                return round(risk_percentage, 3)
-            elif risk_percentage < 1:
-                return round(risk_percentage, 2)
-            elif risk_percentage < 10:
-                return round(risk_percentage, 1)
-            else:
-                return round(risk_percentage, 1)
+            prediction = self._predict_probabilities(processed_data)[0]
+            
+            return self._to_risk_percentage(prediction)
             
         except Exception as e:
             print(f"Prediction error details: {str(e)}")  # For debugging
-            raise ValueError(f"Prediction error: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Prediction error: {str(e)}")
+
+    def predict_risk_batch(self, rows):
+        """Predict stroke risk for many patients with a single model call.
+
+        Returns a list aligned with ``rows`` holding either the risk
+        percentage or the ValueError raised for that row, so one bad row
+        never fails the whole batch.
+        """
+        results = [None] * len(rows)
+        valid = []
+        
+        # Validate each row, collecting per-row errors
+        for i, row in enumerate(rows):
+            try:
+                self.validate_input(row)
+                valid.append(i)
+            except Exception as e:
+                results[i] = ValueError(f"Prediction error: {str(e)}")
+        
+        if not valid:
+            return results
+        
+        # Preprocess all valid rows in one pass; if a row has an unknown
+        # category, fall back to row-by-row so only that row fails
+        try:
+            processed_data = self._preprocess_batch([rows[i] for i in valid])
+        except ValueError:
+            processed = []
+            for i in list(valid):
+                try:
+                    processed.append(self._preprocess_data(rows[i]))
+                except ValueError as e:
+                    results[i] = ValueError(f"Prediction error: {str(e)}")
+                    valid.remove(i)
+            if not valid:
+                return results
+            processed_data = np.concatenate(processed)
+        
+        # Score every valid row at once
+        predictions = self._predict_probabilities(processed_data)
+        for i, prediction in zip(valid, predictions):
+            results[i] = self._to_risk_percentage(prediction)
+        
+        return results
+
+    def _predict_probabilities(self, processed_data):
+        """Run the backend, serving rows from the prediction cache when possible"""
+        if self.cache is None:
+            return self.backend.predict(processed_data)
+        
+        cached = self.cache.get_many(processed_data)
+        missing = [i for i, probability in enumerate(cached) if probability is None]
+        probabilities = np.array(
+            [0.0 if probability is None else probability for probability in cached],
+            dtype=np.float32
+        )
+        
+        if missing:
+            started = time.perf_counter()
+            computed = self.backend.predict(processed_data[missing])
+            self.cache.record_compute(time.perf_counter() - started, len(missing))
+            self.cache.put_many(processed_data[missing], computed)
+            probabilities[missing] = computed
+        
+        return probabilities
+
+    @staticmethod
+    def _to_risk_percentage(prediction):
+        """Convert a model probability to a rounded risk percentage"""
+        risk_percentage = prediction * 100
+        
+        # Round based on value ranges
+        if risk_percentage > 90:
+            return 90.0  # Cap at 90% for very high risk
+        elif risk_percentage < 0.01:
+            return round(risk_percentage, 4)
+        elif risk_percentage < 0.1:
+            return round(risk_percentage, 3)
+        elif risk_percentage < 1:
+            return round(risk_percentage, 2)
+        elif risk_percentage < 10:
+            return round(risk_percentage, 1)
+        else:
+            return round(risk_percentage, 1)
\ No newline at end of file
@@ -0,0 +1,191 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+
+class PredictionCache:
+    """SQLite-backed cache of model probabilities shared by all worker processes.
+
+    Entries are keyed on the model version and a hash of the preprocessed
+    float32 feature vector, so equivalent inputs (``'75'`` and ``'75.0'``)
+    share an entry and a new model artifact never reads stale results.
+    Workers running different backends or variants can share one file
+    without touching each other's entries. Size is bounded with LRU
+    eviction and entries expire after ``ttl_seconds``; entries of versions
+    no longer in use are never read again, so they age out the same way.
+    """
+
+    PRUNE_EVERY = 256  # inserts between eviction passes
+    QUERY_CHUNK = 500  # keys per SELECT
+
+    def __init__(self, path, model_version, max_entries=100000, ttl_seconds=7 * 24 * 3600):
+        self.path = str(path)
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inserts_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+        self._lookup_seconds = 0.0
+        self._lookups = 0
+        self._compute_seconds = 0.0
+        self._computed_rows = 0
+
+        self._setup()
+
+    @classmethod
+    def from_env(cls, model_version):
+        """Build the cache when PREDICTION_CACHE_PATH is set, else return None"""
+        path = os.getenv('PREDICTION_CACHE_PATH')
+        if not path:
+            return None
+        return cls(
+            path,
+            model_version,
+            max_entries=int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', '100000')),
+            ttl_seconds=float(os.getenv('PREDICTION_CACHE_TTL', str(7 * 24 * 3600)))
+        )
+
+    def _connect(self):
+        # sqlite3 connections are per thread, and must not be reused after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _setup(self):
+        conn = self._connect()
+        # Files from before the (model_version, key) primary key are only a cache: start over
+        primary_key = [row[1] for row in conn.execute('PRAGMA table_info(predictions)') if row[5]]
+        if primary_key == ['key']:
+            conn.execute('DROP TABLE predictions')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS predictions (
+                model_version TEXT NOT NULL,
+                key BLOB NOT NULL,
+                probability REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model_version, key)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_predictions_last_used ON predictions (last_used)')
+
+    def _keys(self, features):
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        return [
+            hashlib.blake2b(row.tobytes(), digest_size=16, person=b'stroke-features').digest()
+            for row in features
+        ]
+
+    def get_many(self, features):
+        """Return cached probabilities aligned with ``features`` (None for misses)"""
+        started = time.perf_counter()
+        keys = self._keys(features)
+        found = {}
+        try:
+            conn = self._connect()
+            now = time.time()
+            # Chunk the IN list to stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), self.QUERY_CHUNK):
+                chunk = keys[start:start + self.QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT key, probability FROM predictions '
+                    f'WHERE model_version = ? AND created_at >= ? AND key IN ({placeholders})',
+                    [self.model_version, now - self.ttl_seconds, *chunk]
+                ).fetchall()
+                found.update(rows)
+            if found:
+                conn.executemany(
+                    'UPDATE predictions SET last_used = ? WHERE model_version = ? AND key = ?',
+                    [(now, self.model_version, key) for key in found]
+                )
+        except sqlite3.Error as e:
+            print(f"Prediction cache read error: {str(e)}")
+
+        results = [found.get(key) for key in keys]
+        with self._lock:
+            hits = sum(result is not None for result in results)
+            self.hits += hits
+            self.misses += len(results) - hits
+            self._lookup_seconds += time.perf_counter() - started
+            self._lookups += len(results)
+        return results
+
+    def put_many(self, features, probabilities):
+        """Store model probabilities for ``features``"""
+        now = time.time()
+        entries = [
+            (key, self.model_version, float(probability), now, now)
+            for key, probability in zip(self._keys(features), probabilities)
+        ]
+        try:
+            conn = self._connect()
+            conn.executemany(
+                'INSERT OR REPLACE INTO predictions '
+                '(key, model_version, probability, created_at, last_used) VALUES (?, ?, ?, ?, ?)',
+                entries
+            )
+            with self._lock:
+                self._inserts_since_prune += len(entries)
+                prune = self._inserts_since_prune >= self.PRUNE_EVERY
+                if prune:
+                    self._inserts_since_prune = 0
+            if prune:
+                self.prune()
+        except sqlite3.Error as e:
+            print(f"Prediction cache write error: {str(e)}")
+
+    def prune(self):
+        """Expire old entries, then evict least recently used beyond max_entries (across all versions)"""
+        conn = self._connect()
+        conn.execute('DELETE FROM predictions WHERE created_at < ?', (time.time() - self.ttl_seconds,))
+        (count,) = conn.execute('SELECT COUNT(*) FROM predictions').fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                'DELETE FROM predictions WHERE rowid IN '
+                '(SELECT rowid FROM predictions ORDER BY last_used LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+    def record_compute(self, seconds, rows):
+        """Record how long the model took for cache misses, to estimate savings"""
+        with self._lock:
+            self._compute_seconds += seconds
+            self._computed_rows += rows
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            compute_ms = 1000 * self._compute_seconds / self._computed_rows if self._computed_rows else 0.0
+            lookup_ms = 1000 * self._lookup_seconds / self._lookups if self._lookups else 0.0
+            stats = {
+                'model_version': self.model_version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'avg_model_ms_per_row': compute_ms,
+                'avg_lookup_ms_per_row': lookup_ms,
+                # Negative when a lookup costs more than running the model
+                'estimated_saved_ms': (compute_ms - lookup_ms) * self.hits
+            }
+        try:
+            conn = self._connect()
+            (stats['entries'],) = conn.execute(
+                'SELECT COUNT(*) FROM predictions WHERE model_version = ?', (self.model_version,)
+            ).fetchone()
+            (stats['entries_all_versions'],) = conn.execute('SELECT COUNT(*) FROM predictions').fetchone()
+        except sqlite3.Error:
+            stats['entries'] = stats['entries_all_versions'] = None
+        return stats
@@ -0,0 +1,166 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from mongoengine.connection import get_db
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.models.patient import Patient
+from app.utils.field_mappings import map_yes_no_to_binary, unmap_smoking_status, unmap_work_type
+
+# Stored fields the model inputs are rebuilt from
+SCORING_FIELDS = [
+    'patient_id', 'age', 'gender', 'ever_married', 'work_type', 'residence_type',
+    'heart_disease', 'hypertension', 'avg_glucose_level', 'bmi', 'smoking_status'
+]
+
+CHECKPOINT_COLLECTION = 'rescore_checkpoints'
+
+
+def prediction_input(document):
+    """Rebuild the form/model-vocabulary input StrokePredictor expects from a stored patient"""
+    return {
+        'gender': document.get('gender'),
+        'age': str(document.get('age')),
+        'hypertension': map_yes_no_to_binary(document.get('hypertension')),
+        'heart_disease': map_yes_no_to_binary(document.get('heart_disease')),
+        'ever_married': document.get('ever_married'),
+        'residence_type': document.get('residence_type'),
+        'avg_glucose_level': str(document.get('avg_glucose_level')),
+        'bmi': str(document.get('bmi')),
+        'work_type': unmap_work_type(document.get('work_type')),
+        'smoking_status': unmap_smoking_status(document.get('smoking_status'))
+    }
+
+
+class RescoringJob:
+    """Re-score every patient whose stroke_risk came from another model version.
+
+    Patients are read in patient_id order, ``chunk_size`` at a time, scored
+    with one predict_risk_batch call per chunk and written back with an
+    unordered bulk_write of $set updates. A background thread writes chunk N
+    while chunk N+1 is being read and scored. After each write the last
+    patient_id is saved in the ``rescore_checkpoints`` collection under the
+    model version, so an interrupted run resumes where it stopped; once a
+    run finishes, the next one starts a new pass from the first patient.
+    """
+
+    def __init__(self, predictor, model_version=None, chunk_size=1000, force=False):
+        self.predictor = predictor
+        self.model_version = model_version or predictor.model_version
+        self.chunk_size = chunk_size
+        self.force = force  # also re-score patients already at model_version
+
+    def _checkpoints(self):
+        return get_db()[CHECKPOINT_COLLECTION]
+
+    def checkpoint(self):
+        """The saved progress for this model version, or None"""
+        return self._checkpoints().find_one({'_id': self.model_version})
+
+    def reset(self):
+        """Forget saved progress so the next run starts from the first patient"""
+        self._checkpoints().delete_one({'_id': self.model_version})
+
+    def _read_chunk(self, collection, after):
+        query = {}
+        if after is not None:
+            query['patient_id'] = {'$gt': after}
+        if not self.force:
+            query['model_version'] = {'$ne': self.model_version}
+        projection = dict.fromkeys(SCORING_FIELDS, 1)
+        return list(collection.find(query, projection).sort('patient_id', 1).limit(self.chunk_size))
+
+    def _score(self, documents):
+        """Return ($set updates, number of rows the model rejected)"""
+        risks = self.predictor.predict_risk_batch([prediction_input(document) for document in documents])
+        updates, failed = [], 0
+        for document, risk in zip(documents, risks):
+            if isinstance(risk, Exception):
+                print(f"Error re-scoring patient {document.get('patient_id')}: {str(risk)}")
+                failed += 1
+                continue
+            updates.append(UpdateOne(
+                {'_id': document['_id']},
+                {'$set': {'stroke_risk': float(risk), 'model_version': self.model_version}}
+            ))
+        return updates, failed
+
+    def _write(self, collection, updates, last_patient_id, rejected):
+        """Apply one chunk of updates, then record the checkpoint; returns (written, failed, seconds)"""
+        started = time.perf_counter()
+        written, failed = len(updates), 0
+        if updates:
+            try:
+                collection.bulk_write(updates, ordered=False)
+            except BulkWriteError as e:
+                failed = len(e.details.get('writeErrors', []))
+                written -= failed
+        seconds = time.perf_counter() - started
+
+        self._checkpoints().update_one(
+            {'_id': self.model_version},
+            {
+                '$set': {'last_patient_id': last_patient_id, 'updated_at': datetime.now()},
+                '$inc': {'rescored': written, 'failed': failed + rejected},
+                '$setOnInsert': {'started_at': datetime.now()}
+            },
+            upsert=True
+        )
+        return written, failed, seconds
+
+    def run(self, limit=None):
+        """Re-score until no patients are left (or ``limit`` rows were read); returns per-stage stats"""
+        collection = Patient._get_collection()
+        checkpoint = self.checkpoint()
+        if checkpoint and checkpoint.get('finished_at'):
+            # The last pass completed; patients changed since then are picked up from the start
+            self.reset()
+            checkpoint = None
+        after = checkpoint.get('last_patient_id') if checkpoint else None
+
+        stats = {'read': [0, 0.0], 'score': [0, 0.0], 'write': [0, 0.0], 'failed': 0, 'resumed_after': after}
+        started = time.perf_counter()
+
+        finished = False
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = None
+
+            def finish_write():
+                written, failed, seconds = pending.result()
+                stats['write'][0] += written
+                stats['write'][1] += seconds
+                stats['failed'] += failed
+
+            while limit is None or stats['read'][0] < limit:
+                read_started = time.perf_counter()
+                documents = self._read_chunk(collection, after)
+                stats['read'][1] += time.perf_counter() - read_started
+                if not documents:
+                    finished = True
+                    break
+                stats['read'][0] += len(documents)
+                after = documents[-1]['patient_id']
+
+                score_started = time.perf_counter()
+                updates, rejected = self._score(documents)
+                stats['score'][0] += len(documents) - rejected
+                stats['score'][1] += time.perf_counter() - score_started
+                stats['failed'] += rejected
+
+                # Writes happen one chunk at a time, so checkpoints are saved in order
+                if pending is not None:
+                    finish_write()
+                pending = writer.submit(self._write, collection, updates, after, rejected)
+
+            if pending is not None:
+                finish_write()
+
+        if finished:
+            self._checkpoints().update_one(
+                {'_id': self.model_version},
+                {'$set': {'finished_at': datetime.now()}, '$unset': {'last_patient_id': ''}},
+                upsert=True
+            )
+        stats['finished'] = finished
+        stats['total'] = [stats['write'][0], time.perf_counter() - started]
+        return stats
@@ -0,0 +1,23 @@
+# Risk level names with the upper bound (exclusive) of their stroke_risk percentage
+RISK_LEVELS = [
+    ('Low', 20),
+    ('Moderate', 40),
+    ('High', 60),
+    ('Very High', 80),
+    ('Critical', None)
+]
+
+
+def get_risk_level(risk_percentage):
+    """Get risk level based on percentage"""
+    for level, upper in RISK_LEVELS:
+        if upper is None or risk_percentage < upper:
+            return level
+
+
+def risk_level_ranges():
+    """Yield (level, lower, upper) stroke_risk bounds; None means unbounded"""
+    lower = None
+    for level, upper in RISK_LEVELS:
+        yield level, lower, upper
+        lower = upper
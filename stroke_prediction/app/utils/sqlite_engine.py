@@ -0,0 +1,63 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Connect-time pragmas for many worker processes sharing one SQLite file:
+# WAL lets readers run alongside the single writer, NORMAL only syncs at
+# checkpoints (safe with WAL), and busy_timeout waits for the write lock
+# instead of failing with "database is locked"
+TUNED_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,            # ms
+    'mmap_size': 64 * 1024 * 1024,   # bytes
+    'cache_size': -16000,            # negative means KiB, so about 16 MB
+}
+
+
+def sqlite_pragmas_from_env():
+    """Pragmas for SQLITE_PROFILE=tuned (the default), or None for =default.
+
+    Each pragma can be overridden with SQLITE_<NAME>, e.g. SQLITE_BUSY_TIMEOUT=10000.
+    """
+    profile = os.getenv('SQLITE_PROFILE', 'tuned').lower()
+    if profile == 'default':
+        return None
+    if profile != 'tuned':
+        raise ValueError(f"Unknown SQLITE_PROFILE: {profile} (expected tuned or default)")
+    return {name: os.getenv(f'SQLITE_{name.upper()}', value) for name, value in TUNED_PRAGMAS.items()}
+
+
+def is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def sqlite_engine_options(uri, pragmas):
+    """SQLALCHEMY_ENGINE_OPTIONS for a file database under threaded workers"""
+    if not uri or not pragmas or not is_sqlite_file(uri):
+        return {}
+    return {
+        # Connections are handed between request threads by the pool
+        'connect_args': {'check_same_thread': False},
+        'pool_size': int(os.getenv('SQLITE_POOL_SIZE', '8')),
+        'max_overflow': int(os.getenv('SQLITE_POOL_OVERFLOW', '8')),
+        # Waiting for a connection longer than busy_timeout means the
+        # database itself is the bottleneck; fail instead of queueing
+        'pool_timeout': max(float(pragmas['busy_timeout']) / 1000, 1.0),
+    }
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run ``pragmas`` on every new connection of a SQLite ``engine``"""
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
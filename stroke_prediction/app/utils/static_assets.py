@@ -0,0 +1,66 @@
+import hashlib
+import os
+import threading
+from flask import request
+
+FAR_FUTURE_SECONDS = 365 * 24 * 3600
+
+
+class StaticAssets:
+    """Content-hashed static URLs with far-future caching.
+
+    ``url_for('static', filename=...)`` gains ``?v=<hash of the file>``, so
+    every change to a CSS or JS file produces a new URL. Requests whose
+    ``v`` matches the current file are served with a one-year immutable
+    Cache-Control; browsers then load assets from cache without even a
+    revalidation request until the file changes.
+    """
+
+    def __init__(self):
+        self._hashes = {}  # path -> (mtime_ns, size, digest)
+        self._lock = threading.Lock()
+        self.static_folder = None
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        app.url_defaults(self.add_version)
+        app.after_request(self.cache_headers)
+
+    def file_hash(self, filename):
+        """Short content hash of a file under the static folder, or None if it does not exist"""
+        path = os.path.join(self.static_folder, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        entry = self._hashes.get(path)
+        if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+            return entry[2]
+
+        digest = hashlib.sha1(usedforsecurity=False)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(65536), b''):
+                digest.update(block)
+        version = digest.hexdigest()[:12]
+        with self._lock:
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, version)
+        return version
+
+    def add_version(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            version = self.file_hash(values['filename'])
+            if version:
+                values['v'] = version
+
+    def cache_headers(self, response):
+        version = request.args.get('v')
+        if (request.endpoint == 'static' and version and response.status_code in (200, 304)
+                and version == self.file_hash(request.view_args['filename'])):
+            response.cache_control.public = True
+            response.cache_control.no_cache = None
+            response.cache_control.max_age = FAR_FUTURE_SECONDS
+            response.cache_control.immutable = True
+        return response
+
+
+static_assets = StaticAssets()
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+
+
+class UserSnapshot(UserMixin):
+    """Read-only copy of the User fields a request needs, detached from any
+    SQLAlchemy session. Views that change the user must load the User row."""
+    FIELDS = ('id', 'name', 'email', 'role')
+
+    def __init__(self, user):
+        for field in self.FIELDS:
+            object.__setattr__(self, field, getattr(user, field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('UserSnapshot is read-only; load the User to change it')
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.id} {self.email}>"
+
+
+class UserCache:
+    """Per-process cache of UserSnapshots for the Flask-Login user loader.
+
+    Entries expire after ``ttl_seconds`` and the least recently used one is
+    dropped once ``max_size`` users are cached. Invalidation only reaches
+    this process, so the TTL bounds how long other workers may serve an old
+    name or role.
+    """
+
+    def __init__(self, ttl_seconds=30, max_size=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()  # user_id -> (expires_at, snapshot)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache unless USER_CACHE_TTL is 0, else return None"""
+        ttl = float(os.getenv('USER_CACHE_TTL', '30'))
+        if ttl <= 0:
+            return None
+        return cls(ttl_seconds=ttl, max_size=int(os.getenv('USER_CACHE_SIZE', '1024')))
+
+    def get(self, user_id, load):
+        """Cached snapshot of ``user_id``; calls ``load(user_id)`` for the User on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        user = load(user_id)
+        if user is None:
+            return None  # not cached, so a re-created account is seen at once
+        snapshot = UserSnapshot(user)
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+user_cache = UserCache.from_env()
+
+
+def invalidate_user(user_id):
+    """Drop ``user_id`` from this process's cache after its row changed"""
+    if user_cache is not None:
+        user_cache.invalidate(user_id)
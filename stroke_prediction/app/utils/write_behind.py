@@ -0,0 +1,197 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import numpy as np
+
+
+class WriteBehindQueue:
+    """Bounded in-process queue of validated Patient documents written in bulk
+    by a background flusher.
+
+    ``writer`` takes a list of documents and returns {index: error message}
+    for the ones that failed (see bulk_insert_patients). Documents the bulk
+    write rejects are retried once one at a time with ``save_one`` (which
+    raises on failure); the ones that still fail are printed and kept in
+    stats()['recent_failures'] for /patient/metrics. submit() waits at
+    most ``put_timeout`` seconds for room and returns False when the queue
+    stays full, so the caller can save synchronously instead; that slows
+    producers down to the speed of the database rather than growing memory.
+    Pending documents are flushed when the process exits.
+    """
+
+    def __init__(self, writer, max_size=10000, batch_size=500, put_timeout=0.05, sample_size=2048,
+                 save_one=None, failure_history=100):
+        self.writer = writer
+        self.save_one = save_one
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._pending = {}  # patient_id -> document, until it is written
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._worker = None
+        self._worker_pid = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.recent_failures = deque(maxlen=failure_history)  # patients that were never written
+        self.flush_latencies = deque(maxlen=sample_size)  # seconds per bulk write
+        self.queue_delays = deque(maxlen=sample_size)     # seconds from submit to write
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, writer, save_one=None):
+        """Build the queue when PATIENT_WRITE_BEHIND is enabled, else return None"""
+        if os.getenv('PATIENT_WRITE_BEHIND', '').lower() not in ('1', 'true', 'yes'):
+            return None
+        return cls(
+            writer,
+            max_size=int(os.getenv('PATIENT_WRITE_QUEUE_SIZE', '10000')),
+            batch_size=int(os.getenv('PATIENT_WRITE_BATCH_SIZE', '500')),
+            save_one=save_one
+        )
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so restart the flusher in each process
+        if self._worker is not None and self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker is None or self._worker_pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_size)
+                self._pending = {}
+                self._stopping.clear()
+                self._worker = threading.Thread(target=self._run, name='patient-writer', daemon=True)
+                self._worker_pid = os.getpid()
+                self._worker.start()
+
+    def submit(self, patient):
+        """Queue a validated Patient for writing; False if the queue is full"""
+        if self._stopping.is_set():
+            return False
+        self._ensure_worker()
+        with self._lock:
+            self._pending[patient.patient_id] = patient
+        try:
+            self._queue.put((patient, time.monotonic()), timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(patient.patient_id, None)
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def find_pending(self, patient_id):
+        """The queued Patient with ``patient_id`` that is not written yet, or None"""
+        with self._lock:
+            return self._pending.get(patient_id)
+
+    def _collect_batch(self, timeout):
+        """Block for the first document, then take whatever else is already waiting"""
+        batch = [self._queue.get(timeout=timeout)]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        patients = [patient for patient, _ in batch]
+        started = time.monotonic()
+        try:
+            failed = self.writer(patients)
+        except Exception as e:
+            failed = {i: str(e) for i in range(len(patients))}
+        failed = self._retry(patients, failed)
+        finished = time.monotonic()
+
+        for i, message in failed.items():
+            print(f"Error saving queued patient {patients[i].patient_id}, patient was NOT saved: {message}")
+
+        with self._lock:
+            self.recent_failures.extend(
+                {'patient_id': patients[i].patient_id, 'error': message, 'at': datetime.now().isoformat()}
+                for i, message in failed.items()
+            )
+            for patient in patients:
+                self._pending.pop(patient.patient_id, None)
+            self.flushes += 1
+            self.written += len(patients) - len(failed)
+            self.failed += len(failed)
+            self.flush_latencies.append(finished - started)
+            self.queue_delays.extend(started - enqueued_at for _, enqueued_at in batch)
+
+    def _retry(self, patients, failed):
+        """Save the documents the bulk write rejected one by one; returns the ones that still failed"""
+        if self.save_one is None:
+            return failed
+        still_failed = {}
+        for i, message in failed.items():
+            try:
+                self.save_one(patients[i])
+            except Exception as e:
+                still_failed[i] = f"{message}; retry: {str(e)}"
+        return still_failed
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                batch = self._collect_batch(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._flush(batch)
+
+    def close(self, timeout=10.0):
+        """Stop accepting documents and write everything still queued"""
+        self._stopping.set()
+        worker = self._worker
+        if worker is None or self._worker_pid != os.getpid():
+            return
+        worker.join(timeout)
+
+        # Anything submitted while the flusher was exiting
+        remaining = []
+        while True:
+            try:
+                remaining.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if remaining:
+            self._flush(remaining)
+
+    def stats(self):
+        with self._lock:
+            flush_ms = np.array(self.flush_latencies) * 1000
+            delay_ms = np.array(self.queue_delays) * 1000
+            return {
+                'depth': self._queue.qsize(),
+                'capacity': self.max_size,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'failed': self.failed,
+                'recent_failures': list(self.recent_failures),
+                'rejected_when_full': self.rejected,
+                'flushes': self.flushes,
+                'mean_flush_size': (self.written + self.failed) / self.flushes if self.flushes else 0.0,
+                'flush_latency_ms': {
+                    'p50': float(np.percentile(flush_ms, 50)) if flush_ms.size else 0.0,
+                    'p95': float(np.percentile(flush_ms, 95)) if flush_ms.size else 0.0,
+                    'max': float(flush_ms.max()) if flush_ms.size else 0.0,
+                },
+                'queue_delay_ms': {
+                    'p50': float(np.percentile(delay_ms, 50)) if delay_ms.size else 0.0,
+                    'p95': float(np.percentile(delay_ms, 95)) if delay_ms.size else 0.0,
+                    'max': float(delay_ms.max()) if delay_ms.size else 0.0,
+                }
+            }
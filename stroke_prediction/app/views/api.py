@@ -0,0 +1,109 @@
+# views/api.py
+from datetime import datetime
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import create_access_token, get_jwt, jwt_required
+from app import bcrypt, jwt
+from app.models.patient import Patient
+from app.models.user import User
+from app.utils.decorators import conditional_response
+from app.utils.model_loader import ModelNotReadyError
+from app.utils.password_hashing import HashingBusyError, password_hasher
+from app.utils.patient_export import EXPORT_FIELDS
+from app.views import process_patient
+
+# Token-authenticated JSON API for integration clients. Requests carry
+# "Authorization: Bearer <token>"; the token's claims hold the user's name
+# and role, so no session, CSRF token or user lookup is needed per call.
+api = Blueprint('api', __name__)
+api.register_error_handler(ModelNotReadyError, process_patient.handle_model_not_ready)
+
+
+def _error(message, status):
+    return jsonify({'success': False, 'message': message}), status
+
+@jwt.unauthorized_loader
+def missing_token(reason):
+    return _error(f'Missing access token: {reason}', 401)
+
+@jwt.invalid_token_loader
+def invalid_token(reason):
+    return _error(f'Invalid access token: {reason}', 401)
+
+@jwt.expired_token_loader
+def expired_token(jwt_header, jwt_payload):
+    return _error('Access token has expired; request a new one from /api/v1/token', 401)
+
+
+@api.route('/token', methods=['POST'])
+def issue_token():
+    data = request.get_json(silent=True) or {}
+    email, password = data.get('email'), data.get('password')
+    if not email or not password:
+        return _error('Send a JSON object with email and password', 400)
+
+    user = User.query.filter_by(email=email).first()
+    try:
+        valid = user is not None and password_hasher.run(bcrypt.check_password_hash, user.password, password)
+    except HashingBusyError as e:
+        return jsonify({'success': False, 'message': str(e)}), 503, {'Retry-After': '1'}
+    if not valid:
+        return _error('Invalid email or password', 401)
+
+    token = create_access_token(
+        identity=str(user.id),
+        additional_claims={'name': user.name, 'role': user.role}
+    )
+    return jsonify({
+        'success': True,
+        'access_token': token,
+        'token_type': 'Bearer',
+        'expires_in': int(current_app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds())
+    }), 200
+
+
+@api.route('/predict', methods=['POST'])
+@jwt_required()
+def predict():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return _error('JSON body must be a patient object', 400)
+    # Coerce values to the strings a form post would carry
+    data = {key: None if value is None else str(value).strip() for key, value in data.items()}
+    return process_patient.predict_and_save(data, get_jwt()['name'])
+
+
+@api.route('/predict_batch', methods=['POST'])
+@jwt_required()
+def predict_batch():
+    return process_patient.predict_and_save_batch(get_jwt()['name'])
+
+
+@api.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    patient_id = request.args.get('patient_id')
+    if not patient_id:
+        return _error('patient_id is required', 400)
+
+    patient = Patient.objects(patient_id=patient_id).only(*EXPORT_FIELDS).exclude('id').as_pymongo().first()
+    if patient is None and process_patient.write_queue is not None:
+        pending = process_patient.write_queue.find_pending(patient_id)
+        if pending is not None:
+            patient = {field: pending[field] for field in EXPORT_FIELDS}
+    if patient is None:
+        return _error('Patient not found', 404)
+
+    return jsonify({
+        'success': True,
+        'patient': {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in patient.items()
+        }
+    }), 200
+
+
+@api.route('/list', methods=['GET'])
+@jwt_required()
+@conditional_response
+def list_patients():
+    return process_patient.list_page()
@@ -6,6 +6,7 @@ from wtforms import StringField, PasswordField, SelectField
 from wtforms.validators import DataRequired, Email, Length
 from app import db, bcrypt
 from app.models.user import User
+from app.utils.password_hashing import HashingBusyError, password_hasher
 
 auth = Blueprint('auth', __name__)
 
@@ -48,7 +49,11 @@ def register():
             email=form.email.data,
             role=form.role.data
         )
-        new_user.set_password(form.password.data)
+        try:
+            new_user.password = password_hasher.run(User.hash_password, form.password.data)
+        except HashingBusyError as e:
+            flash(str(e), 'warning')
+            return render_template('auth/register.html', form=form), 503, {'Retry-After': '1'}
 
         try:
             db.session.add(new_user)
@@ -71,7 +76,23 @@ def login():
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
         
-        if user and user.check_password(form.password.data):
+        # bcrypt runs on the bounded hashing pool; when it is saturated, fail fast
+        try:
+            valid = user is not None and password_hasher.run(
+                bcrypt.check_password_hash, user.password, form.password.data
+            )
+        except HashingBusyError as e:
+            flash(str(e), 'warning')
+            return render_template('auth/login.html', form=form), 503, {'Retry-After': '1'}
+
+        if valid:
+            if user.needs_rehash():
+                # BCRYPT_ROUNDS changed since this hash was made; upgrade it while we have the password
+                try:
+                    user.password = password_hasher.run(User.hash_password, form.password.data)
+                    db.session.commit()
+                except HashingBusyError:
+                    pass  # try again on the next login
             login_user(user, remember=True)
             next_page = request.args.get('next')
             flash('Login successful!', 'success')
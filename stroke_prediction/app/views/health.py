@@ -0,0 +1,11 @@
+# views/health.py
+from flask import Blueprint, jsonify
+from app.views.process_patient import predictor_loader
+
+health = Blueprint('health', __name__)
+
+@health.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the prediction model is loaded, 503 until then"""
+    status = predictor_loader.status()
+    return jsonify(status), 200 if status['ready'] else 503
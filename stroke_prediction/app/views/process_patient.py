@@ -1,55 +1,145 @@
 #views/process_patient.py
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, Response, render_template, redirect, url_for, flash, request, jsonify, stream_with_context
 from app.forms.patient_form import PatientForm
 from app.models.patient import Patient
 from app.utils.prediction import StrokePredictor
+from app.utils.batching import MicroBatcher
+from app.utils.decorators import conditional_response
+from app.utils.field_mappings import map_binary_to_yes_no, map_smoking_status, map_work_type
+from app.utils.model_loader import PredictorLoader, ModelNotReadyError
+from app.utils.model_server import ModelServerClient
 from app.utils.id_generator import IDGenerator
+from app.utils.pagination import keyset_page
+from app.utils.patient_counts import patient_counts
+from app.utils.patient_export import export_filters, export_rows, gzip_stream, iter_csv, iter_ndjson
+from app.utils.patient_search import typeahead
+from app.utils.risk_levels import get_risk_level
+from app.utils.write_behind import WriteBehindQueue
 from datetime import datetime
 from flask_login import current_user, login_required
+from pymongo.errors import BulkWriteError, ExecutionTimeout
 import traceback
 import numpy as np
 import json
+import csv
+import io
+import os
 
 patient_bp = Blueprint('patient', __name__)
-stroke_predictor = StrokePredictor()
-
-def map_binary_to_yes_no(value):
-    """Convert '0'/'1' to 'No'/'Yes'"""
-    return 'Yes' if value == '1' else 'No'
-
-def map_smoking_status(status):
-    """Map form smoking status to MongoDB expected format"""
-    mapping = {
-        'formerly smoked': 'Formerly Smoked',
-        'never smoked': 'Never Smoked',
-        'smokes': 'Smokes',
-        'Unknown': 'Unknown'
-    }
-    return mapping.get(status, status)
-
-def map_work_type(work):
-    """Map form work type to MongoDB expected format"""
-    mapping = {
-        'Private': 'Private',
-        'Self-employed': 'Self-Employed',
-        'Govt_job': 'Govt Job',
-        'children': 'Children',
-        'Never_worked': 'Never Worked'
-    }
-    return mapping.get(work, work)
-
-def get_risk_level(risk_percentage):
-    """Get risk level based on percentage"""
-    if risk_percentage < 20:
-        return "Low"
-    elif risk_percentage < 40:
-        return "Moderate"
-    elif risk_percentage < 60:
-        return "High"
-    elif risk_percentage < 80:
-        return "Very High"
+def build_predictor():
+    """Talk to the shared model server when PREDICTION_SERVER_SOCKET is set,
+    otherwise load the model in this process. Concurrent single predictions
+    are coalesced when PREDICTION_BATCH_WINDOW_MS is set."""
+    return ModelServerClient.from_env() or MicroBatcher.from_env(StrokePredictor())
+
+# The predictor is loaded in the background (started by create_app) so the app
+# can serve other routes immediately
+predictor_loader = PredictorLoader(build_predictor)
+
+# Fields predict_risk reads from the submitted form
+PREDICTION_FIELDS = [
+    'age', 'gender', 'hypertension', 'heart_disease', 'ever_married',
+    'work_type', 'residence_type', 'avg_glucose_level', 'bmi', 'smoking_status'
+]
+
+# Upper bound on rows accepted by /patient/predict_batch
+MAX_BATCH_SIZE = 1000
+# Well-formed stand-in that lets batch rows validate before their real IDs are allocated
+UNASSIGNED_PATIENT_ID = '000000000'
+
+# Fields returned by /patient/list, and its default and maximum page sizes
+LIST_FIELDS = ['patient_id', 'name', 'age', 'gender', 'stroke_risk', 'record_entry_date']
+LIST_PAGE_SIZE = 10
+MAX_LIST_PAGE_SIZE = 100
+
+# Typeahead result count (default and cap) and server-side time budget
+TYPEAHEAD_LIMIT = 10
+MAX_TYPEAHEAD_LIMIT = 25
+TYPEAHEAD_MAX_TIME_MS = int(os.getenv('PATIENT_TYPEAHEAD_MAX_TIME_MS', '200'))
+
+def get_predictor():
+    """Return the loaded predictor, waiting at most PREDICTION_READY_TIMEOUT seconds"""
+    return predictor_loader.get(timeout=float(os.getenv('PREDICTION_READY_TIMEOUT', '10')))
+
+@patient_bp.errorhandler(ModelNotReadyError)
+def handle_model_not_ready(e):
+    return jsonify({
+        'success': False,
+        'message': str(e)
+    }), 503, {'Retry-After': '5'}
+
+def build_patient(data, patient_id, risk_percentage, model_version=None, created_by=None):
+    """Build a Patient document from submitted form fields"""
+    return Patient(
+        patient_id=patient_id,
+        name=data['name'],
+        age=int(data['age']),
+        gender=data['gender'],
+        ever_married=data['ever_married'],
+        work_type=map_work_type(data['work_type']),
+        residence_type=data['residence_type'],
+        heart_disease=map_binary_to_yes_no(data['heart_disease']),
+        hypertension=map_binary_to_yes_no(data['hypertension']),
+        avg_glucose_level=float(data['avg_glucose_level']),
+        bmi=float(data['bmi']),
+        smoking_status=map_smoking_status(data['smoking_status']),
+        stroke_risk=risk_percentage,
+        model_version=model_version,
+        record_entry_date=datetime.now(),
+        created_by=created_by or current_user.name
+    )
+
+def read_batch_rows():
+    """Read patient rows from a JSON array body or an uploaded CSV file"""
+    if request.is_json:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError('JSON body must be an array of patient objects')
+    elif 'file' in request.files:
+        stream = io.TextIOWrapper(request.files['file'].stream, encoding='utf-8-sig')
+        rows = list(csv.DictReader(stream))
     else:
-        return "Critical"
+        raise ValueError('Send a JSON array of patients or upload a CSV file as "file"')
+    
+    # Coerce values to the strings request.form would carry
+    return [{
+        key: None if value is None else str(value).strip()
+        for key, value in row.items() if key is not None
+    } for row in rows]
+
+def bulk_insert_patients(patients):
+    """Insert patients with one unordered insert_many.
+
+    Returns a dict of {index: error message} for documents that failed,
+    so the remaining rows are still written.
+    """
+    if not patients:
+        return {}
+    try:
+        Patient._get_collection().insert_many(
+            [patient.to_mongo() for patient in patients], ordered=False
+        )
+    except BulkWriteError as e:
+        return {
+            error['index']: error.get('errmsg', 'Write error')
+            for error in e.details.get('writeErrors', [])
+        }
+    return {}
+
+def save_patients(patients):
+    """Bulk insert patients and count the ones that were written"""
+    failed = bulk_insert_patients(patients)
+    patient_counts.record_inserted([patient for i, patient in enumerate(patients) if i not in failed])
+    return failed
+
+def save_patient(patient):
+    """Save one patient with save() and count it; raises if the write fails"""
+    patient.save()
+    patient_counts.record_inserted([patient])
+
+# Optional write-behind mode (PATIENT_WRITE_BEHIND): /patient/predict returns once the
+# patient is validated and queued, and a background flusher writes queued patients in bulk
+write_queue = WriteBehindQueue.from_env(save_patients, save_one=save_patient)
 
 # Custom JSON encoder to handle numpy types
 class NumpyEncoder(json.JSONEncoder):
@@ -73,20 +163,20 @@ def add_patient():
 @patient_bp.route('/predict', methods=['POST'])
 @login_required
 def predict_risk():
+    return predict_and_save(request.form, current_user.name)
+
+def predict_and_save(data, created_by):
+    """Score one patient and save (or queue) it; shared by the session and token APIs"""
+    stroke_predictor = get_predictor()
     try:
         # Prepare patient data for prediction
-        prediction_data = {
-            'age': request.form['age'],
-            'gender': request.form['gender'],
-            'hypertension': request.form['hypertension'],
-            'heart_disease': request.form['heart_disease'],
-            'ever_married': request.form['ever_married'],
-            'work_type': request.form['work_type'],
-            'residence_type': request.form['residence_type'],
-            'avg_glucose_level': request.form['avg_glucose_level'],
-            'bmi': request.form['bmi'],
-            'smoking_status': request.form['smoking_status']
-        }
+        missing = [field for field in PREDICTION_FIELDS + ['name'] if field not in data]
+        if missing:
+            return jsonify({
+                'success': False,
+                'message': f'Missing required field: {missing[0]}'
+            }), 400
+        prediction_data = {field: data[field] for field in PREDICTION_FIELDS}
         
         # Get prediction
         try:
@@ -100,25 +190,17 @@ def predict_risk():
         
         # Prepare data for MongoDB
         try:
-            new_patient = Patient(
-                patient_id=IDGenerator.generate_patient_id(),
-                name=request.form['name'],
-                age=int(request.form['age']),
-                gender=request.form['gender'],
-                ever_married=request.form['ever_married'],
-                work_type=map_work_type(request.form['work_type']),
-                residence_type=request.form['residence_type'],
-                heart_disease=map_binary_to_yes_no(request.form['heart_disease']),
-                hypertension=map_binary_to_yes_no(request.form['hypertension']),
-                avg_glucose_level=float(request.form['avg_glucose_level']),
-                bmi=float(request.form['bmi']),
-                smoking_status=map_smoking_status(request.form['smoking_status']),
-                stroke_risk=risk_percentage,
-                record_entry_date=datetime.now(),
-                created_by=current_user.name
+            new_patient = build_patient(
+                data, IDGenerator.generate_patient_id(), risk_percentage,
+                getattr(stroke_predictor, 'model_version', None), created_by
             )
             
-            new_patient.save()
+            # Queue the write when write-behind is on; save now if it is off or the queue is full
+            new_patient.validate()
+            queued = write_queue is not None and write_queue.submit(new_patient)
+            if not queued:
+                new_patient.save()
+                patient_counts.record_inserted([new_patient])
             
             # Use the custom JSON encoder for the response
             response = {
@@ -127,7 +209,8 @@ def predict_risk():
                 'name': new_patient.name,
                 'risk': risk_percentage,
                 'risk_level': risk_level,
-                'message': 'Patient data saved successfully'
+                'queued': queued,
+                'message': 'Patient data queued for saving' if queued else 'Patient data saved successfully'
             }
             
             return json.dumps(response, cls=NumpyEncoder), 200, {'Content-Type': 'application/json'}
@@ -140,6 +223,8 @@ def predict_risk():
                 'message': f'Error saving patient data: {str(e)}'
             }), 500
             
+    except ModelNotReadyError:
+        raise  # answered with 503 by handle_model_not_ready
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         print(traceback.format_exc())
@@ -152,6 +237,92 @@ def predict_risk():
     # show list of patients
     
 
+@patient_bp.route('/predict_batch', methods=['POST'])
+@login_required
+def predict_batch():
+    return predict_and_save_batch(current_user.name)
+
+def predict_and_save_batch(created_by):
+    """Score and bulk insert the rows in the request body; shared by the session and token APIs"""
+    stroke_predictor = get_predictor()
+    try:
+        try:
+            rows = read_batch_rows()
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        if not rows:
+            return jsonify({'success': False, 'message': 'No patient rows provided'}), 400
+        if len(rows) > MAX_BATCH_SIZE:
+            return jsonify({
+                'success': False,
+                'message': f'Batch too large: at most {MAX_BATCH_SIZE} rows per request'
+            }), 413
+        
+        # Score every row with one model call; bad rows come back as errors
+        risks = stroke_predictor.predict_risk_batch(rows)
+        results = [{'row': i} for i in range(len(rows))]
+        
+        # Build and validate documents row by row; IDs are allocated afterwards,
+        # so rows that fail validation do not use up the day's sequence
+        documents = []
+        for i, risk in enumerate(risks):
+            if isinstance(risk, Exception):
+                results[i].update(success=False, message=str(risk))
+                continue
+            try:
+                patient = build_patient(
+                    rows[i], UNASSIGNED_PATIENT_ID, float(risk),
+                    getattr(stroke_predictor, 'model_version', None), created_by
+                )
+                patient.validate()
+            except KeyError as e:
+                results[i].update(success=False, message=f'Missing required field: {e.args[0]}')
+                continue
+            except Exception as e:
+                results[i].update(success=False, message=f'Invalid patient data: {str(e)}')
+                continue
+            documents.append((i, patient))
+        
+        # Number the valid rows in row order
+        patient_ids = IDGenerator.generate_patient_ids(len(documents))
+        for (_, patient), patient_id in zip(documents, patient_ids):
+            patient.patient_id = patient_id
+        
+        # Persist all valid rows with a single bulk insert
+        failed = save_patients([patient for _, patient in documents])
+        for j, (i, patient) in enumerate(documents):
+            if j in failed:
+                results[i].update(success=False, message=f'Error saving patient data: {failed[j]}')
+                continue
+            results[i].update(
+                success=True,
+                patient_id=patient.patient_id,
+                name=patient.name,
+                risk=patient.stroke_risk,
+                risk_level=get_risk_level(patient.stroke_risk)
+            )
+        
+        saved = sum(1 for result in results if result['success'])
+        return jsonify({
+            'success': True,
+            'total': len(rows),
+            'saved': saved,
+            'failed': len(rows) - saved,
+            'results': results
+        }), 200
+        
+    except ModelNotReadyError:
+        raise  # answered with 503 by handle_model_not_ready
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'message': f'An unexpected error occurred: {str(e)}'
+        }), 500
+
+
 @patient_bp.route('/search', methods=['GET'])
 @login_required
 def search_patient():
@@ -162,6 +333,9 @@ def search_patient():
     
     if patient_id:
         patient = Patient.objects(patient_id=patient_id).first()
+        if not patient and write_queue is not None:
+            # Saved moments ago and still waiting in the write-behind queue
+            patient = write_queue.find_pending(patient_id)
         
         if patient:
             return render_template('patient/patient_details.html', patient=patient)
@@ -172,6 +346,34 @@ def search_patient():
             
     return redirect(url_for('home'))
 
+@patient_bp.route('/typeahead', methods=['GET'])
+@login_required
+def typeahead_patients():
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'success': True, 'matches': []}), 200
+    try:
+        limit = min(int(request.args.get('limit', TYPEAHEAD_LIMIT)), MAX_TYPEAHEAD_LIMIT)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid limit'}), 400
+
+    try:
+        matches = typeahead(query, limit=limit, max_time_ms=TYPEAHEAD_MAX_TIME_MS)
+        return jsonify({'success': True, 'matches': matches}), 200
+    except ExecutionTimeout:
+        return jsonify({
+            'success': False,
+            'message': 'Search took too long, type more characters'
+        }), 503
+    except Exception as e:
+        print(f"Error in typeahead search: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Error searching patients'
+        }), 500
+
 @patient_bp.route('/delete/<patient_id>', methods=['POST'])
 @login_required
 def delete_patient(patient_id):
@@ -192,6 +394,7 @@ def delete_patient(patient_id):
             }), 404
 
         patient.delete()
+        patient_counts.record_deleted([patient])
         
         return jsonify({
             'success': True,
@@ -210,25 +413,37 @@ def delete_patient(patient_id):
 @patient_bp.route('/list', methods=['GET'])
 @login_required
 #@role_required('admin')
+@conditional_response
 def list_patients():
+    return list_page()
+
+def list_page():
+    """One newest-first page of patients for the request's cursor/page/limit arguments"""
     try:
-        page = int(request.args.get('page', 1))
-        per_page = 10
-        skip = (page - 1) * per_page
+        try:
+            page = int(request.args.get('page', 1))
+            per_page = min(int(request.args.get('limit', LIST_PAGE_SIZE)), MAX_LIST_PAGE_SIZE)
+            if page < 1 or per_page < 1:
+                raise ValueError
+            # Keyset cursor from the previous response; page is the fallback for older clients
+            patients, next_cursor = keyset_page(
+                Patient.objects(), LIST_FIELDS, per_page,
+                cursor=request.args.get('cursor'), page=page
+            )
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid page, limit or cursor'
+            }), 400
 
-        # Get patients sorted by date, newest first
-        patients = Patient.objects().order_by('-record_entry_date').skip(skip).limit(per_page)
+        for p in patients:
+            p['record_entry_date'] = p['record_entry_date'].isoformat()
 
         return jsonify({
             'success': True,
-            'patients': [{
-                'patient_id': p.patient_id,
-                'name': p.name,
-                'age': p.age,
-                'gender': p.gender,
-                'stroke_risk': p.stroke_risk,
-                'record_entry_date': p.record_entry_date.isoformat()
-            } for p in patients]
+            'patients': patients,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         }), 200
 
     except Exception as e:
@@ -240,10 +455,119 @@ def list_patients():
     
 @patient_bp.route('/count', methods=['GET'])
 @login_required
+@conditional_response
 def patients_count():
     try:
-        count = Patient.objects.count()
-        return jsonify({'count': count})
+        if request.args.get('exact', '').lower() in ('1', 'true', 'yes'):
+            return jsonify({'count': Patient.objects.count(), 'source': 'exact'})
+
+        # Incrementally maintained counts; breakdown adds per-creator and per-risk-level counts
+        breakdown = request.args.get('breakdown', '').lower() in ('1', 'true', 'yes')
+        counts = patient_counts.read(breakdown=breakdown)
+        patient_counts.maybe_reconcile()
+        if counts is None:
+            # Not reconciled yet: answer from collection metadata instead of counting
+            counts = {
+                'count': Patient._get_collection().estimated_document_count(),
+                'source': 'estimate'
+            }
+        return jsonify(counts)
     except Exception as error:
         print('Error counting patients:', str(error))
-        return jsonify({'error': 'Failed to count patients'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Failed to count patients'}), 500
+
+
+@patient_bp.route('/stats', methods=['GET'])
+@login_required
+def patient_stats():
+    try:
+        if request.args.get('rebuild', '').lower() in ('1', 'true', 'yes'):
+            if current_user.role != 'admin':
+                return jsonify({
+                    'success': False,
+                    'message': 'Unauthorized: Only admins can rebuild statistics'
+                }), 403
+            patient_counts.reconcile()
+
+        # Dashboard rollups are one document read; the full aggregation only runs on rebuild
+        stats = patient_counts.read(breakdown=True)
+        patient_counts.maybe_reconcile()
+        if stats is None:
+            response = jsonify({
+                'success': False,
+                'message': 'Statistics are being built, try again shortly'
+            })
+            response.headers['Retry-After'] = '5'
+            return response, 503
+
+        return jsonify({
+            'success': True,
+            'total': stats['count'],
+            'by_risk_level': stats['by_risk_level'],
+            'by_creator': stats['by_creator'],
+            'by_month': stats['by_month'],
+            'updated_at': stats['reconciled_at']
+        }), 200
+    except Exception as e:
+        print(f"Error reading patient statistics: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Error reading patient statistics'
+        }), 500
+
+
+# Export formats: (row serializer, content type)
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson')
+}
+
+@patient_bp.route('/export', methods=['GET'])
+@login_required
+def export_patients():
+    if current_user.role != 'admin':
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized: Only admins can export records'
+        }), 403
+
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'success': False,
+            'message': 'Format must be csv or ndjson'
+        }), 400
+    try:
+        filters = export_filters(request.args)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid export filter: {str(e)}'
+        }), 400
+
+    serialize, content_type = EXPORT_FORMATS[export_format]
+    # Rows are read from the cursor and written out a chunk at a time, so
+    # memory does not depend on how many patients match
+    body = serialize(export_rows(filters))
+    headers = {
+        'Content-Disposition': f'attachment; filename=patients_{datetime.now():%Y%m%d}.{export_format}',
+        'Vary': 'Accept-Encoding'
+    }
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(body), mimetype=content_type, headers=headers)
+
+
+@patient_bp.route('/metrics', methods=['GET'])
+@login_required
+def prediction_metrics():
+    metrics = {'model': predictor_loader.status()}
+    predictor = predictor_loader.predictor
+    if isinstance(predictor, MicroBatcher):
+        metrics['batching'] = predictor.stats.snapshot()
+    if predictor is not None and predictor.cache is not None:
+        metrics['cache'] = predictor.cache.stats()
+    if write_queue is not None:
+        metrics['write_queue'] = write_queue.stats()
+    return jsonify(metrics)
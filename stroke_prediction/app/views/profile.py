@@ -2,6 +2,9 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import current_user, login_required
 from app import db
+from app.models.user import User
+from app.utils.password_hashing import HashingBusyError, password_hasher
+from app.utils.user_cache import invalidate_user
 
 profile = Blueprint('profile', __name__)
 
@@ -18,8 +21,11 @@ def update_name():
         flash('Name cannot be empty', 'danger')
         return redirect(url_for('profile.settings'))
     
-    current_user.name = new_name
+    # current_user is a cached read-only snapshot; change the stored row
+    user = db.session.get(User, current_user.id)
+    user.name = new_name
     db.session.commit()
+    invalidate_user(user.id)
     flash('Name updated successfully', 'success')
     return redirect(url_for('profile.settings'))
 
@@ -33,11 +39,18 @@ def update_password():
         flash('Both current and new passwords are required', 'danger')
         return redirect(url_for('profile.settings'))
     
-    if not current_user.check_password(current_password):
-        flash('Current password is incorrect', 'danger')
-        return redirect(url_for('profile.settings'))
+    user = db.session.get(User, current_user.id)
+    # Both bcrypt calls run on the bounded hashing pool, like login and register
+    try:
+        if not password_hasher.run(user.check_password, current_password):
+            flash('Current password is incorrect', 'danger')
+            return redirect(url_for('profile.settings'))
+        user.password = password_hasher.run(User.hash_password, new_password)
+    except HashingBusyError as e:
+        flash(str(e), 'warning')
+        return render_template('profile/settings.html'), 503, {'Retry-After': '1'}
     
-    current_user.set_password(new_password)
     db.session.commit()
+    invalidate_user(user.id)
     flash('Password updated successfully', 'success')
     return redirect(url_for('profile.settings'))
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""Compare the session routes with the token API for integration clients.
+
+Sends the same /predict and /list requests through the cookie-session
+routes (/patient/...) and the bearer-token API (/api/v1/...) with the
+Flask test client and mongomock, and reports requests per second and
+users-table queries per request. The session path is measured with the
+per-process user cache both off and on, and with CSRF checks disabled, so
+it is a best case for sessions. The patient collection is reset to the
+same seeded rows before every measurement. Run from the stroke_prediction directory:
+
+    python -m benchmarks.bench_api --requests 500
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from benchmarks.common import BENCH_EMAIL, BENCH_PASSWORD, SAMPLE_PATIENT, benchmark_app, latency_summary
+
+
+def build_app(sqlite_path):
+    from app.views.process_patient import get_predictor
+
+    app = benchmark_app(sqlite_path)
+    get_predictor()  # wait for the background model load
+    return app
+
+
+def session_client(app):
+    client = app.test_client()
+    client.post('/auth/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+    send = {
+        'predict': lambda: client.post('/patient/predict', data=dict(SAMPLE_PATIENT, name='Benchmark Patient')),
+        'list': lambda: client.get('/patient/list'),
+    }
+    return send
+
+
+def token_client(app):
+    client = app.test_client()
+    token = client.post('/api/v1/token', json={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}).get_json()
+    headers = {'Authorization': f"Bearer {token['access_token']}"}
+    send = {
+        'predict': lambda: client.post('/api/v1/predict', json=dict(SAMPLE_PATIENT, name='Benchmark Patient'),
+                                       headers=headers),
+        'list': lambda: client.get('/api/v1/list', headers=headers),
+    }
+    return send
+
+
+def reset_patients(seed):
+    """Start every measurement from the same ``seed`` stored patients"""
+    from app.models.patient import Patient
+    from app.views.process_patient import build_patient
+
+    Patient.objects.delete()
+    Patient.objects.insert([
+        build_patient(dict(SAMPLE_PATIENT, name=f'Seed Patient {n}'), 500000000 + n, 42.0, created_by='Benchmark User')
+        for n in range(seed)
+    ])
+
+
+def measure(app, send, requests, seed):
+    from sqlalchemy import event
+    from app import db
+
+    with app.app_context():
+        engine = db.engine
+    queries = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if 'users' in statement:
+            queries.append(statement)
+
+    results = {}
+    for name, request in send.items():
+        reset_patients(seed)
+        request()  # warm up
+        queries.clear()
+        event.listen(engine, 'before_cursor_execute', count)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(requests):
+            request_started = time.perf_counter()
+            response = request()
+            latencies.append(time.perf_counter() - request_started)
+            if response.status_code != 200:
+                raise RuntimeError(f"{name} returned {response.status_code}: {response.get_data(as_text=True)}")
+        elapsed = time.perf_counter() - started
+        event.remove(engine, 'before_cursor_execute', count)
+        results[name] = {
+            'requests_per_s': requests / elapsed,
+            'user_queries_per_request': len(queries) / requests,
+            'latency': latency_summary(latencies),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='requests per route and path')
+    parser.add_argument('--seed', type=int, default=200, help='patients stored before each measurement')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    import app.utils.user_cache as user_cache_module
+    from app.utils.user_cache import UserCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, 'users.db'))
+        results = {}
+        user_cache_module.user_cache = None
+        results['session'] = measure(app, session_client(app), args.requests, args.seed)
+        user_cache_module.user_cache = UserCache()
+        results['session+cache'] = measure(app, session_client(app), args.requests, args.seed)
+        results['token'] = measure(app, token_client(app), args.requests, args.seed)
+
+    print(f"{'path':<15}{'route':<9}{'req/s':>9}{'user q/req':>12}{'p50 ms':>9}{'p95 ms':>9}")
+    for path, routes in results.items():
+        for route, result in routes.items():
+            latency = result['latency']
+            print(
+                f"{path:<15}{route:<9}{result['requests_per_s']:>9.1f}{result['user_queries_per_request']:>12.2f}"
+                f"{latency['p50_ms']:>9.2f}{latency['p95_ms']:>9.2f}"
+            )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
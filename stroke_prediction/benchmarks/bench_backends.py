@@ -0,0 +1,75 @@
+"""Report startup time and per-prediction latency for each inference backend.
+
+Each backend is measured in a fresh interpreter, so startup includes its
+imports. Run from the stroke_prediction directory:
+
+    python -m benchmarks.bench_backends --requests 1000
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+_MEASURE = '''
+import json, sys, time
+started = time.perf_counter()
+from app.utils.prediction import StrokePredictor
+predictor = StrokePredictor(backend=sys.argv[1])
+startup = time.perf_counter() - started
+
+from benchmarks.common import SAMPLE_PATIENT, latency_summary, peak_rss_mb
+predictor.predict_risk(SAMPLE_PATIENT)
+latencies = []
+for _ in range(int(sys.argv[2])):
+    t = time.perf_counter()
+    predictor.predict_risk(SAMPLE_PATIENT)
+    latencies.append(time.perf_counter() - t)
+
+print(json.dumps({
+    'backend': predictor.backend.name,
+    'startup_s': startup,
+    'latency': latency_summary(latencies),
+    'peak_rss_mb': peak_rss_mb(),
+    'imports_tensorflow': 'tensorflow' in sys.modules,
+}))
+'''
+
+
+def measure(backend, requests):
+    result = subprocess.run(
+        [sys.executable, '-c', _MEASURE, backend, str(requests)],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {'backend': backend, 'error': result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+', default=['numpy', 'lite', 'keras'])
+    parser.add_argument('--requests', type=int, default=1000, help='single-row predictions per backend')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    results = [measure(backend, args.requests) for backend in args.backends]
+
+    print(f"{'backend':<10}{'startup s':>11}{'p50 ms':>10}{'p99 ms':>10}{'peak RSS MB':>13}{'TF':>5}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['backend']:<10}  unavailable: {result['error']}")
+            continue
+        latency = result['latency']
+        print(
+            f"{result['backend']:<10}{result['startup_s']:>11.2f}{latency['p50_ms']:>10.3f}"
+            f"{latency['p99_ms']:>10.3f}{result['peak_rss_mb']:>13.1f}"
+            f"{'yes' if result['imports_tensorflow'] else 'no':>5}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Logins per second for each bcrypt cost factor.
+
+For every cost, a user is hashed at that cost and ``--threads`` threads log
+in through the Flask test client for ``--seconds``. Logins rejected by the
+bounded hashing pool (503) are counted separately. Run from the
+stroke_prediction directory:
+
+    python -m benchmarks.bench_bcrypt --costs 10 11 12 13 --threads 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from benchmarks.common import BENCH_EMAIL, BENCH_PASSWORD, benchmark_app, latency_summary
+
+
+def bench_cost(cost, threads, seconds):
+    from app.models.user import User
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['BCRYPT_ROUNDS'] = str(cost)
+        app = benchmark_app(os.path.join(tmp, 'users.db'), load_model=False)
+
+        with app.app_context():
+            started = time.perf_counter()
+            User.hash_password(BENCH_PASSWORD)
+            hash_ms = (time.perf_counter() - started) * 1000
+
+        deadline = time.monotonic() + seconds
+        latencies, busy, lock = [], [0], threading.Lock()
+
+        def login_loop():
+            client = app.test_client()
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                response = client.post('/auth/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if response.status_code == 302:
+                        latencies.append(elapsed)
+                    elif response.status_code == 503:
+                        busy[0] += 1
+                if response.status_code == 503:
+                    time.sleep(0.1)  # back off like a client retrying, instead of spinning
+                    continue
+                client.get('/auth/logout')
+
+        pool = [threading.Thread(target=login_loop) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+    return {
+        'cost': cost,
+        'hash_ms': hash_ms,
+        'logins': len(latencies),
+        'logins_per_s': len(latencies) / seconds,
+        'rejected_503': busy[0],
+        'latency': latency_summary(latencies) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--costs', type=int, nargs='+', default=[10, 11, 12, 13])
+    parser.add_argument('--threads', type=int, default=8, help='concurrent login loops')
+    parser.add_argument('--seconds', type=float, default=10.0, help='duration per cost')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    results = [bench_cost(cost, args.threads, args.seconds) for cost in args.costs]
+
+    print(f"{'cost':>5}{'hash ms':>10}{'logins/s':>10}{'503s':>7}{'p50 ms':>9}{'p95 ms':>9}")
+    for result in results:
+        latency = result['latency'] or {'p50_ms': 0.0, 'p95_ms': 0.0}
+        print(
+            f"{result['cost']:>5}{result['hash_ms']:>10.1f}{result['logins_per_s']:>10.1f}"
+            f"{result['rejected_503']:>7}{latency['p50_ms']:>9.1f}{latency['p95_ms']:>9.1f}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
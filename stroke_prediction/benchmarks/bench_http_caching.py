@@ -0,0 +1,106 @@
+"""Bytes transferred for a home page visit with and without HTTP caching.
+
+Replays the home page (HTML, the stylesheets and scripts it links, and the
+/patient/list and /patient/count fetches from render_patients_list.js)
+through the Flask test client with mongomock. "plain" sends no
+Accept-Encoding and no validators, like the app did before compression and
+ETags. "cached" accepts gzip/brotli and behaves like a browser: on a repeat
+visit immutable assets come from cache without a request and the JSON
+fetches revalidate with If-None-Match. Run from the stroke_prediction
+directory:
+
+    python -m benchmarks.bench_http_caching --patients 200
+"""
+import argparse
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+from benchmarks.common import BENCH_EMAIL, BENCH_PASSWORD, benchmark_app
+
+
+def build_app(sqlite_path, patients):
+    from app.models.patient import Patient
+
+    app = benchmark_app(sqlite_path, load_model=False)
+    Patient.objects.insert([
+        Patient(
+            patient_id=f"{500000000 + n}", name=f"Patient, Number {n}", age=50, gender='Female',
+            ever_married='Yes', work_type='Private', residence_type='Urban', heart_disease='No',
+            hypertension='Yes', avg_glucose_level=100.0, bmi=25.0, smoking_status='Unknown',
+            stroke_risk=30.0, record_entry_date=datetime(2024, 1, 1), created_by='Benchmark User'
+        )
+        for n in range(patients)
+    ])
+    return app
+
+
+def visit(client, cache, accept_encoding):
+    """One home page visit; ``cache`` maps URL -> (etag, immutable) from earlier visits"""
+    transferred, requests = 0, 0
+
+    def fetch(url):
+        nonlocal transferred, requests
+        etag, immutable = cache.get(url, (None, False))
+        if immutable:
+            return None  # served from the browser cache
+        headers = {}
+        if accept_encoding:
+            headers['Accept-Encoding'] = accept_encoding
+            if etag:
+                headers['If-None-Match'] = etag
+        response = client.get(url, headers=headers)
+        requests += 1
+        transferred += len(response.get_data())
+        if accept_encoding:
+            cache[url] = (response.headers.get('ETag'), 'immutable' in response.headers.get('Cache-Control', ''))
+        return response
+
+    html = fetch('/')
+    body = html.get_data()
+    if html.headers.get('Content-Encoding') == 'gzip':
+        import gzip
+        body = gzip.decompress(body)
+    elif html.headers.get('Content-Encoding') == 'br':
+        import brotli
+        body = brotli.decompress(body)
+    assets = re.findall(r'(?:href|src)="(/static/[^"]+)"', body.decode('utf-8'))
+    for url in assets:
+        fetch(url.replace('&amp;', '&'))
+    fetch('/patient/list')
+    fetch('/patient/count')
+    return {'requests': requests, 'bytes': transferred}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=200, help='patients stored before the visits')
+    parser.add_argument('--accept-encoding', default='gzip, br', help='Accept-Encoding of the cached client')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, 'users.db'), args.patients)
+        results = {}
+        for mode, accept_encoding in (('plain', None), ('cached', args.accept_encoding)):
+            client = app.test_client()
+            client.post('/auth/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+            cache = {}
+            results[mode] = {
+                'first_visit': visit(client, cache, accept_encoding),
+                'repeat_visit': visit(client, cache, accept_encoding),
+            }
+
+    print(f"{'mode':<8}{'visit':<14}{'requests':>10}{'KB':>10}")
+    for mode, visits in results.items():
+        for name, result in visits.items():
+            print(f"{mode:<8}{name:<14}{result['requests']:>10}{result['bytes'] / 1024:>10.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Compare memory and latency of in-process prediction against the shared model server.
+
+Run from the stroke_prediction directory:
+
+    python -m benchmarks.bench_model_server --workers 4 --requests 500 --backend keras
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import SAMPLE_PATIENT, latency_summary, rss_mb
+
+
+def _in_process_worker(backend, requests, results):
+    from app.utils.prediction import StrokePredictor
+    predictor = StrokePredictor(backend=backend)
+    results.put(_time_predictions(predictor, requests))
+
+
+def _client_worker(socket_path, requests, results):
+    from app.utils.model_server import ModelServerClient
+    results.put(_time_predictions(ModelServerClient(socket_path), requests))
+
+
+def _time_predictions(predictor, requests):
+    predictor.predict_risk(SAMPLE_PATIENT)  # warm up
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        predictor.predict_risk(SAMPLE_PATIENT)
+        latencies.append(time.perf_counter() - started)
+    return {'latencies': latencies, 'rss_mb': rss_mb()}
+
+
+def _run_workers(target, args, workers):
+    """Run ``workers`` processes concurrently and collect their results"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=target, args=(*args, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return collected
+
+
+def _report(workers_results, extra_rss=0.0):
+    latencies = [latency for result in workers_results for latency in result['latencies']]
+    worker_rss = [result['rss_mb'] for result in workers_results]
+    return {
+        'latency': latency_summary(latencies),
+        'worker_rss_mb': sum(worker_rss) / len(worker_rss),
+        'total_rss_mb': sum(worker_rss) + extra_rss,
+    }
+
+
+def bench_in_process(backend, workers, requests):
+    return _report(_run_workers(_in_process_worker, (backend, requests), workers))
+
+
+def bench_model_server(backend, workers, requests, window_ms):
+    socket_path = os.path.join(tempfile.mkdtemp(), 'model.sock')
+    env = dict(os.environ, PREDICTION_BACKEND=backend)
+    server = subprocess.Popen(
+        [sys.executable, 'run_model_server.py', '--socket', socket_path, '--window-ms', str(window_ms)],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 120
+        while not os.path.exists(socket_path):
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("Model server failed to start")
+            time.sleep(0.1)
+
+        results = _run_workers(_client_worker, (socket_path, requests), workers)
+        server_rss = rss_mb(server.pid) or 0.0
+        report = _report(results, extra_rss=server_rss)
+        report['server_rss_mb'] = server_rss
+        return report
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='simulated web worker processes')
+    parser.add_argument('--requests', type=int, default=500, help='predictions per worker')
+    parser.add_argument('--backend', default='keras', choices=['keras', 'numpy'])
+    parser.add_argument('--window-ms', type=float, default=1.0, help='model server batching window')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    results = {
+        'config': vars(args),
+        'in_process': bench_in_process(args.backend, args.workers, args.requests),
+        'model_server': bench_model_server(args.backend, args.workers, args.requests, args.window_ms),
+    }
+
+    print(f"{'mode':<14}{'total RSS MB':>14}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode in ('in_process', 'model_server'):
+        latency = results[mode]['latency']
+        print(f"{mode:<14}{results[mode]['total_rss_mb']:>14.1f}{latency['p50_ms']:>10.3f}{latency['p99_ms']:>10.3f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
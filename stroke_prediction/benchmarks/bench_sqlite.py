@@ -0,0 +1,143 @@
+"""Login throughput against one SQLite file with the tuned engine profile on and off.
+
+Starts several worker processes (like gunicorn workers), each with several
+threads, that log in repeatedly through the Flask test client while a
+share of requests also write (profile name updates). Reports logins per
+second, latency and "database is locked" failures for SQLITE_PROFILE=tuned
+and =default. Run from the stroke_prediction directory:
+
+    python -m benchmarks.bench_sqlite --workers 4 --threads 4 --seconds 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from benchmarks.common import benchmark_app, latency_summary
+
+
+def build_app(profile, sqlite_path):
+    os.environ['SQLITE_PROFILE'] = profile
+    return benchmark_app(sqlite_path, load_model=False, create_user=False)
+
+
+def create_users(profile, sqlite_path, count):
+    from app import db, bcrypt
+    from app.models.user import User
+
+    app = build_app(profile, sqlite_path)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # Cheap hashes keep bcrypt from hiding the database cost
+        password = bcrypt.generate_password_hash('benchmark', rounds=4).decode('utf-8')
+        db.session.add_all(
+            User(name=f'User {i}', email=f'user{i}@example.com', password=password, role='staff')
+            for i in range(count)
+        )
+        db.session.commit()
+
+
+def _thread(app, email, deadline, write_every, out):
+    client = app.test_client()
+    latencies, errors, writes, i = [], 0, 0, 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            response = client.post('/auth/login', data={'email': email, 'password': 'benchmark'})
+            ok = response.status_code == 302
+            if ok and write_every and i % write_every == 0:
+                response = client.post('/profile/update_name', data={'new_name': f'{email} {i}'})
+                ok = response.status_code == 302
+                writes += 1
+            client.get('/auth/logout')
+        except Exception:
+            ok = False  # "database is locked" surfaces as an OperationalError
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+        i += 1
+    out.append((latencies, errors, writes))
+
+
+def _worker(profile, sqlite_path, worker, threads, seconds, write_every, results):
+    app = build_app(profile, sqlite_path)
+    deadline = time.monotonic() + seconds
+    out = []
+    pool = [
+        threading.Thread(target=_thread, args=(app, f'user{worker * threads + t}@example.com', deadline, write_every, out))
+        for t in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(out)
+
+
+def run_profile(profile, sqlite_path, workers, threads, seconds, write_every):
+    create_users(profile, sqlite_path, workers * threads)
+
+    ctx = multiprocessing.get_context('fork')
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_worker, args=(profile, sqlite_path, w, threads, seconds, write_every, results))
+        for w in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = [value for out in collected for thread in out for value in thread[0]]
+    errors = sum(thread[1] for out in collected for thread in out)
+    writes = sum(thread[2] for out in collected for thread in out)
+    return {
+        'profile': profile,
+        'logins': len(latencies),
+        'logins_per_s': len(latencies) / seconds,
+        'writes': writes,
+        'errors': errors,
+        'latency': latency_summary(latencies) if latencies else None,
+        'max_ms': float(np.max(latencies) * 1000) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='processes sharing the database file')
+    parser.add_argument('--threads', type=int, default=4, help='threads per process')
+    parser.add_argument('--seconds', type=float, default=10.0, help='duration per profile')
+    parser.add_argument('--write-every', type=int, default=5,
+                        help='also update the profile name on every Nth login (0: logins only)')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    results = []
+    for profile in ('default', 'tuned'):
+        # A fresh file per profile; WAL mode persists in the database file
+        with tempfile.TemporaryDirectory() as tmp:
+            results.append(run_profile(
+                profile, os.path.join(tmp, 'users.db'), args.workers, args.threads, args.seconds, args.write_every
+            ))
+
+    print(f"{'profile':<9}{'logins/s':>10}{'writes':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for result in results:
+        latency = result['latency'] or {'p50_ms': 0.0, 'p95_ms': 0.0}
+        print(
+            f"{result['profile']:<9}{result['logins_per_s']:>10.1f}{result['writes']:>8}{result['errors']:>8}"
+            f"{latency['p50_ms']:>9.1f}{latency['p95_ms']:>9.1f}{result['max_ms'] or 0.0:>9.1f}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Measure /patient/typeahead query latency as the patients collection grows.
+
+Needs a real MongoDB (mongomock has no indexes). The collection in the
+given scratch database is dropped and refilled. Run from the
+stroke_prediction directory:
+
+    python -m benchmarks.bench_typeahead --mongo-uri mongodb://localhost:27017/typeahead_bench \\
+        --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import random
+import time
+from mongoengine import connect
+from app.models.patient import Patient
+from app.utils.db_indexes import ensure_declared_indexes, plan_stages
+from app.utils.name_search import normalize_name
+from app.utils.patient_search import typeahead
+from benchmarks.common import latency_summary
+import Populate_MongoDB
+
+
+def grow_collection(current, target, chunk_size=10000):
+    """Insert synthetic patients until the collection holds ``target`` rows"""
+    collection = Patient._get_collection()
+    for start in range(current, target, chunk_size):
+        _, documents, _ = Populate_MongoDB.generate_chunk(start, min(chunk_size, target - start), seed=42)
+        for document in documents:
+            document['stroke_risk'] = round(random.uniform(0, 100), 2)  # scoring is not what we measure
+        collection.insert_many(documents, ordered=False)
+
+
+def sample_queries(count, rng):
+    """Name prefixes of 1-4 characters taken from stored names, plus patient_id prefixes"""
+    names = [
+        document['name'] for document in
+        Patient._get_collection().aggregate([{'$sample': {'size': count}}, {'$project': {'name': 1}}])
+    ]
+    queries = []
+    for name in names:
+        word = rng.choice(normalize_name(name).split(' '))
+        queries.append(word[:rng.randint(1, 4)])
+    queries.extend(str(Populate_MongoDB.ID_BASE + rng.randrange(1000))[:rng.randint(3, 7)] for _ in range(count // 4))
+    return queries
+
+
+def bench_size(size, queries, limit):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        typeahead(query, limit=limit, max_time_ms=2000)
+        latencies.append(time.perf_counter() - started)
+
+    explain = Patient.objects(name_search__startswith='a').order_by().limit(limit).explain()
+    return {
+        'size': size,
+        'latency': latency_summary(latencies),
+        'name_plan': plan_stages(explain),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri', required=True, help='scratch database; its patients collection is replaced')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=500, help='queries per size')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    connect(host=args.mongo_uri)
+    Patient.drop_collection()
+    ensure_declared_indexes([Patient])
+    rng = random.Random(0)
+
+    results, current = [], 0
+    for size in sorted(args.sizes):
+        grow_collection(current, size)
+        current = size
+        results.append(bench_size(size, sample_queries(args.queries, rng), args.limit))
+
+    print(f"{'patients':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  plan")
+    for result in results:
+        latency = result['latency']
+        print(
+            f"{result['size']:>10,}{latency['p50_ms']:>10.2f}{latency['p95_ms']:>10.2f}"
+            f"{latency['p99_ms']:>10.2f}  {' <- '.join(result['name_plan'])}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Count the SQLite queries the cached Flask-Login user loader saves.
+
+Replays the home page's polling mix (list, count, stats) plus occasional
+page loads through the Flask test client, once with the user cache and
+once without, and reports users-table queries and latency per request.
+Run from the stroke_prediction directory:
+
+    python -m benchmarks.bench_user_cache --requests 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from benchmarks.common import BENCH_EMAIL, BENCH_PASSWORD, benchmark_app, latency_summary
+
+# (path, weight) of the requests a logged-in home page makes
+REQUEST_MIX = [
+    ('/patient/list', 4),
+    ('/patient/count', 4),
+    ('/patient/stats', 1),
+    ('/', 1),
+]
+
+
+def replay(app, requests, cached):
+    """Run ``requests`` requests from REQUEST_MIX; returns queries and latency per request"""
+    from sqlalchemy import event
+    from app import db
+    import app.utils.user_cache as user_cache_module
+    from app.utils.user_cache import UserCache
+
+    user_cache_module.user_cache = UserCache.from_env() if cached else None
+    paths = [path for path, weight in REQUEST_MIX for _ in range(weight)]
+    queries = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if 'users' in statement:
+            queries.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    # Requests run outside an app context so each one gets its own session,
+    # as in production; inside one, the session's identity map hides the queries
+    client = app.test_client()
+    client.post('/auth/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+
+    event.listen(engine, 'before_cursor_execute', count)
+    latencies = []
+    for i in range(requests):
+        started = time.perf_counter()
+        client.get(paths[i % len(paths)])
+        latencies.append(time.perf_counter() - started)
+    event.remove(engine, 'before_cursor_execute', count)
+
+    cache = user_cache_module.user_cache
+    return {
+        'requests': requests,
+        'user_queries': len(queries),
+        'queries_per_request': len(queries) / requests,
+        'latency': latency_summary(latencies),
+        'cache': cache.stats() if cache is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = benchmark_app(os.path.join(tmp, 'bench.db'), load_model=False)
+        results = {
+            'uncached': replay(app, args.requests, cached=False),
+            'cached': replay(app, args.requests, cached=True),
+        }
+
+    print(f"{'loader':<10}{'queries':>10}{'per req':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in results.items():
+        latency = result['latency']
+        print(
+            f"{name:<10}{result['user_queries']:>10,}{result['queries_per_request']:>10.3f}"
+            f"{latency['p50_ms']:>10.2f}{latency['p95_ms']:>10.2f}"
+        )
+    saved = results['uncached']['user_queries'] - results['cached']['user_queries']
+    print(f"Saved {saved:,} users-table queries ({saved / args.requests:.3f} per request)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/common.py
+import os
+import resource
+import numpy as np
+
+# Representative /patient/predict payload
+SAMPLE_PATIENT = {
+    'gender': 'Male',
+    'age': '67',
+    'hypertension': '0',
+    'heart_disease': '1',
+    'ever_married': 'Yes',
+    'residence_type': 'Urban',
+    'avg_glucose_level': '228.69',
+    'bmi': '36.6',
+    'work_type': 'Private',
+    'smoking_status': 'formerly smoked'
+}
+
+BENCH_EMAIL = 'bench@example.com'
+BENCH_PASSWORD = 'benchmark'
+
+
+def benchmark_app(sqlite_path=None, load_model=True, create_user=True):
+    """Flask app on mongomock and a SQLite file (in memory when ``sqlite_path`` is None).
+
+    With ``load_model=False`` the background model load is skipped, so it
+    does not compete for CPU in benchmarks that never predict. With
+    ``create_user`` a staff user BENCH_EMAIL / BENCH_PASSWORD is added.
+    """
+    import mongomock
+    from mongoengine import connect, disconnect
+
+    os.environ['SQLITE_DATABASE_URI'] = f"sqlite:///{sqlite_path or ':memory:'}"
+    from app import create_app, db
+    from app.models.user import User
+    if not load_model:
+        from app.views.process_patient import predictor_loader
+        predictor_loader.start = lambda: None
+    disconnect()
+    app = create_app()
+    disconnect()
+    connect('benchdb', host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, SECRET_KEY='benchmark')
+
+    if create_user:
+        with app.app_context():
+            db.create_all()
+            user = User(name='Benchmark User', email=BENCH_EMAIL, role='staff')
+            user.set_password(BENCH_PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+    return app
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if os.uname().sysname == 'Darwin' else peak / 1024
+
+
+def rss_mb(pid=None):
+    """Current resident set size of ``pid`` (default: this process) in MB, from /proc.
+
+    Falls back to this process's peak RSS, or None for other processes,
+    where /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb() if pid is None else None
+
+
+def latency_summary(seconds):
+    """p50/p95/p99/mean in milliseconds for a list of durations in seconds"""
+    ms = np.asarray(seconds) * 1000
+    return {
+        'count': int(ms.size),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
@@ -0,0 +1,234 @@
+"""Benchmark suite for StrokePredictor and the /patient/predict route.
+
+Measures cold start, single-row latency, batch throughput, peak RSS and
+end-to-end route latency, saves the results as a JSON baseline and compares
+a run against a baseline. Run from the stroke_prediction directory:
+
+    python -m benchmarks.suite run --output benchmarks/baselines/local.json
+    python -m benchmarks.suite compare benchmarks/baselines/local.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from benchmarks.common import BENCH_EMAIL, BENCH_PASSWORD, SAMPLE_PATIENT, benchmark_app, latency_summary, peak_rss_mb
+
+BATCH_SIZES = [1, 4, 16, 64, 256, 1024, 4096]
+
+# Metrics where a larger value is an improvement; everything else should shrink
+HIGHER_IS_BETTER = ('rows_per_s',)
+
+_COLD_START = '''
+import json, sys, time
+started = time.perf_counter()
+from app.utils.prediction import StrokePredictor
+predictor = StrokePredictor(backend=sys.argv[1])
+print(json.dumps({'cold_start_s': time.perf_counter() - started, 'backend': predictor.backend.name}))
+'''
+
+
+def bench_cold_start(backend, repeats):
+    """Time StrokePredictor() in fresh interpreters so imports are included"""
+    timings = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, '-c', _COLD_START, backend],
+            capture_output=True, text=True, check=True
+        )
+        timings.append(json.loads(result.stdout.strip().splitlines()[-1])['cold_start_s'])
+    timings.sort()
+    return {'median_s': timings[len(timings) // 2], 'min_s': timings[0]}
+
+
+def bench_single_row(predictor, requests):
+    predictor.predict_risk(SAMPLE_PATIENT)  # warm up
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        predictor.predict_risk(SAMPLE_PATIENT)
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies)
+
+
+def bench_throughput(predictor, batch_sizes, min_seconds):
+    """Rows per second through predict_risk_batch at each batch size"""
+    results = {}
+    for size in batch_sizes:
+        rows = [SAMPLE_PATIENT] * size
+        predictor.predict_risk_batch(rows)  # warm up
+        batches = 0
+        started = time.perf_counter()
+        while True:
+            predictor.predict_risk_batch(rows)
+            batches += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_seconds:
+                break
+        results[str(size)] = {'rows_per_s': batches * size / elapsed}
+    return results
+
+
+def bench_route(requests):
+    """End-to-end /patient/predict latency through the Flask test client and mongomock"""
+    from mongoengine import disconnect
+    from app.models.patient import Patient
+    from app.views.process_patient import get_predictor
+
+    app = benchmark_app()
+
+    with app.app_context():
+        get_predictor()  # wait for the background model load
+        client = app.test_client()
+        client.post('/auth/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+
+        form = dict(SAMPLE_PATIENT, name='Benchmark Patient')
+        client.post('/patient/predict', data=form)  # warm up
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.post('/patient/predict', data=form)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"/patient/predict returned {response.status_code}: {response.get_data(as_text=True)}")
+
+        Patient.objects.delete()
+    disconnect()
+    return latency_summary(latencies)
+
+
+def run(args):
+    from app.utils.prediction import StrokePredictor
+
+    os.environ.pop('PREDICTION_CACHE_PATH', None)  # measure the model, not the cache
+    os.environ['PREDICTION_BACKEND'] = args.backend
+
+    results = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'backend': args.backend,
+        },
+        'cold_start': bench_cold_start(args.backend, args.cold_starts),
+    }
+
+    predictor = StrokePredictor(backend=args.backend)
+    results['meta']['backend'] = predictor.backend.name
+    results['single_row'] = bench_single_row(predictor, args.requests)
+    results['throughput'] = bench_throughput(predictor, args.batch_sizes, args.min_seconds)
+    if not args.skip_route:
+        results['route'] = bench_route(args.route_requests)
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+def flatten(results, prefix=''):
+    """Flatten nested results into {'single_row.p99_ms': value} form, skipping metadata"""
+    flat = {}
+    for key, value in results.items():
+        if key in ('meta', 'count'):
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """Relative change of every metric shared by both runs.
+
+    Returns a list of (metric, baseline, current, change, regressed) tuples.
+    ``change`` is signed so that positive always means worse.
+    """
+    baseline, current = flatten(baseline), flatten(current)
+    rows = []
+    for metric in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[metric], current[metric]
+        if old == 0:
+            continue
+        change = (new - old) / old
+        if metric.rsplit('.', 1)[-1] in HIGHER_IS_BETTER:
+            change = -change
+        rows.append((metric, old, new, change, change > threshold))
+    return rows
+
+
+def print_results(results):
+    print(f"backend: {results['meta']['backend']}")
+    print(f"cold start: {results['cold_start']['median_s']:.2f} s (median)")
+    single = results['single_row']
+    print(f"single row: p50 {single['p50_ms']:.3f} ms  p95 {single['p95_ms']:.3f} ms  p99 {single['p99_ms']:.3f} ms")
+    for size, stats in results['throughput'].items():
+        print(f"batch {size:>5}: {stats['rows_per_s']:>12,.0f} rows/s")
+    if 'route' in results:
+        route = results['route']
+        print(f"/patient/predict: p50 {route['p50_ms']:.2f} ms  p95 {route['p95_ms']:.2f} ms  p99 {route['p99_ms']:.2f} ms")
+    print(f"peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the suite and optionally save a baseline')
+    run_parser.add_argument('--backend', default='auto', help='inference backend to measure')
+    run_parser.add_argument('--requests', type=int, default=2000, help='single-row predictions')
+    run_parser.add_argument('--route-requests', type=int, default=300, help='/patient/predict calls')
+    run_parser.add_argument('--cold-starts', type=int, default=3, help='fresh interpreters to time')
+    run_parser.add_argument('--batch-sizes', type=int, nargs='+', default=BATCH_SIZES)
+    run_parser.add_argument('--min-seconds', type=float, default=0.5, help='time spent per batch size')
+    run_parser.add_argument('--skip-route', action='store_true', help='skip the Flask route benchmark')
+    run_parser.add_argument('--output', help='write results as JSON to this path')
+
+    compare_parser = commands.add_parser('compare', help='compare a run against a baseline')
+    compare_parser.add_argument('baseline', help='baseline JSON written by "run --output"')
+    compare_parser.add_argument('current', nargs='?', help='results JSON to check (default: run the suite now)')
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                                help='relative slowdown that counts as a regression (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run(args)
+        print_results(results)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=4)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        # Re-run with the baseline's settings so the numbers are comparable
+        run_args = run_parser.parse_args([
+            '--backend', baseline['meta']['backend'],
+            '--batch-sizes', *baseline['throughput'].keys(),
+            *([] if 'route' in baseline else ['--skip-route']),
+        ])
+        current = run(run_args)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"{'metric':<32}{'baseline':>14}{'current':>14}{'change':>9}")
+    for metric, old, new, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{metric:<32}{old:>14.3f}{new:>14.3f}{change:>+9.1%}{flag}")
+
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
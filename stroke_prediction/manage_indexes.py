@@ -0,0 +1,43 @@
+#manage_indexes.py
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+from mongoengine import connect
+from app.utils.db_indexes import MANAGED_DOCUMENTS, ensure_declared_indexes, index_report
+from app.utils.patient_search import backfill_name_search
+
+def print_report(report):
+    print(f"{report['collection']}:")
+    for spec in report['missing']:
+        fields = ', '.join(f"{field} {'desc' if direction == -1 else 'asc'}" for field, direction in spec['fields'])
+        print(f"  missing     ({fields}){' unique' if spec.get('unique') else ''}")
+    for name in report['mismatched']:
+        print(f"  mismatched  {name} (unique option differs from the model)")
+    for name in report['undeclared']:
+        print(f"  undeclared  {name}")
+    if not any(report[key] for key in ('missing', 'mismatched', 'undeclared')):
+        print("  ok")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create or verify the MongoDB indexes declared on the models')
+    parser.add_argument('--check', action='store_true',
+                        help='only report; exit with status 1 if a declared index is missing')
+    args = parser.parse_args()
+
+    load_dotenv()
+    connect(host=os.getenv("MONGO_URI"))
+
+    if args.check:
+        reports = [index_report(document) for document in MANAGED_DOCUMENTS]
+        for report in reports:
+            print_report(report)
+        sys.exit(1 if any(report['missing'] or report['mismatched'] for report in reports) else 0)
+
+    for report in ensure_declared_indexes():
+        print_report(report)
+        if report['missing']:
+            print(f"  created {len(report['missing'])} index(es)")
+
+    # Typeahead terms for patients saved before name_search existed
+    print(f"name_search backfilled on {backfill_name_search()} patient(s)")
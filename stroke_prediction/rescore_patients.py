@@ -0,0 +1,57 @@
+"""Re-score stored patients with the current model.
+
+Patients whose model_version differs from the loaded model are scored in
+chunks and updated in place. Progress is checkpointed per model version,
+so running the command again after an interruption resumes where it
+stopped:
+
+    python rescore_patients.py --chunk-size 2000
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+from mongoengine import connect
+from app.utils.patient_counts import patient_counts
+from app.utils.prediction import StrokePredictor
+from app.utils.rescoring import RescoringJob
+
+def print_stage(stage, rows, seconds):
+    rate = rows / seconds if seconds else float('inf')
+    print(f"  {stage:<7}{rows:>12,} rows {seconds:>10.2f} s {rate:>14,.0f} rows/s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Re-score stored patients with the current model')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='patients per read, model call and bulk write')
+    parser.add_argument('--model-version', help='version to record (default: hash of the loaded model files)')
+    parser.add_argument('--force', action='store_true', help='also re-score patients already at this version')
+    parser.add_argument('--restart', action='store_true', help='ignore the saved checkpoint and start over')
+    parser.add_argument('--limit', type=int, help='stop after about this many patients (resume later)')
+    parser.add_argument('--mongo-uri', default=None, help='MongoDB URI (default: MONGO_URI from .env)')
+    args = parser.parse_args()
+
+    load_dotenv()
+    connect(host=args.mongo_uri or os.getenv('MONGO_URI'))
+
+    job = RescoringJob(StrokePredictor(), args.model_version, args.chunk_size, force=args.force)
+    if args.restart:
+        job.reset()
+
+    print(f"Re-scoring patients with model version {job.model_version}")
+    try:
+        stats = job.run(limit=args.limit)
+    except KeyboardInterrupt:
+        # The chunk being written finishes and is checkpointed before we get here
+        checkpoint = job.checkpoint() or {}
+        print(f"Interrupted after patient {checkpoint.get('last_patient_id')}; run again to resume")
+        raise SystemExit(130)
+
+    if stats['resumed_after']:
+        print(f"Resumed after patient {stats['resumed_after']}")
+    print(f"Re-scored {stats['write'][0]} patient(s) ({stats['failed']} failed)"
+          f"{'' if stats['finished'] else '; run again to continue'}")
+    for stage in ('read', 'score', 'write', 'total'):
+        print_stage(stage, *stats[stage])
+
+    # Risk levels changed, so rebuild the risk-level rollups
+    if stats['write'][0]:
+        patient_counts.reconcile()
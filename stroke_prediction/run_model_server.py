@@ -0,0 +1,22 @@
+#run_model_server.py
+import argparse
+import os
+from app.utils.batching import MicroBatcher
+from app.utils.model_server import ModelServer
+from app.utils.prediction import StrokePredictor
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve stroke predictions to web workers over a Unix socket')
+    parser.add_argument('--socket', default=os.getenv('PREDICTION_SERVER_SOCKET', '/tmp/stroke_prediction.sock'))
+    parser.add_argument('--window-ms', type=float, default=2.0, help='micro-batching window')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    predictor = MicroBatcher(StrokePredictor(), max_batch_size=args.max_batch_size, window_ms=args.window_ms)
+    server = ModelServer(args.socket, predictor)
+    print(f"Model server listening on {args.socket}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(args.socket)